@@ -0,0 +1,225 @@
+import json
+import math
+import operator
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Dict, List, Optional
+
+from monitor import operator_id, to_number
+
+# Where alert rules are persisted (None disables persistence) and how many raise/clear events are kept
+ALERT_RULES_FILE = os.getenv('ALERT_RULES_FILE', 'usr-mgm/alert_rules.json')
+ALERT_EVENTS_SIZE = int(os.getenv('ALERT_EVENTS_SIZE', '500'))
+
+OPS = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+MODES = ("value", "delta")
+
+
+class CompiledRule:
+    """
+    A rule turned into two predicates once, at registration time:
+    `trigger` (the breach condition) and `clear` (the recovery condition).
+    With a clear_threshold the two are separated by a hysteresis band, e.g.
+    Free Space Percent < 10 raises and only >= 15 clears.
+    """
+
+    def __init__(self, rule_id: str, spec: Dict):
+        op = spec.get("op", "<")
+        if op not in OPS:
+            raise ValueError(f"Unsupported op '{op}', use one of {', '.join(OPS)}")
+        mode = spec.get("mode", "value")
+        if mode not in MODES:
+            raise ValueError(f"Unsupported mode '{mode}', use one of {', '.join(MODES)}")
+        if not spec.get("metric"):
+            raise ValueError("Rule needs a metric")
+
+        threshold = float(spec["threshold"])
+        clear_threshold = spec.get("clear_threshold")
+        clear_threshold = threshold if clear_threshold is None else float(clear_threshold)
+        if (op in ("<", "<=") and clear_threshold < threshold) or (op in (">", ">=") and clear_threshold > threshold):
+            raise ValueError("clear_threshold must be on the recovery side of threshold")
+
+        self.id = rule_id
+        self.spec = {**spec, "id": rule_id, "op": op, "mode": mode, "threshold": threshold, "clear_threshold": clear_threshold}
+        self.name = spec.get("name") or f"{spec['metric']} {op} {threshold:g}"
+        self.metric = spec["metric"]
+        self.mode = mode
+        self.for_samples = max(int(spec.get("for_samples", 1)), 1)
+        self.node = spec.get("node")
+        self.conn = spec.get("conn")
+        self.severity = spec.get("severity", "warning")
+
+        compare = OPS[op]
+        self.trigger = lambda value: compare(value, threshold)
+        self.clear = lambda value: not compare(value, clear_threshold)
+
+    def applies_to(self, conn: str, node: str) -> bool:
+        return (self.conn is None or self.conn == conn) and (self.node is None or self.node == node)
+
+
+class AlertEngine:
+    """
+    Evaluates compiled rules incrementally on each monitor sample.
+    One alert exists per (conn, rule, operator) while it is active; repeated breaches
+    update it instead of raising duplicates.
+    """
+
+    def __init__(self, rules_file: Optional[str] = ALERT_RULES_FILE, events_size: int = ALERT_EVENTS_SIZE):
+        self.rules_file = rules_file
+        self.rules = {}
+        self.rules_by_metric = {}
+        self.state = {}
+        self.previous = {}
+        self.events = deque(maxlen=events_size)
+        self._lock = threading.Lock()
+        self._load_rules()
+
+    # Rules
+
+    def _load_rules(self):
+        if not self.rules_file or not os.path.exists(self.rules_file):
+            return
+        try:
+            with open(self.rules_file, 'r') as f:
+                specs = json.load(f).get("rules", [])
+        except Exception as e:
+            print(f"Error loading {self.rules_file}: {e}")
+            return
+        for spec in specs:
+            try:
+                self._register(CompiledRule(spec["id"], spec))
+            except (KeyError, ValueError) as e:
+                print(f"Skipping invalid alert rule {spec}: {e}")
+
+    def _save_rules(self):
+        if not self.rules_file:
+            return
+        try:
+            with open(self.rules_file, 'w') as f:
+                json.dump({"rules": [rule.spec for rule in self.rules.values()]}, f, indent=2)
+        except Exception as e:
+            print(f"Error saving {self.rules_file}: {e}")
+
+    def _register(self, rule: CompiledRule):
+        self.rules[rule.id] = rule
+        self.rules_by_metric.setdefault(rule.metric, []).append(rule)
+
+    def add_rule(self, spec: Dict) -> Dict:
+        rule = CompiledRule(spec.get("id") or uuid.uuid4().hex[:12], spec)
+        with self._lock:
+            if rule.id in self.rules:
+                self._unregister(rule.id)
+            self._register(rule)
+            self._save_rules()
+        return rule.spec
+
+    def _unregister(self, rule_id: str) -> bool:
+        rule = self.rules.pop(rule_id, None)
+        if rule is None:
+            return False
+        self.rules_by_metric[rule.metric].remove(rule)
+        self.state = {key: value for key, value in self.state.items() if key[1] != rule_id}
+        return True
+
+    def remove_rule(self, rule_id: str) -> bool:
+        with self._lock:
+            removed = self._unregister(rule_id)
+            if removed:
+                self._save_rules()
+        return removed
+
+    def list_rules(self) -> List[Dict]:
+        with self._lock:
+            return [rule.spec for rule in self.rules.values()]
+
+    # Evaluation
+
+    def on_sample(self, poller, rows: List[Dict], sampled_at: float):
+        """
+        Monitor poller listener. Rules for the node keep its poller running
+        so alerts are evaluated even when nobody has the monitor page open.
+        """
+        with self._lock:
+            watched = any(rule.conn is None or rule.conn == poller.conn for rule in self.rules.values())
+        if watched:
+            poller.last_read = time.time()
+        self.evaluate(poller.conn, rows, sampled_at)
+
+    def evaluate(self, conn: str, rows: List[Dict], sampled_at: float):
+        with self._lock:
+            for row in rows:
+                node = operator_id(row)
+                for metric, rules in self.rules_by_metric.items():
+                    if not rules or metric not in row:
+                        continue
+                    value = to_number(row[metric])
+                    previous = self.previous.get((conn, node, metric))
+                    self.previous[(conn, node, metric)] = value
+                    if math.isnan(value):
+                        continue
+                    for rule in rules:
+                        if not rule.applies_to(conn, node):
+                            continue
+                        if rule.mode == "delta":
+                            if previous is None or math.isnan(previous):
+                                continue
+                            observed = value - previous
+                        else:
+                            observed = value
+                        self._step(conn, node, rule, observed, sampled_at)
+
+    def _step(self, conn: str, node: str, rule: CompiledRule, observed: float, sampled_at: float):
+        key = (conn, rule.id, node)
+        state = self.state.get(key)
+        if state is None:
+            state = self.state[key] = {"streak": 0, "alert": None}
+
+        alert = state["alert"]
+        if alert is None:
+            if rule.trigger(observed):
+                state["streak"] += 1
+                if state["streak"] >= rule.for_samples:
+                    state["alert"] = {
+                        "id": uuid.uuid4().hex[:12],
+                        "rule_id": rule.id,
+                        "rule": rule.name,
+                        "severity": rule.severity,
+                        "conn": conn,
+                        "node": node,
+                        "metric": rule.metric,
+                        "value": observed,
+                        "since": sampled_at,
+                        "last_seen": sampled_at,
+                        "occurrences": 1,
+                    }
+                    self.events.append({"event": "raised", "at": sampled_at, **state["alert"]})
+            else:
+                state["streak"] = 0
+        elif rule.clear(observed):
+            self.events.append({"event": "cleared", "at": sampled_at, **alert, "value": observed})
+            state["alert"] = None
+            state["streak"] = 0
+        else:
+            alert["value"] = observed
+            alert["last_seen"] = sampled_at
+            alert["occurrences"] += 1
+
+    def active(self, conn: Optional[str] = None) -> List[Dict]:
+        with self._lock:
+            alerts = [dict(state["alert"]) for state in self.state.values() if state["alert"] is not None]
+        if conn is not None:
+            alerts = [alert for alert in alerts if alert["conn"] == conn]
+        return sorted(alerts, key=lambda alert: alert["since"])
+
+    def recent_events(self, limit: int = 100) -> List[Dict]:
+        with self._lock:
+            return list(self.events)[-limit:]
@@ -0,0 +1,231 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from blobs import blob_name
+
+# Local directory the fetched blobs land in (served under /static)
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+
+# Disk quota for cached blobs and where the cache index is persisted
+BLOB_CACHE_MAX_BYTES = int(os.getenv('BLOB_CACHE_MAX_BYTES', str(2 * 1024 ** 3)))
+BLOB_CACHE_INDEX = os.getenv('BLOB_CACHE_INDEX', 'usr-mgm/blob_cache.json')
+
+# Hits only change the access order; that is written at most this often (seconds)
+BLOB_CACHE_SAVE_INTERVAL = float(os.getenv('BLOB_CACHE_SAVE_INTERVAL', '60'))
+
+
+class BlobCache:
+    """
+    Size-bounded LRU over the blobs fetched into static/, keyed by
+    (dbms, table, file id). A hit means the file is already on local disk and the
+    upstream "file get" can be skipped. When the total size goes over the quota
+    the least recently used files are deleted. The index (sizes and access order)
+    is written atomically so it survives restarts. Blobs already in the directory
+    but missing from the index (e.g. fetched before the cache existed) are adopted
+    on load as the least recently used. Listeners are told about every added and
+    evicted file (fn(event, entry), event "added" or "evicted").
+    """
+
+    def __init__(self, directory: str = STATIC_DIR, max_bytes: int = BLOB_CACHE_MAX_BYTES,
+                 index_path: Optional[str] = BLOB_CACHE_INDEX, save_interval: float = BLOB_CACHE_SAVE_INTERVAL):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.index_path = index_path
+        self.save_interval = save_interval
+
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.dirty = False
+        self.accessed = False
+        self.saved_at = time.time()
+        self.listeners = []
+        self._lock = threading.Lock()
+        self._load()
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def _notify(self, event: str, entries: List[Dict]):
+        for entry in entries:
+            for listener in self.listeners:
+                try:
+                    listener(event, entry)
+                except Exception as e:
+                    print(f"Blob cache listener failed on {event} {entry['name']}: {e}")
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _load(self):
+        saved = []
+        if self.index_path and os.path.exists(self.index_path):
+            try:
+                with open(self.index_path, 'r') as f:
+                    saved = json.load(f).get("entries", [])
+            except Exception as e:
+                print(f"Error loading {self.index_path}: {e}")
+        # Saved oldest first, after the adopted files; drop entries whose file is gone
+        indexed = {entry["name"] for entry in saved}
+        for entry in self._unindexed(indexed) + saved:
+            try:
+                size = os.path.getsize(self.path(entry["name"]))
+            except OSError:
+                self.dirty = True
+                continue
+            entry["size"] = size
+            self.entries[entry["name"]] = entry
+            self.total_bytes += size
+        for entry in self._evict():
+            self._remove_file(entry["name"])
+
+    def _unindexed(self, indexed) -> List[Dict]:
+        """
+        Entries for blob files ({dbms}.{table}.{file}) in the directory that the index
+        does not list, oldest modification first.
+        """
+        found = []
+        try:
+            with os.scandir(self.directory) as listing:
+                for item in listing:
+                    name = item.name
+                    if name in indexed or name.count(".") < 2 or ".part." in name or not item.is_file():
+                        continue
+                    dbms, table, file = name.split(".", 2)
+                    modified = item.stat().st_mtime
+                    found.append({"name": name, "dbms": dbms, "table": table, "file": file,
+                                  "size": 0, "added_at": modified, "last_access": modified})
+        except OSError:
+            return []
+        if found:
+            self.dirty = True
+        return sorted(found, key=lambda entry: entry["last_access"])
+
+    def save(self, force: bool = False):
+        """
+        Write the index if files were added or evicted. Access order changes alone
+        are written once save_interval has passed since the last write (or on force).
+        """
+        if not self.index_path:
+            return
+        with self._lock:
+            now = time.time()
+            if not self.dirty and not (self.accessed and (force or now - self.saved_at >= self.save_interval)):
+                return
+            snapshot = {"entries": list(self.entries.values()), "saved_at": now}
+            self.dirty = False
+            self.accessed = False
+            self.saved_at = now
+        directory = os.path.dirname(self.index_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = self.index_path + ".tmp"
+        try:
+            with open(tmp, 'w') as f:
+                json.dump(snapshot, f)
+            os.replace(tmp, self.index_path)
+        except Exception as e:
+            print(f"Error saving {self.index_path}: {e}")
+
+    def lookup(self, dbms: str, table: str, file: str) -> Optional[str]:
+        """
+        Local path of a cached blob (marking it recently used), or None.
+        """
+        name = blob_name(dbms, table, file)
+        with self._lock:
+            entry = self.entries.get(name)
+            if entry is not None and os.path.exists(self.path(name)):
+                self.entries.move_to_end(name)
+                entry["last_access"] = time.time()
+                self.hits += 1
+                self.accessed = True
+                return self.path(name)
+            if entry is not None:
+                # Removed behind our back
+                self.total_bytes -= entry["size"]
+                del self.entries[name]
+            self.misses += 1
+        return None
+
+    def contains(self, name: str) -> bool:
+        """
+        True if the blob is cached, without counting a hit or changing its recency.
+        """
+        with self._lock:
+            return name in self.entries and os.path.exists(self.path(name))
+
+    def size(self, name: str) -> int:
+        with self._lock:
+            entry = self.entries.get(name)
+            return entry["size"] if entry is not None else 0
+
+    def add(self, dbms: str, table: str, file: str) -> Optional[Dict]:
+        """
+        Register a blob that was just written to the directory; None if it is not there.
+        """
+        name = blob_name(dbms, table, file)
+        try:
+            size = os.path.getsize(self.path(name))
+        except OSError:
+            return None
+        now = time.time()
+        with self._lock:
+            previous = self.entries.pop(name, None)
+            if previous is not None:
+                self.total_bytes -= previous["size"]
+            entry = self.entries[name] = {
+                "name": name, "dbms": dbms, "table": table, "file": file,
+                "size": size, "added_at": now, "last_access": now,
+            }
+            self.total_bytes += size
+            self.dirty = True
+            evicted = self._evict(keep=name)
+        for old in evicted:
+            self._remove_file(old["name"])
+        self._notify("added", [entry])
+        self._notify("evicted", evicted)
+        return entry
+
+    def _evict(self, keep: Optional[str] = None) -> List[Dict]:
+        """
+        Drop least recently used entries until under quota (lock held); returns them.
+        """
+        evicted = []
+        while self.total_bytes > self.max_bytes and self.entries:
+            name, entry = next(iter(self.entries.items()))
+            if name == keep:
+                # A single file bigger than the quota stays until something newer arrives
+                break
+            del self.entries[name]
+            self.total_bytes -= entry["size"]
+            self.evictions += 1
+            self.dirty = True
+            evicted.append(entry)
+        return evicted
+
+    def _remove_file(self, name: str):
+        try:
+            os.remove(self.path(name))
+        except OSError:
+            pass
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "files": len(self.entries),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def names(self) -> List[str]:
+        with self._lock:
+            return list(self.entries)
@@ -0,0 +1,186 @@
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+from blobs import blob_name
+
+# Off unless enabled; files per query result, retrievals at once, and the byte budget
+# (bytes/s, 0 = unlimited) with the burst allowed on top of it
+BLOB_PREFETCH = os.getenv('BLOB_PREFETCH', 'false').lower() in ('1', 'true', 'yes')
+BLOB_PREFETCH_FILES = int(os.getenv('BLOB_PREFETCH_FILES', '8'))
+BLOB_PREFETCH_WORKERS = int(os.getenv('BLOB_PREFETCH_WORKERS', '2'))
+BLOB_PREFETCH_BYTES_PER_SEC = int(os.getenv('BLOB_PREFETCH_BYTES_PER_SEC', str(8 * 1024 ** 2)))
+BLOB_PREFETCH_BURST_BYTES = int(os.getenv('BLOB_PREFETCH_BURST_BYTES', str(32 * 1024 ** 2)))
+
+
+class TokenBucket:
+    """
+    Byte budget refilled at `rate` per second up to `burst`. A "file get" only tells
+    us the size once the file is on disk, so consume() charges after the fact and may
+    take the balance negative; wait() then holds the next retrieval until it is paid off.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def consume(self, amount: float):
+        if self.rate <= 0:
+            return
+        with self._lock:
+            self._refill()
+            self.tokens -= amount
+
+    def delay(self) -> float:
+        """
+        Seconds until the balance is back to zero.
+        """
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            self._refill()
+            return max(-self.tokens / self.rate, 0.0)
+
+    def wait(self, stop: threading.Event):
+        delay = self.delay()
+        while delay > 0 and not stop.wait(delay):
+            delay = self.delay()
+
+
+class BlobPrefetcher:
+    """
+    Pulls the first files of a "file using file" query result into the blob cache
+    in the background, so opening the viewer right after is a cache hit.
+    Retrievals go through the shared BlobFetcher (same per-node limits and cache
+    checks) on a few dedicated threads, paced by a byte budget. A newer result
+    replaces whatever an older one still had queued: the user has moved on.
+    """
+
+    def __init__(self, fetcher, cache, max_files: int = BLOB_PREFETCH_FILES, workers: int = BLOB_PREFETCH_WORKERS,
+                 bytes_per_sec: int = BLOB_PREFETCH_BYTES_PER_SEC, burst_bytes: int = BLOB_PREFETCH_BURST_BYTES,
+                 enabled: bool = BLOB_PREFETCH):
+        self.fetcher = fetcher
+        self.cache = cache
+        self.max_files = max_files
+        self.workers = workers
+        self.enabled = enabled
+        self.bucket = TokenBucket(bytes_per_sec, burst_bytes)
+
+        self._queue = deque()
+        self._in_flight = {}
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._threads = []
+        self.counters = {"queued": 0, "fetched": 0, "cached": 0, "failed": 0, "superseded": 0, "bytes": 0}
+
+    def start(self):
+        if not self.enabled or self._threads:
+            return
+        self._stop.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"blob-prefetch-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+
+    def submit(self, conn: str, blobs: List[Dict]) -> int:
+        """
+        Queue the first max_files blobs of a query result that are not cached yet;
+        returns how many were queued.
+        """
+        if not self.enabled or not isinstance(blobs, list):
+            return 0
+        self.start()
+        jobs = {}
+        for blob in blobs[:self.max_files]:
+            if not isinstance(blob, dict) or not all(blob.get(key) for key in ("dbms_name", "table_name", "file", "ip", "port")):
+                continue
+            name = blob_name(blob["dbms_name"], blob["table_name"], blob["file"])
+            # A result may list one file several times (e.g. one image per detection)
+            if name in jobs or self.cache.contains(name):
+                continue
+            jobs[name] = (conn, name, blob)
+        with self._cond:
+            self.counters["superseded"] += len(self._queue)
+            self._queue.clear()
+            self._queue.extend(job for name, job in jobs.items() if name not in self._in_flight)
+            self.counters["queued"] += len(jobs)
+            self._cond.notify_all()
+        return len(jobs)
+
+    def _next_job(self):
+        with self._cond:
+            while not self._stop.is_set():
+                while self._queue:
+                    job = self._queue.popleft()
+                    # Another worker is already fetching this file
+                    if job[1] not in self._in_flight:
+                        self._in_flight[job[1]] = threading.Event()
+                        return job
+                self._cond.wait()
+            return None
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.bucket.wait(self._stop)
+            job = self._next_job()
+            if job is None:
+                return
+            conn, name, blob = job
+            try:
+                result = self.fetcher.fetch_one(conn, blob)
+            except Exception as e:
+                result = {"status": "error", "error": str(e)}
+            size = 0
+            if result["status"] == "ok":
+                size = self.cache.size(name)
+                self.bucket.consume(size)
+            with self._cond:
+                key = {"ok": "fetched", "cached": "cached"}.get(result["status"], "failed")
+                self.counters[key] += 1
+                self.counters["bytes"] += size
+                self._in_flight.pop(name).set()
+            if result["status"] == "error":
+                print(f"Blob prefetch failed for {name}: {result.get('error')}")
+
+    def wait_for(self, names: List[str], timeout: float = 30.0) -> int:
+        """
+        Let a foreground retrieval wait for prefetches of the same files that are
+        already running instead of issuing a second "file get"; queued ones are
+        dropped since the caller fetches them anyway. Returns how many it waited on.
+        """
+        wanted = set(names)
+        with self._cond:
+            self._queue = deque(job for job in self._queue if job[1] not in wanted)
+            events = [event for name, event in self._in_flight.items() if name in wanted]
+        deadline = time.monotonic() + timeout
+        for event in events:
+            event.wait(max(deadline - time.monotonic(), 0))
+        return len(events)
+
+    def stats(self) -> Dict:
+        with self._cond:
+            return {
+                "enabled": self.enabled,
+                "queued": len(self._queue),
+                "in_flight": len(self._in_flight),
+                "budget_wait_s": round(self.bucket.delay(), 2),
+                **self.counters,
+            }
@@ -0,0 +1,144 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterator, List, Optional
+
+import requests
+
+# Destination directory for "file get", as seen by the node that runs it
+BLOBS_DIR = os.getenv('BLOBS_DIR', '/app/CLI/Local-CLI/local-cli-backend/static/')
+
+# Files fetched at once overall, and at once from the same operator
+BLOB_FETCH_WORKERS = int(os.getenv('BLOB_FETCH_WORKERS', '16'))
+BLOB_FETCH_PER_NODE = int(os.getenv('BLOB_FETCH_PER_NODE', '4'))
+
+# Read size and connect/read timeout (seconds) when proxying a node's streaming retrieval
+BLOB_STREAM_CHUNK = int(os.getenv('BLOB_STREAM_CHUNK', str(256 * 1024)))
+BLOB_STREAM_TIMEOUT = float(os.getenv('BLOB_STREAM_TIMEOUT', '30'))
+
+
+def blob_name(dbms: str, table: str, file: str) -> str:
+    """
+    Name of a fetched blob under static/.
+    """
+    return f"{dbms}.{table}.{file}"
+
+
+def file_get_command(blob: Dict, blobs_dir: str = BLOBS_DIR) -> str:
+    ip_port = f"{blob['ip']}:{blob['port']}"
+    dbms = blob['dbms_name']
+    table = blob['table_name']
+    file = blob['file']
+    # Add file full path and name for the destination on THIS MACHINE
+    return f"run client ({ip_port}) file get (dbms = blobs_{dbms} and table = {table} and id = {file}) {blobs_dir}{blob_name(dbms, table, file)}"
+
+
+def open_blob_stream(node: str, dbms: str, table: str, file: str, range_header: Optional[str] = None,
+                     timeout: float = BLOB_STREAM_TIMEOUT) -> requests.Response:
+    """
+    Start a streaming "file retrieve" on the operator that holds the blob.
+    The body is not read; iterate it with iter_content().
+    """
+    headers = {
+        "User-Agent": "AnyLog/1.23",
+        "command": f"file retrieve where dbms = blobs_{dbms} and table = {table} and id = {file} and stream = true",
+    }
+    if range_header:
+        headers["Range"] = range_header
+    return requests.get(f"http://{node}", headers=headers, stream=True, timeout=(timeout, timeout))
+
+
+def tee_to_file(chunks: Iterator[bytes], path: str, on_complete: Callable[[], object]) -> Iterator[bytes]:
+    """
+    Pass chunks through while writing them to path. The file only appears (and
+    on_complete runs) when the whole body was received; an interrupted transfer
+    leaves nothing behind.
+    """
+    partial = f"{path}.part.{threading.get_ident()}"
+    complete = False
+    try:
+        with open(partial, 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+                yield chunk
+        complete = True
+    finally:
+        if complete:
+            os.replace(partial, path)
+            on_complete()
+        elif os.path.exists(partial):
+            os.remove(partial)
+
+
+class BlobFetcher:
+    """
+    Runs "file get" for many blobs concurrently. The shared pool bounds the total
+    number of retrievals in flight and a semaphore per operator (ip:port) keeps
+    one node from being hit with the whole result at once. With a cache, files
+    already on local disk are answered without going to the node.
+    """
+
+    def __init__(self, request: Callable, blobs_dir: str = BLOBS_DIR,
+                 workers: int = BLOB_FETCH_WORKERS, per_node: int = BLOB_FETCH_PER_NODE, cache=None):
+        self.request = request
+        self.blobs_dir = blobs_dir
+        self.per_node = per_node
+        self.cache = cache
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="blob-fetch")
+        self._node_limits = {}
+        self._lock = threading.Lock()
+
+    def _node_limit(self, node: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            limit = self._node_limits.get(node)
+            if limit is None:
+                limit = self._node_limits[node] = threading.BoundedSemaphore(self.per_node)
+        return limit
+
+    def fetch_one(self, conn: str, blob: Dict) -> Dict:
+        node = f"{blob.get('ip')}:{blob.get('port')}"
+        result = {
+            "file": blob.get("file"),
+            "name": blob_name(blob.get("dbms_name"), blob.get("table_name"), blob.get("file")),
+            "node": node,
+        }
+        if self.cache is not None and self.cache.lookup(blob.get("dbms_name"), blob.get("table_name"), blob.get("file")):
+            result.update({"status": "cached", "error": None, "queued_ms": 0.0, "elapsed_ms": 0.0})
+            return result
+
+        queued = time.perf_counter()
+        with self._node_limit(node):
+            started = time.perf_counter()
+            try:
+                response = self.request(conn, "POST", file_get_command(blob, self.blobs_dir))
+                error = None if response is not None else f"No response from {conn}"
+            except (KeyError, TypeError) as e:
+                error = f"Invalid blob reference: {e}"
+            except Exception as e:
+                error = str(e)
+        finished = time.perf_counter()
+        if error is None and self.cache is not None:
+            self.cache.add(blob['dbms_name'], blob['table_name'], blob['file'])
+        result.update({
+            "status": "ok" if error is None else "error",
+            "error": error,
+            "queued_ms": round((started - queued) * 1000, 2),
+            "elapsed_ms": round((finished - started) * 1000, 2),
+        })
+        return result
+
+    def fetch_iter(self, conn: str, blobs: List[Dict]) -> Iterator[Dict]:
+        """
+        Yield per-file results as each retrieval finishes.
+        """
+        futures = [self._executor.submit(self.fetch_one, conn, blob) for blob in blobs]
+        for future in as_completed(futures):
+            yield future.result()
+
+    def fetch_all(self, conn: str, blobs: List[Dict]) -> List[Dict]:
+        """
+        Per-file results in the order of the request.
+        """
+        futures = [self._executor.submit(self.fetch_one, conn, blob) for blob in blobs]
+        return [future.result() for future in futures]
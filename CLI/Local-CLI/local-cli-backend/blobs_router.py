@@ -0,0 +1,193 @@
+import json
+import mimetypes
+import time
+from urllib.parse import quote
+import requests
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import FileResponse, StreamingResponse
+from typing import Optional
+from classes import Connection
+from helpers import make_request
+from blobs import BLOB_STREAM_CHUNK, BlobFetcher, blob_name, open_blob_stream, tee_to_file
+from blob_cache import BlobCache
+from blob_prefetch import BlobPrefetcher
+from thumbnails import ThumbnailPipeline, is_image
+from static_index import StaticIndex
+
+# Create router for blob retrieval
+blobs_router = APIRouter(tags=["Blobs"])
+
+blob_cache = BlobCache()
+blob_fetcher = BlobFetcher(request=make_request, cache=blob_cache)
+
+# Previews are rendered as image blobs arrive and removed when they are evicted
+thumbnail_pipeline = ThumbnailPipeline(blob_cache.directory)
+blob_cache.add_listener(thumbnail_pipeline.on_cache_event)
+
+# Listing of static/ for GET /, kept current by the writers above instead of walking the tree
+static_index = StaticIndex(blob_cache.directory)
+blob_cache.add_listener(static_index.on_cache_event)
+thumbnail_pipeline.add_listener(static_index.on_file_event)
+
+# Optional (BLOB_PREFETCH=true): query results with files start filling the cache
+blob_prefetcher = BlobPrefetcher(blob_fetcher, blob_cache)
+
+
+@blobs_router.on_event("startup")
+def start_static_index():
+    static_index.start()
+
+
+@blobs_router.on_event("shutdown")
+def save_blob_cache():
+    static_index.stop()
+    blob_prefetcher.stop()
+    blob_cache.save(force=True)
+    thumbnail_pipeline.shutdown()
+
+
+def blob_names(blob_list: list) -> list:
+    return [blob_name(b.get('dbms_name'), b.get('table_name'), b.get('file')) for b in blob_list]
+
+
+def add_thumbnail(result: dict, blob: dict) -> dict:
+    """
+    Queue the preview of a retrieved image (with its boxes, if the query returned any)
+    and point the result at the thumbnail endpoint.
+    """
+    if result["status"] == "error" or not is_image(result["name"]) or not thumbnail_pipeline.enabled:
+        return result
+    bbox = blob.get("bbox")
+    thumbnail_pipeline.submit(result["name"], bbox)
+    url = f"/blobs/{blob['dbms_name']}/{blob['table_name']}/{blob['file']}/thumbnail"
+    result["thumbnail"] = url + (f"?bbox={quote(json.dumps(bbox) if not isinstance(bbox, str) else bbox)}" if bbox else "")
+    return result
+
+
+@blobs_router.post("/view-blobs/")
+def view_blobs(conn: Connection, blobs: dict):
+    """
+    Retrieve the referenced files into static/ concurrently, skipping files that are
+    already cached. "data" lists the requested files; "results" has status
+    (ok / cached / error) and timing per file.
+    """
+    print("conn", conn.conn)
+    blob_list = blobs.get('blobs', [])
+
+    started = time.perf_counter()
+    blob_prefetcher.wait_for(blob_names(blob_list))
+    results = blob_fetcher.fetch_all(conn.conn, blob_list)
+    for result, blob in zip(results, blob_list):
+        if result["status"] == "error":
+            print("Blob fetch failed:", result)
+        add_thumbnail(result, blob)
+    blob_cache.save()
+
+    return {
+        "data": [blob.get('file') for blob in blob_list],
+        "results": results,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+
+
+@blobs_router.post("/view-blobs/stream")
+def view_blobs_stream(conn: Connection, blobs: dict):
+    """
+    Same retrieval as /view-blobs/, streamed as newline-delimited JSON: one line per
+    file as soon as it lands, then a summary line with "done": true.
+    """
+    blob_list = blobs.get('blobs', [])
+
+    def ndjson_lines():
+        started = time.perf_counter()
+        failed = 0
+        by_name = dict(zip(blob_names(blob_list), blob_list))
+        blob_prefetcher.wait_for(list(by_name))
+        for result in blob_fetcher.fetch_iter(conn.conn, blob_list):
+            failed += result["status"] == "error"
+            add_thumbnail(result, by_name.get(result["name"], {}))
+            yield json.dumps(result) + "\n"
+        blob_cache.save()
+        yield json.dumps({
+            "done": True,
+            "files": len(blob_list),
+            "failed": failed,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+        }) + "\n"
+
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+
+@blobs_router.get("/blobs/{dbms}/{table}/{file}/thumbnail")
+def serve_thumbnail(dbms: str, table: str, file: str, bbox: Optional[str] = None):
+    """
+    JPEG preview of a cached image blob, optionally with bounding boxes drawn
+    (bbox as JSON: [x1, y1, x2, y2] or a list of them, pixels or 0-1 relative).
+    Rendered on first request if the background pipeline has not done it yet.
+    """
+    if not thumbnail_pipeline.enabled:
+        raise HTTPException(status_code=501, detail="Thumbnails need Pillow (pip install Pillow)")
+    name = blob_name(dbms, table, file)
+    if not is_image(name):
+        raise HTTPException(status_code=400, detail=f"{file} is not an image")
+    if blob_cache.lookup(dbms, table, file) is None:
+        raise HTTPException(status_code=404, detail="Blob is not cached; retrieve it with /view-blobs/ first")
+    try:
+        path = thumbnail_pipeline.ensure(name, bbox)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Cannot render thumbnail: {e}")
+    if path is None:
+        raise HTTPException(status_code=500, detail="Thumbnail was not produced")
+    return FileResponse(path, media_type="image/jpeg", headers={"Cache-Control": "private, max-age=86400"})
+
+
+@blobs_router.get("/blobs/cache")
+def blob_cache_stats():
+    """
+    Size, quota, hit/miss and eviction counters of the local blob cache,
+    and what the prefetcher has done for it.
+    """
+    return {"data": blob_cache.stats(), "prefetch": blob_prefetcher.stats()}
+
+
+# Upstream headers worth passing through when proxying a blob
+PROXIED_HEADERS = ("content-length", "content-range", "accept-ranges", "last-modified", "etag")
+
+
+@blobs_router.api_route("/blobs/{dbms}/{table}/{file}", methods=["GET", "HEAD"])
+def serve_blob(request: Request, dbms: str, table: str, file: str, node: Optional[str] = None):
+    """
+    Serve one blob with HTTP Range support, so media players can seek.
+    Cached files are sent from disk in chunks (never loaded whole). Files not cached
+    are proxied from the operator's streaming retrieval (node=ip:port) and, when the
+    full body was requested, written to the cache on the way through.
+    """
+    media_type = mimetypes.guess_type(file)[0] or "application/octet-stream"
+    path = blob_cache.lookup(dbms, table, file)
+    if path is not None:
+        return FileResponse(path, media_type=media_type, headers={"Cache-Control": "private, max-age=3600"})
+
+    if node is None or request.method == "HEAD":
+        raise HTTPException(status_code=404, detail="Blob is not cached; pass node=<ip:port> to stream it from the operator")
+
+    range_header = request.headers.get("range")
+    try:
+        upstream = open_blob_stream(node, dbms, table, file, range_header)
+    except requests.exceptions.RequestException as e:
+        raise HTTPException(status_code=502, detail=f"Cannot reach {node}: {type(e).__name__}")
+    if upstream.status_code >= 400:
+        upstream.close()
+        raise HTTPException(status_code=502, detail=f"{node} answered HTTP {upstream.status_code}")
+
+    def body():
+        try:
+            chunks = upstream.iter_content(chunk_size=BLOB_STREAM_CHUNK)
+            if upstream.status_code == 200 and not range_header:
+                name = blob_name(dbms, table, file)
+                chunks = tee_to_file(chunks, blob_cache.path(name), lambda: blob_cache.add(dbms, table, file))
+            yield from chunks
+        finally:
+            upstream.close()
+
+    headers = {key: value for key, value in upstream.headers.items() if key.lower() in PROXIED_HEADERS}
+    return StreamingResponse(body(), status_code=upstream.status_code, media_type=media_type, headers=headers)
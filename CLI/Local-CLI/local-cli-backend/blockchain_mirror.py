@@ -0,0 +1,388 @@
+import json
+import os
+import re
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from timings import timed
+
+# Off switch, seconds between "blockchain get *" syncs, and the oldest snapshot still answered from
+BLOCKCHAIN_MIRROR = os.getenv('BLOCKCHAIN_MIRROR', 'true').lower() in ('1', 'true', 'yes')
+BLOCKCHAIN_MIRROR_INTERVAL = float(os.getenv('BLOCKCHAIN_MIRROR_INTERVAL', '30'))
+BLOCKCHAIN_MIRROR_MAX_AGE = float(os.getenv('BLOCKCHAIN_MIRROR_MAX_AGE', '120'))
+
+# A node whose ledger has not been queried for this long (seconds) is no longer synced
+BLOCKCHAIN_MIRROR_IDLE = float(os.getenv('BLOCKCHAIN_MIRROR_IDLE', '900'))
+
+# Policy attributes with an equality index (besides type and id)
+INDEXED_ATTRIBUTES = ("name", "country", "ip", "company")
+
+# Commands that change the ledger, also behind a prefix such as "run client (...)";
+# the mirror of the node they went to is re-synced
+LEDGER_WRITES = re.compile(r"\bblockchain\s+(insert|delete|push|update|drop)\b", re.IGNORECASE)
+
+KEY_PATH = r"(?:\[[^\]]+\])+"
+CONDITION = re.compile(
+    r"\s*(" + KEY_PATH + r"|[\w.]+)\s*(!=|>=|<=|=|>|<|contains\b)\s*(\"[^\"]*\"|'[^']*'|[^\s\"']+)\s*",
+    re.IGNORECASE,
+)
+BRING_TOKEN = re.compile(KEY_PATH + r"|\"[^\"]*\"|'[^']*'|\S+")
+SEPARATOR = re.compile(r"\s+separator\s*=\s*(\S+)\s*$", re.IGNORECASE)
+
+
+def unquote(value: str) -> str:
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        return value[1:-1]
+    return value
+
+
+def key_path(key: str) -> List[str]:
+    """
+    "[operator][name]" -> ["operator", "name"], "[name]" / "name" -> ["name"].
+    """
+    if key.startswith("["):
+        return [part.strip() for part in re.findall(r"\[([^\]]+)\]", key)]
+    return [key.strip()]
+
+
+def policy_value(policy: Dict, path: List[str]):
+    """
+    Value at a key path; a single key is looked up in the policy body.
+    """
+    policy_type = next(iter(policy))
+    body = policy[policy_type]
+    if len(path) > 1:
+        if path[0] != policy_type:
+            return None
+        path = path[1:]
+    value = body
+    for key in path:
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return value
+
+
+def parse_query(command: str) -> Optional[Dict]:
+    """
+    Structured form of the "blockchain get" commands the mirror answers:
+        blockchain get <type | (type, type) | *> [where <key> <op> <value> [and ...]]
+                       [bring.table <keys> | bring.ip_port | bring <keys and literals> separator = <sep>]
+    None for anything else (or, bring.json, plain bring without a separator, ...),
+    which then goes to the node.
+    """
+    match = re.match(r"^\s*blockchain\s+get\s+(\*|\w+|\([\w\s,]+\))(.*)$", command, re.IGNORECASE | re.DOTALL)
+    if match is None:
+        return None
+    types_text, rest = match.groups()
+    types = None if types_text == "*" else [t.strip() for t in types_text.strip("()").split(",") if t.strip()]
+
+    bring_match = re.search(r"\s+bring(\.\w+)?(?=\s|$)", rest, re.IGNORECASE)
+    where_text, bring_text = (rest[:bring_match.start()], rest[bring_match.end():]) if bring_match else (rest, "")
+    bring = bring_match.group(1)[1:].lower() if bring_match and bring_match.group(1) else ("" if bring_match else None)
+
+    conditions = []
+    where_text = where_text.strip()
+    if where_text:
+        if not where_text.lower().startswith("where "):
+            return None
+        position, clauses = 0, where_text[6:]
+        while position < len(clauses):
+            condition = CONDITION.match(clauses, position)
+            if condition is None:
+                return None
+            key, op, value = condition.groups()
+            conditions.append((key_path(key), op.lower(), unquote(value)))
+            position = condition.end()
+            connector = re.match(r"and\s+", clauses[position:], re.IGNORECASE)
+            if connector is None:
+                if position < len(clauses):
+                    return None
+                break
+            position += connector.end()
+
+    query = {"types": types, "conditions": conditions, "bring": bring, "keys": [], "separator": None}
+    if bring is None:
+        return query
+
+    separator = SEPARATOR.search(bring_text)
+    if separator:
+        query["separator"] = unquote(separator.group(1)).replace("\\n", "\n").replace("\\t", "\t")
+        bring_text = bring_text[:separator.start()]
+    tokens = BRING_TOKEN.findall(bring_text)
+    if bring == "table":
+        if not tokens or not all(token.startswith("[") for token in tokens):
+            return None
+        query["keys"] = [key_path(token) for token in tokens]
+    elif bring == "ip_port":
+        if tokens:
+            return None
+    elif bring == "":
+        if not tokens or query["separator"] is None:
+            return None
+        query["keys"] = [key_path(token) if token.startswith("[") else unquote(token) for token in tokens]
+    else:
+        return None
+    return query
+
+
+def matches(policy: Dict, conditions) -> bool:
+    for path, op, expected in conditions:
+        actual = policy_value(policy, path)
+        if actual is None or isinstance(actual, (dict, list)):
+            return False
+        actual = str(actual)
+        if op == "=":
+            ok = actual == expected
+        elif op == "!=":
+            ok = actual != expected
+        elif op == "contains":
+            ok = expected in actual
+        else:
+            try:
+                left, right = float(actual), float(expected)
+            except ValueError:
+                left, right = actual, expected
+            ok = {">": left > right, "<": left < right, ">=": left >= right, "<=": left <= right}[op]
+        if not ok:
+            return False
+    return True
+
+
+class LedgerSnapshot:
+    """
+    One node's policies with indexes by type, id and INDEXED_ATTRIBUTES.
+    Index entries are positions in the ledger so results keep the ledger order.
+    """
+
+    def __init__(self, policies: List[Dict], synced_at: float):
+        self.policies = [p for p in policies if isinstance(p, dict) and len(p) == 1 and isinstance(next(iter(p.values())), dict)]
+        self.synced_at = synced_at
+        self.by_type = {}
+        self.by_id = {}
+        self.by_attribute = {attribute: {} for attribute in INDEXED_ATTRIBUTES}
+        for position, policy in enumerate(self.policies):
+            policy_type, body = next(iter(policy.items()))
+            self.by_type.setdefault(policy_type, []).append(position)
+            if body.get("id") is not None:
+                self.by_id[str(body["id"])] = position
+            for attribute in INDEXED_ATTRIBUTES:
+                value = body.get(attribute)
+                if value is not None and not isinstance(value, (dict, list)):
+                    self.by_attribute[attribute].setdefault(str(value), []).append(position)
+
+    def select(self, types: Optional[List[str]], conditions) -> List[Dict]:
+        if types is None:
+            candidates = None
+        else:
+            candidates = set()
+            for policy_type in types:
+                candidates.update(self.by_type.get(policy_type, ()))
+        # Narrow with the indexes, then check every condition on what is left
+        for path, op, expected in conditions:
+            if op != "=" or len(path) != 1:
+                continue
+            if path[0] == "id":
+                found = {self.by_id[expected]} if expected in self.by_id else set()
+            elif path[0] in self.by_attribute:
+                found = set(self.by_attribute[path[0]].get(expected, ()))
+            else:
+                continue
+            candidates = found if candidates is None else candidates & found
+        positions = range(len(self.policies)) if candidates is None else sorted(candidates)
+        return [self.policies[p] for p in positions if matches(self.policies[p], conditions)]
+
+
+def text(value) -> str:
+    return "" if value is None else str(value)
+
+
+def render(query: Dict, policies: List[Dict]) -> Dict:
+    """
+    Structured result in the shape parse_response gives the node's reply.
+    """
+    bring = query["bring"]
+    if bring is None:
+        return {"type": "json", "data": policies}
+    if bring == "table":
+        return {"type": "table", "data": [
+            {path[-1]: text(policy_value(policy, path)) for path in query["keys"]} for policy in policies
+        ]}
+    if bring == "ip_port":
+        addresses = []
+        for policy in policies:
+            ip, port = policy_value(policy, ["ip"]), policy_value(policy, ["port"])
+            if ip is not None and port is not None:
+                addresses.append(f"{ip}:{port}")
+        return {"type": "string", "data": ",".join(addresses)}
+    values = []
+    for policy in policies:
+        parts = []
+        for key in query["keys"]:
+            parts.append(text(policy_value(policy, key)) if isinstance(key, list) else key)
+        values.append("".join(parts))
+    return {"type": "string", "data": query["separator"].join(values)}
+
+
+class BlockchainMirror:
+    """
+    Local copies of the policy ledger of the nodes the UI talks to, refreshed with
+    "blockchain get *" every BLOCKCHAIN_MIRROR_INTERVAL seconds on a background
+    thread. Common "blockchain get" filters and projections are answered from the
+    copy while it is younger than BLOCKCHAIN_MIRROR_MAX_AGE; everything else, and
+    any node without a fresh copy, goes to the node as before. Nodes not queried
+    for BLOCKCHAIN_MIRROR_IDLE seconds are dropped until they are queried again.
+    """
+
+    def __init__(self, request: Callable, interval: float = BLOCKCHAIN_MIRROR_INTERVAL,
+                 max_age: float = BLOCKCHAIN_MIRROR_MAX_AGE, enabled: bool = BLOCKCHAIN_MIRROR,
+                 idle_timeout: float = BLOCKCHAIN_MIRROR_IDLE):
+        self.request = request
+        self.interval = interval
+        self.max_age = max_age
+        self.enabled = enabled
+        self.idle_timeout = idle_timeout
+        self._snapshots = {}
+        # _stale: not answered from until the next good sync; _due: sync at the next chance
+        self._stale = set()
+        self._due = set()
+        self._attempted = {}
+        self._queried = {}
+        self._stats = {}
+        self._wake = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _conn_stats(self, conn: str) -> Dict:
+        return self._stats.setdefault(conn, {"hits": 0, "misses": 0, "syncs": 0, "errors": 0, "last_error": None, "sync_ms": None})
+
+    def sync(self, conn: str) -> bool:
+        started = time.perf_counter()
+        raw = self.request(conn, "GET", "blockchain get *")
+        if isinstance(raw, str):
+            try:
+                raw = json.loads(raw)
+            except ValueError:
+                pass
+        with self._wake:
+            if conn not in self._stats:
+                # Expired while the sync was running
+                return False
+            stats = self._stats[conn]
+            if not isinstance(raw, list):
+                stats["errors"] += 1
+                stats["last_error"] = "No response" if raw is None else str(raw)[:200]
+                return False
+            self._snapshots[conn] = LedgerSnapshot(raw, time.time())
+            self._stale.discard(conn)
+            stats["syncs"] += 1
+            stats["sync_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        return True
+
+    def _run(self):
+        while not self._stop.is_set():
+            now = time.time()
+            with self._wake:
+                self._expire(now)
+                due = [conn for conn in self._stats
+                       if conn in self._due or now - self._attempted.get(conn, 0) >= self.interval]
+                self._due.difference_update(due)
+                self._attempted.update({conn: now for conn in due})
+            for conn in due:
+                try:
+                    self.sync(conn)
+                except Exception as e:
+                    print(f"Blockchain mirror sync of {conn} failed: {e}")
+            with self._wake:
+                if not self._due and not self._stop.is_set():
+                    # Until the next node is due (failed syncs wait a full interval too)
+                    next_due = min(self._attempted.values(), default=now) + self.interval
+                    self._wake.wait(max(next_due - time.time(), 0.05))
+
+    def _expire(self, now: float):
+        """
+        Forget nodes nobody has queried for idle_timeout seconds (lock held).
+        """
+        if not self.idle_timeout:
+            return
+        for conn in [conn for conn, queried in self._queried.items() if now - queried > self.idle_timeout]:
+            for state in (self._snapshots, self._attempted, self._queried, self._stats):
+                state.pop(conn, None)
+            self._stale.discard(conn)
+            self._due.discard(conn)
+
+    def track(self, conn: str):
+        """
+        Start mirroring a node (synced in the background from now on) and mark it as queried.
+        """
+        with self._wake:
+            self._queried[conn] = time.time()
+            if conn in self._stats:
+                return
+            self._conn_stats(conn)
+            self._due.add(conn)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="blockchain-mirror", daemon=True)
+                self._thread.start()
+            self._wake.notify_all()
+
+    def invalidate(self, conn: str):
+        """
+        The ledger changed through this node: stop answering until the next sync, and sync now.
+        """
+        with self._wake:
+            if conn in self._stats:
+                self._stale.add(conn)
+                self._due.add(conn)
+                self._wake.notify_all()
+
+    def stop(self):
+        self._stop.set()
+        with self._wake:
+            self._wake.notify_all()
+
+    @timed("mirror")
+    def answer(self, conn: str, command: str, local: bool = True) -> Optional[Dict]:
+        """
+        Structured result for a "blockchain get" served from the local copy (with a
+        "mirror" block saying how fresh it is), or None when the node must answer.
+        Ledger writes passing through mark the copy stale even when local is False.
+        """
+        if not self.enabled:
+            return None
+        if LEDGER_WRITES.search(command):
+            self.invalidate(conn)
+            return None
+        query = parse_query(command) if local else None
+        if query is None:
+            return None
+        self.track(conn)
+        with self._wake:
+            snapshot = self._snapshots.get(conn)
+            fresh = snapshot is not None and conn not in self._stale and time.time() - snapshot.synced_at <= self.max_age
+            self._conn_stats(conn)["hits" if fresh else "misses"] += 1
+        if not fresh:
+            return None
+
+        started = time.perf_counter()
+        result = render(query, snapshot.select(query["types"], query["conditions"]))
+        result["mirror"] = {
+            "source": "mirror",
+            "synced_at": snapshot.synced_at,
+            "age_s": round(time.time() - snapshot.synced_at, 3),
+            "policies": len(snapshot.policies),
+            "lookup_us": round((time.perf_counter() - started) * 1e6, 1),
+        }
+        return result
+
+    def stats(self) -> Dict:
+        now = time.time()
+        with self._wake:
+            return {conn: {
+                **stats,
+                "policies": len(self._snapshots[conn].policies) if conn in self._snapshots else 0,
+                "synced_at": self._snapshots[conn].synced_at if conn in self._snapshots else None,
+                "age_s": round(now - self._snapshots[conn].synced_at, 3) if conn in self._snapshots else None,
+                "stale": conn in self._stale,
+            } for conn, stats in self._stats.items()}
@@ -1,6 +1,6 @@
 
 from pydantic import BaseModel
-from typing import Dict
+from typing import Any, Dict, List, Optional
 
 
 class Connection(BaseModel):
@@ -67,3 +67,50 @@ class ColumnInfo(BaseModel):
 class SqlQuery(BaseModel):
     query: str
 
+class ResultFilter(BaseModel):
+    column: str
+    op: str = "eq"  # eq, ne, contains, gt, ge, lt, le
+    value: Optional[Any] = None
+
+class ResultWindow(BaseModel):
+    handle: str
+    offset: int = 0
+    limit: int = 100
+    sort_by: Optional[str] = None
+    descending: bool = False
+    filters: List[ResultFilter] = []
+
+class DashboardPanel(BaseModel):
+    id: Optional[str] = None
+    type: str = "GET"  # "GET" or "POST"
+    cmd: str
+    conn: Optional[str] = None  # defaults to the dashboard connection
+
+class MonitorHistoryRequest(BaseModel):
+    conn: str
+    node: Optional[str] = None  # operator "node name"
+    metric: Optional[str] = None
+    since: Optional[float] = None  # unix timestamp
+    limit: Optional[int] = None
+
+class AlertRule(BaseModel):
+    id: Optional[str] = None
+    name: Optional[str] = None
+    metric: str  # e.g. "Free Space Percent"
+    op: str = "<"  # <, <=, >, >=
+    threshold: float
+    clear_threshold: Optional[float] = None  # recovery level, defaults to threshold
+    mode: str = "value"  # "value" or "delta" (change since the previous sample)
+    for_samples: int = 1  # consecutive breaching samples before raising
+    node: Optional[str] = None  # operator "node name", all operators if not set
+    conn: Optional[str] = None  # monitored node, all nodes if not set
+    severity: str = "warning"
+
+class MonitorRangeRequest(BaseModel):
+    conn: str
+    metric: str
+    start: float  # unix timestamp
+    end: Optional[float] = None  # defaults to now
+    node: Optional[str] = None
+    resolution: Optional[float] = None  # seconds per point
+    max_points: int = 500
@@ -0,0 +1,126 @@
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Tuple
+
+from helpers import make_request
+from parsers import parse_response
+
+# Worker threads shared by all dashboard requests and how long (seconds) a GET result is reused
+DASHBOARD_WORKERS = int(os.getenv('DASHBOARD_WORKERS', '16'))
+DASHBOARD_CACHE_TTL = float(os.getenv('DASHBOARD_CACHE_TTL', '5'))
+
+executor = ThreadPoolExecutor(max_workers=DASHBOARD_WORKERS, thread_name_prefix="dashboard")
+
+
+class QueryCache:
+    """
+    Short-lived cache of parsed command results shared across dashboard requests.
+    Identical commands that are already running are joined instead of re-sent,
+    so overlapping panels (or two open dashboards) cost one node round trip.
+    Only GET commands are cached or joined; POST commands may have side effects
+    and are always sent.
+    """
+
+    def __init__(self, ttl: float = DASHBOARD_CACHE_TTL):
+        self.ttl = ttl
+        self._results = {}
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def run(self, key: Tuple[str, str, str]) -> Tuple[Dict, bool]:
+        """
+        Returns (structured_data, cached) for the (conn, method, command) key.
+        """
+        conn, method, command = key
+        if method.upper() != "GET":
+            return self._fetch(conn, method, command), False
+        cacheable = self.ttl > 0
+
+        with self._lock:
+            if cacheable:
+                entry = self._results.get(key)
+                if entry is not None and time.time() - entry[0] < self.ttl:
+                    return entry[1], True
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight[key] = future
+
+        if not owner:
+            return future.result(), True
+
+        try:
+            structured_data = self._fetch(conn, method, command)
+        except Exception as e:
+            with self._lock:
+                del self._in_flight[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            del self._in_flight[key]
+            if cacheable:
+                self._results[key] = (time.time(), structured_data)
+                self._prune()
+        future.set_result(structured_data)
+        return structured_data, False
+
+    @staticmethod
+    def _fetch(conn: str, method: str, command: str) -> Dict:
+        raw_response = make_request(conn, method, command)
+        if raw_response is None:
+            raise RuntimeError(f"No response from {conn}")
+        return parse_response(raw_response)
+
+    def _prune(self):
+        now = time.time()
+        stale = [key for key, (stored_at, _) in self._results.items() if now - stored_at >= self.ttl]
+        for key in stale:
+            del self._results[key]
+
+
+query_cache = QueryCache()
+
+
+def run_panels(default_conn: str, panels: List[Dict]) -> Iterator[Dict]:
+    """
+    Execute dashboard panels concurrently and yield one result per panel as soon as it is ready.
+    GET panels with the same (conn, command) are executed once; every POST panel is sent.
+    """
+    groups = {}
+    for index, panel in enumerate(panels):
+        panel_id = panel.get("id") or str(index)
+        key = (panel.get("conn") or default_conn, panel.get("type", "GET").upper(), panel["cmd"])
+        group = key if key[1] == "GET" else key + (index,)
+        groups.setdefault(group, []).append(panel_id)
+
+    started = time.perf_counter()
+    futures = {executor.submit(_timed_run, group[:3]): group for group in groups}
+
+    for future in as_completed(futures):
+        group = futures[future]
+        key = group[:3]
+        result = future.result()
+        for panel_id in groups[group]:
+            yield {
+                "id": panel_id,
+                "conn": key[0],
+                "cmd": key[2],
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+                **result,
+            }
+
+
+def _timed_run(key: Tuple[str, str, str]) -> Dict:
+    start = time.perf_counter()
+    try:
+        structured_data, cached = query_cache.run(key)
+        result = {"cached": cached, "result": structured_data}
+    except Exception as e:
+        print(f"Error running dashboard panel {key[2]}: {e}")
+        result = {"cached": False, "error": str(e)}
+    result["duration_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    return result
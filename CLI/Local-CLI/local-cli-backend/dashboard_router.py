@@ -0,0 +1,37 @@
+import json
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from typing import List
+from classes import Connection, DashboardPanel
+from dashboard import run_panels
+
+# Create router for multi-panel dashboards
+dashboard_router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
+
+
+@dashboard_router.post("/run")
+def run_dashboard(conn: Connection, panels: List[DashboardPanel], format: str = "sse"):
+    """
+    Run all panel queries of a dashboard concurrently.
+    Results are streamed back as each panel completes, either as Server-Sent Events
+    (format=sse, one "panel" event per panel and a final "done" event) or as
+    newline-delimited JSON (format=ndjson).
+    """
+    if format not in ("sse", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be 'sse' or 'ndjson'")
+
+    panel_dicts = [panel.model_dump() for panel in panels]
+    print("Running dashboard with", len(panel_dicts), "panels on", conn.conn)
+
+    def sse_events():
+        for result in run_panels(conn.conn, panel_dicts):
+            yield f"event: panel\ndata: {json.dumps(result)}\n\n"
+        yield f"event: done\ndata: {json.dumps({'panels': len(panel_dicts)})}\n\n"
+
+    def ndjson_lines():
+        for result in run_panels(conn.conn, panel_dicts):
+            yield json.dumps(result) + "\n"
+
+    if format == "ndjson":
+        return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+    return StreamingResponse(sse_events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
@@ -0,0 +1,151 @@
+import os
+import socket
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional
+
+# Per-probe deadline (seconds, connect and reply together), most probes at once, and how long (seconds) a discovery result is reused
+NETWORK_PROBE_TIMEOUT = float(os.getenv('NETWORK_PROBE_TIMEOUT', '2'))
+NETWORK_PROBE_WORKERS = int(os.getenv('NETWORK_PROBE_WORKERS', '128'))
+NETWORK_CACHE_TTL = float(os.getenv('NETWORK_CACHE_TTL', '60'))
+
+
+def rest_address(tcp_address: str) -> Optional[str]:
+    """
+    REST address for a node's TCP address as listed by "test network".
+    AnyLog nodes are deployed with the REST port right after the TCP port (32548 -> 32549).
+    """
+    host, _, port = tcp_address.strip().rpartition(':')
+    if not host or not port.isdigit():
+        return None
+    return f"{host}:{int(port) + 1}"
+
+
+def probe_rest(address: str, timeout: float = NETWORK_PROBE_TIMEOUT) -> Dict:
+    """
+    Check that a node answers on its REST port and measure the round trip.
+    Connecting and reading the status line share one deadline, so a probe never
+    takes longer than `timeout`.
+    """
+    start = time.perf_counter()
+    deadline = start + timeout
+    host, _, port = address.rpartition(':')
+    request = (f"GET / HTTP/1.1\r\nHost: {address}\r\nUser-Agent: AnyLog/1.23\r\n"
+               f"command: get status\r\nConnection: close\r\n\r\n").encode()
+    reachable = False
+    try:
+        with socket.create_connection((host, int(port)), timeout=timeout) as sock:
+            sock.settimeout(max(deadline - time.perf_counter(), 0.001))
+            sock.sendall(request)
+            reply = b""
+            while b"\r\n" not in reply:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    raise socket.timeout("probe deadline")
+                sock.settimeout(remaining)
+                chunk = sock.recv(1024)
+                if not chunk:
+                    break
+                reply += chunk
+        parts = reply.split(b"\r\n", 1)[0].split()
+        if len(parts) < 2 or not parts[0].startswith(b"HTTP/") or not parts[1].isdigit():
+            error = "Invalid reply"
+        else:
+            status = int(parts[1])
+            reachable = status < 500
+            error = None if reachable else f"HTTP {status}"
+    except socket.timeout:
+        error = "timeout"
+    except (OSError, ValueError) as e:
+        error = type(e).__name__
+    return {
+        "address": address,
+        "reachable": reachable,
+        "rtt_ms": round((time.perf_counter() - start) * 1000, 2),
+        "error": error,
+    }
+
+
+class NetworkDiscovery:
+    """
+    Probes the REST port of every node in a network concurrently and caches the
+    reachable set (with round-trip times) per querying node. All calls share one
+    pool of `workers` probe threads, and concurrent refreshes for the same node
+    join the one already running.
+    """
+
+    def __init__(self, probe: Callable[[str, float], Dict] = probe_rest, timeout: float = NETWORK_PROBE_TIMEOUT,
+                 workers: int = NETWORK_PROBE_WORKERS, ttl: float = NETWORK_CACHE_TTL):
+        self.probe = probe
+        self.timeout = timeout
+        self.workers = workers
+        self.ttl = ttl
+        self._cache = {}
+        self._refreshing = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix="probe")
+
+    def cached(self, conn: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._cache.get(conn)
+        if entry is not None and time.time() - entry["probed_at"] < self.ttl:
+            return entry
+        return None
+
+    def probe_all(self, addresses: List[str]) -> List[Dict]:
+        """
+        Probe all addresses on the shared pool. Every probe ends at its own deadline,
+        so the call takes about one probe timeout per `workers` addresses.
+        """
+        if not addresses:
+            return []
+        futures = [self._executor.submit(self.probe, address, self.timeout) for address in addresses]
+        wait(futures)
+        results = [future.result() for future in futures]
+        return sorted(results, key=lambda r: (not r["reachable"], r["rtt_ms"] if r["rtt_ms"] is not None else float("inf")))
+
+    def discover(self, conn: str, tcp_addresses: List[str]) -> Dict:
+        rest_addresses = list(dict.fromkeys(filter(None, (rest_address(a) for a in tcp_addresses))))
+        results = self.probe_all(rest_addresses)
+        entry = {
+            "probed_at": time.time(),
+            "nodes": results,
+            "reachable": [r["address"] for r in results if r["reachable"]],
+        }
+        with self._lock:
+            self._cache[conn] = entry
+        return entry
+
+    def get(self, conn: str, list_addresses: Callable[[], List[str]], refresh: bool = False) -> Dict:
+        """
+        Cached entry for the node, or list its network (list_addresses() returns the
+        TCP addresses) and probe it. Callers arriving while a refresh for the same
+        node runs wait for its result instead of probing again.
+        """
+        if not refresh:
+            entry = self.cached(conn)
+            if entry is not None:
+                return entry
+        with self._lock:
+            future = self._refreshing.get(conn)
+            owner = future is None
+            if owner:
+                future = self._refreshing[conn] = Future()
+        if not owner:
+            return future.result()
+
+        try:
+            entry = self.discover(conn, list_addresses())
+        except Exception as e:
+            with self._lock:
+                del self._refreshing[conn]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            del self._refreshing[conn]
+        future.set_result(entry)
+        return entry
+
+
+network_discovery = NetworkDiscovery()
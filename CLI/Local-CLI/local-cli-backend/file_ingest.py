@@ -0,0 +1,300 @@
+import argparse
+import csv
+import io
+import json
+import math
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Tuple
+
+from schema_infer import INGEST_SCHEMA_SAMPLE_ROWS, infer_columns, sample_rows
+
+# Rows per data POST, parser processes, bytes of CSV per parse task and concurrent POSTs
+FILE_INGEST_BATCH_ROWS = int(os.getenv('FILE_INGEST_BATCH_ROWS', '10000'))
+FILE_INGEST_WORKERS = int(os.getenv('FILE_INGEST_WORKERS', str(os.cpu_count() or 2)))
+FILE_INGEST_CHUNK_BYTES = int(os.getenv('FILE_INGEST_CHUNK_BYTES', str(16 * 1024 * 1024)))
+FILE_INGEST_SEND_WORKERS = int(os.getenv('FILE_INGEST_SEND_WORKERS', '4'))
+
+FORMATS = ("csv", "parquet")
+
+# IDs and zip codes ("00123"): numeric looking, but the leading zeros matter
+LEADING_ZERO = re.compile(r"[+-]?0\d")
+
+# (schema, serialized tagged rows, row count)
+Batch = Tuple[Dict[str, Optional[str]], str, int]
+
+# What a parse task hands back: its batches and the number of rows it had to skip
+Parsed = Tuple[List[Batch], int]
+
+
+def detect_format(filename: str) -> str:
+    extension = os.path.splitext(filename)[1].lower().lstrip(".")
+    if extension in ("parquet", "pq"):
+        return "parquet"
+    if extension in ("csv", "txt", "tsv"):
+        return "csv"
+    raise ValueError(f"Cannot tell the format of '{filename}', use one of {', '.join(FORMATS)}")
+
+
+def detect_delimiter(filename: str) -> str:
+    return "\t" if os.path.splitext(filename)[1].lower() == ".tsv" else ","
+
+
+def convert(value: str):
+    """
+    CSV cell to int / float / None, anything else stays text.
+    Numbers written with leading zeros stay text.
+    """
+    if value == "":
+        return None
+    if LEADING_ZERO.match(value):
+        return value
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        number = float(value)
+    except ValueError:
+        return value
+    # NaN / inf are not valid JSON
+    return number if math.isfinite(number) else value
+
+
+def build_batches(rows: List[Dict], dbms: str, table: str, batch_rows: int) -> List[Batch]:
+    batches = []
+    for start in range(0, len(rows), batch_rows):
+        batch = rows[start:start + batch_rows]
+        schema = infer_columns(sample_rows(batch, INGEST_SCHEMA_SAMPLE_ROWS))
+        payload = json.dumps([{**row, "dbms": dbms, "table": table} for row in batch], default=str)
+        batches.append((schema, payload, len(batch)))
+    return batches
+
+
+# CSV
+
+def csv_rows(values_list, header: List[str]) -> Tuple[List[Dict], int]:
+    """
+    Rows keyed by the header. Short rows leave the missing columns out; rows with
+    more fields than the header are skipped and counted.
+    """
+    width = len(header)
+    rows = []
+    skipped = 0
+    for values in values_list:
+        if not values:
+            continue
+        if len(values) > width:
+            skipped += 1
+            continue
+        rows.append(dict(zip(header, map(convert, values))))
+    return rows, skipped
+
+
+def csv_header(path: str, delimiter: str) -> Tuple[List[str], int]:
+    with open(path, 'rb') as f:
+        line = f.readline()
+    header = next(csv.reader([line.decode('utf-8-sig')], delimiter=delimiter))
+    return [column.strip() for column in header], len(line)
+
+
+def count_quotes(f, start: int, end: int, block: int = 1024 * 1024) -> int:
+    f.seek(start)
+    quotes = 0
+    while start < end:
+        data = f.read(min(block, end - start))
+        if not data:
+            break
+        quotes += data.count(b'"')
+        start += len(data)
+    return quotes
+
+
+def csv_ranges(path: str, data_start: int, chunk_bytes: int) -> List[Tuple[int, int]]:
+    """
+    Split the file after the header into byte ranges that end on a row boundary.
+    A line break only ends a row when the quotes before it are balanced (quotes
+    inside a field are doubled), so a quoted field spanning lines stays in one range.
+    """
+    size = os.path.getsize(path)
+    bounds = [data_start]
+    quotes = 0
+    position = data_start
+    with open(path, 'rb') as f:
+        target = data_start + chunk_bytes
+        while target < size:
+            quotes += count_quotes(f, position, target)
+            line = f.readline()
+            quotes += line.count(b'"')
+            # Inside a quoted field: move on to a line break outside it
+            while quotes % 2 and line:
+                line = f.readline()
+                quotes += line.count(b'"')
+            position = f.tell()
+            if position >= size:
+                break
+            bounds.append(position)
+            target = position + chunk_bytes
+    bounds.append(size)
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+
+def parse_csv_range(path: str, start: int, end: int, header: List[str], delimiter: str,
+                    dbms: str, table: str, batch_rows: int) -> Parsed:
+    """
+    Process pool task: parse one byte range and serialize it into batches.
+    """
+    with open(path, 'rb') as f:
+        f.seek(start)
+        text = f.read(end - start).decode('utf-8')
+    rows, skipped = csv_rows(csv.reader(io.StringIO(text), delimiter=delimiter), header)
+    return build_batches(rows, dbms, table, batch_rows), skipped
+
+
+def parse_csv_file(path: str, header: List[str], data_start: int, delimiter: str,
+                   dbms: str, table: str, batch_rows: int) -> Parsed:
+    """
+    Single pass with the csv module over the whole file, safe for quoted newlines.
+    """
+    with open(path, 'r', newline='', encoding='utf-8-sig') as f:
+        f.readline()
+        rows, skipped = csv_rows(csv.reader(f, delimiter=delimiter), header)
+    return build_batches(rows, dbms, table, batch_rows), skipped
+
+
+# Parquet
+
+def require_pyarrow():
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError("Parquet ingestion needs pyarrow (pip install pyarrow)")
+    return pq
+
+
+def parse_parquet_row_group(path: str, row_group: int, dbms: str, table: str, batch_rows: int) -> Parsed:
+    """
+    Process pool task: read one row group and serialize it into batches.
+    """
+    pq = require_pyarrow()
+    rows = pq.ParquetFile(path).read_row_group(row_group).to_pylist()
+    return build_batches(rows, dbms, table, batch_rows), 0
+
+
+# Driver
+
+def ingest_file(path: str, dbms: str, table: str, send: Callable[[Dict[str, Optional[str]], str, int], object],
+                fmt: Optional[str] = None, batch_rows: int = FILE_INGEST_BATCH_ROWS,
+                workers: int = FILE_INGEST_WORKERS, chunk_bytes: int = FILE_INGEST_CHUNK_BYTES,
+                send_workers: int = FILE_INGEST_SEND_WORKERS, delimiter: Optional[str] = None) -> Dict:
+    """
+    Parse a CSV / Parquet file in a process pool and hand each serialized batch to
+    `send(schema, payload, rows)` from a small thread pool. Parse tasks are submitted
+    a few at a time so memory is bounded by the batches in flight, not the file size.
+    CSV rows with more fields than the header are skipped and counted in failed_rows.
+    """
+    fmt = fmt or detect_format(path)
+    delimiter = delimiter or detect_delimiter(path)
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format '{fmt}', use one of {', '.join(FORMATS)}")
+    workers = max(int(workers), 1)
+    batch_rows = max(int(batch_rows), 1)
+
+    if fmt == "csv":
+        header, data_start = csv_header(path, delimiter)
+        if workers == 1:
+            tasks = [(parse_csv_file, (path, header, data_start, delimiter, dbms, table, batch_rows))]
+        else:
+            tasks = [(parse_csv_range, (path, start, end, header, delimiter, dbms, table, batch_rows))
+                     for start, end in csv_ranges(path, data_start, max(int(chunk_bytes), 1))]
+    else:
+        row_groups = require_pyarrow().ParquetFile(path).num_row_groups
+        tasks = [(parse_parquet_row_group, (path, group, dbms, table, batch_rows)) for group in range(row_groups)]
+
+    stats = {"file": os.path.basename(path), "format": fmt, "tasks": len(tasks),
+             "rows": 0, "batches": 0, "failed_rows": 0, "failed_batches": 0}
+    started = time.perf_counter()
+
+    def deliver(batch: Batch):
+        schema, payload, rows = batch
+        try:
+            response = send(schema, payload, rows)
+        except Exception as e:
+            print(f"Error sending batch of {rows} rows: {e}")
+            response = None
+        return rows, response is not None
+
+    # spawn, not fork: parsers may start from inside the threaded server
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as parsers, \
+            ThreadPoolExecutor(max_workers=send_workers) as senders:
+        pending_tasks = iter(tasks)
+        parsing = set()
+        sending = set()
+
+        def fill():
+            # Keep at most two parse tasks per worker queued
+            while len(parsing) < workers * 2:
+                task = next(pending_tasks, None)
+                if task is None:
+                    return
+                fn, args = task
+                parsing.add(parsers.submit(fn, *args))
+
+        def collect(done):
+            for future in done:
+                rows, ok = future.result()
+                key = "rows" if ok else "failed_rows"
+                stats[key] += rows
+                stats["batches" if ok else "failed_batches"] += 1
+
+        fill()
+        while parsing:
+            done, _ = wait(parsing, return_when=FIRST_COMPLETED)
+            for future in done:
+                parsing.discard(future)
+                batches, skipped = future.result()
+                stats["failed_rows"] += skipped
+                for batch in batches:
+                    sending.add(senders.submit(deliver, batch))
+            fill()
+            # Do not let parsed batches pile up behind a slow node
+            while len(sending) > send_workers * 2:
+                finished, sending = wait(sending, return_when=FIRST_COMPLETED)
+                collect(finished)
+        finished, _ = wait(sending)
+        collect(finished)
+
+    elapsed = time.perf_counter() - started
+    stats["elapsed"] = round(elapsed, 3)
+    stats["rows_per_sec"] = round(stats["rows"] / elapsed, 1) if elapsed > 0 else None
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load a CSV or Parquet file into an AnyLog / EdgeLake node")
+    parser.add_argument("path", help="CSV or Parquet file")
+    parser.add_argument("--conn", required=True, help="node REST address, e.g. 10.0.0.11:32249")
+    parser.add_argument("--dbms", required=True)
+    parser.add_argument("--table", required=True)
+    parser.add_argument("--format", choices=FORMATS, default=None, help="default: from the file extension")
+    parser.add_argument("--batch-rows", type=int, default=FILE_INGEST_BATCH_ROWS)
+    parser.add_argument("--workers", type=int, default=FILE_INGEST_WORKERS)
+    parser.add_argument("--delimiter", default=None, help="default: tab for .tsv, comma otherwise")
+    args = parser.parse_args()
+
+    from helpers import post_rows
+    from schema_infer import schema_inferer
+
+    def send(schema, payload, rows):
+        return post_rows(args.conn, args.dbms, args.table, schema_inferer.merge(args.dbms, args.table, schema), payload)
+
+    stats = ingest_file(args.path, args.dbms, args.table, send, fmt=args.format,
+                        batch_rows=args.batch_rows, workers=args.workers, delimiter=args.delimiter)
+    print(json.dumps(stats, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import heapq
+import math
+from array import array
+from typing import Dict, List, Sequence
+
+from monitor import NUMERIC_METRICS, operator_id, to_number
+
+PERCENTILES = (50, 90, 99)
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """
+    Linearly interpolated percentile of an already sorted sequence.
+    """
+    if not sorted_values:
+        return math.nan
+    position = (len(sorted_values) - 1) * q / 100
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    if lower == upper:
+        return sorted_values[lower]
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def metric_columns(rows: List[Dict], metrics: List[str] = NUMERIC_METRICS) -> Dict[str, array]:
+    """
+    Parse each numeric field once into a float array (NaN where missing), one array per metric.
+    """
+    return {metric: array('d', [to_number(row.get(metric)) for row in rows]) for metric in metrics}
+
+
+def summarize_column(nodes: List[str], column: array, top_k: int) -> Dict:
+    valid = [i for i, v in enumerate(column) if not math.isnan(v)]
+    values = sorted(column[i] for i in valid)
+    if not values:
+        return {"count": 0, "missing": len(column)}
+
+    total = math.fsum(values)
+    summary = {
+        "count": len(values),
+        "missing": len(column) - len(values),
+        "sum": total,
+        "mean": total / len(values),
+        "min": values[0],
+        "max": values[-1],
+        "percentiles": {f"p{q}": percentile(values, q) for q in PERCENTILES},
+    }
+    summary["top"] = [{"node": nodes[i], "value": column[i]} for i in heapq.nlargest(top_k, valid, key=column.__getitem__)]
+    summary["bottom"] = [{"node": nodes[i], "value": column[i]} for i in heapq.nsmallest(top_k, valid, key=column.__getitem__)]
+    return summary
+
+
+def fleet_summary(rows: List[Dict], top_k: int = 5, metrics: List[str] = NUMERIC_METRICS) -> Dict:
+    """
+    Fleet-wide statistics (count, sum, mean, min/max, percentiles, top/bottom k nodes)
+    for every numeric monitored-operator field.
+    """
+    nodes = [operator_id(row) for row in rows]
+    columns = metric_columns(rows, metrics)
+    return {
+        "operators": len(rows),
+        "metrics": {metric: summarize_column(nodes, column, top_k) for metric, column in columns.items()},
+    }
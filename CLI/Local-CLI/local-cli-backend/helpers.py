@@ -8,6 +8,12 @@ import json
 import requests
 
 from classes import *
+from timings import timed
+from discovery import network_discovery
+from msg_clients import MsgClientRegistry
+from schema_infer import schema_inferer
+from policies import PolicyPublisher
+from blockchain_mirror import BlockchainMirror
 
 import anylog_api.anylog_connector as anylog_connector
 
@@ -25,24 +31,27 @@ class Policy(BaseModel):
     data: Dict[str, str]  # Key-value pairs
 
 
+# Fields of "get monitored operators" shown on the monitor page
+MONITORED_FIELDS = [
+    "Node",
+    "node name",
+    "operational time",
+    "elapsed time",
+    "new rows",
+    "total rows",
+    "Free Space Percent",
+    "CPU Percent",
+    "Packets Recv",
+    "Packets Sent",
+    "Network Error"
+]
+
 def monitor_network(conn: str) -> Dict:
     raw_response = make_request(conn, "GET", "get monitored operators")
     structured_data = parse_response(raw_response)
     data = structured_data.get("data", {})
     vals = list(data.values())
-    monitored_nodes_filtered = filter_dicts_by_keys(vals, [
-        "Node",
-        "node name",
-        "operational time",
-        "elapsed time",
-        "new rows",
-        "total rows",
-        "Free Space Percent",
-        "CPU Percent",
-        "Packets Recv",
-        "Packets Sent",
-        "Network Error"
-      ])
+    monitored_nodes_filtered = filter_dicts_by_keys(vals, MONITORED_FIELDS)
     return monitored_nodes_filtered
 
 def filter_dicts_by_keys(dict_list, keys_to_keep):
@@ -61,60 +70,44 @@ def filter_dicts_by_keys(dict_list, keys_to_keep):
         for d in dict_list
     ]
 
-def grab_network_nodes(conn: str) -> Dict:
-    raw_response = make_request(conn, "GET", "test network")
-    print(raw_response)
+def discover_network_nodes(conn: str, refresh: bool = False) -> Dict:
+    """
+    Nodes of the network seen by conn whose REST port answers, with round-trip times.
+    Every address listed by "test network" is probed concurrently and the result is
+    cached for NETWORK_CACHE_TTL seconds; concurrent callers share one refresh.
+    """
+    def list_addresses():
+        raw_response = make_request(conn, "GET", "test network")
+        print(raw_response)
 
-    structured_data = parse_response(raw_response)
-    data = structured_data.get("data", {})
+        structured_data = parse_response(raw_response)
+        data = structured_data.get("data", {})
+        return [node['Address'] for node in data if isinstance(node, dict) and node.get('Address')]
 
-    connected_nodes = [node['Address'] for node in data if node['Status'] == "+"]
-    connected_nodes = [node[:-1] + "9" for node in connected_nodes]
-    return connected_nodes
+    return network_discovery.get(conn, list_addresses, refresh=refresh)
 
 
-def make_policy(conn:str, policy: Policy):
-    # Construct the policy command
-    policy_command = f'{policy.name} = create policy {policy.name} where '
-    key_value_pairs = [f"{k} = {v}" for k, v in policy.data.items()]
-    policy_command += " and ".join(key_value_pairs)
+def grab_network_nodes(conn: str) -> list:
+    return discover_network_nodes(conn)["reachable"]
 
-    # Submit the policy (POST)
-    print(f"Submitting Policy: {policy_command}")
-    make_request(conn, "POST", policy_command)
 
-    # Retrieve the created policy (GET)
-    get_policy_command = f"get !{policy.name}"
-    print(f"Fetching Policy: {get_policy_command}")
-    policy_response = make_request(conn, "GET", get_policy_command)
-    print(f"Policy Response: {policy_response}")
-
-    # Get the master node IP/Port (POST)
-    master_node_command = 'mnode = blockchain get master bring.ip_port'
-    print(f"Fetching Master Node: {master_node_command}")
-    make_request(conn, "POST", master_node_command)
-
-    # Retrieve master node info (GET)
-    get_master_command = "get !mnode"
-    print(f"Fetching Master Node Info: {get_master_command}")
-    master_node_response = make_request(conn, "GET", get_master_command)
-    print(f"Master Node Response: {master_node_response}")
-
-    # Insert policy into blockchain (POST)
-    blockchain_insert_command = f"blockchain insert where policy = !{policy.name} and local = true and master = !mnode"
-    print(f"Inserting Policy into Blockchain: {blockchain_insert_command}")
-    make_request(conn, "POST", blockchain_insert_command)
-
-    # Retrieve the policy from the blockchain (POST)
-    blockchain_get_command = f"blockchain get {policy.name}"
-    print(f"Fetching Policy from Blockchain: {blockchain_get_command}")
-    blockchain_response = make_request(conn, "GET", blockchain_get_command)
+def make_policy(conn:str, policy: Policy):
+    # create policy + blockchain insert (master address cached per node), then read the stored policy back
+    print(f"Submitting Policy: {policy.name} {policy.data}")
+    blockchain_response = policy_publisher.submit(conn, policy.name, policy.data)
+    blockchain_mirror.invalidate(conn)
     print(f"Blockchain Policy Response: {blockchain_response}")
-
     return blockchain_response
 
 
+def make_policies(conn: str, policies: list) -> list:
+    results = policy_publisher.submit_many(conn, policies)
+    blockchain_mirror.invalidate(conn)
+    return results
+
+
 
+@timed("upstream")
 def make_request(conn, method, command, topic=None, destination=None, payload=None):
 
 
@@ -170,6 +163,10 @@ def make_request(conn, method, command, topic=None, destination=None, payload=No
         print(f"Error making {method.upper()} request: {e}")
         return None
 
+
+policy_publisher = PolicyPublisher(request=make_request)
+blockchain_mirror = BlockchainMirror(request=make_request)
+
 # blockchain delete policy where id = a29bcfd55cef20c6834f29fbb3aaf882 and master = 172.24.0.2:32048
 
 
@@ -184,96 +181,81 @@ def make_request(conn, method, command, topic=None, destination=None, payload=No
 def prep_to_add_data(data: list, dbms: str, table: str) -> list:
     """
     Prepare data for adding to the database.
+    Rows are tagged on copies so the caller's records are left untouched.
+    """
+    return json.dumps([{**record, 'dbms': dbms, 'table': table} for record in data])
+
+def infer_schema(data, dbms=None, table=None) -> dict:
     """
-    for record in data:
-        record['dbms'] = dbms
-        record['table'] = table
-    return json.dumps(data)
-
-def infer_schema(data) -> list:
-    print("Parsing JSON")
-    schema = {}
-    for record in data:
-        for key, value in record.items():
-            if key not in schema:
-                schema[key] = type(value).__name__
+    Column types of a batch from a sample of its rows. With dbms/table the
+    result is merged with earlier batches of the same table (types only widen).
+    """
+    schema = schema_inferer.infer(data, dbms, table)
     print("Schema", schema)
     return schema
 
 
-def build_msg_client_command(schema: dict) -> str:
+def build_msg_client_command(schema: dict, topic: str = "new-data") -> str:
     """
     Build a topic string based on the provided parameters.
     """
     column_details = []
 
     for key, value in schema.items():
-        # print(f"Key: {key}, Value: {value}")
-        # if key == 'timestamp':
-        #     val = f'column.timestamp.timestamp="bring [timestamp]"'
-        #     column_details.append(val)
-        # else:
-        #     val = f'column.{key}=(type={value} and value=bring [{key}])'
-        #     column_details.append(val)
-        val = f'column.{key}=(type={value} and value=bring [{key}])'
+        if value == 'timestamp':
+            val = f'column.{key}.timestamp="bring [{key}]"'
+        else:
+            val = f'column.{key}=(type={value} and value=bring [{key}])'
         column_details.append(val)
 
     column_str = ' and '.join(column_details)
-    topic_str = f'run msg client where broker=rest and user-agent=anylog and log=false and topic=(name=new-data and dbms="bring [dbms]" and table="bring [table]" and {column_str})'
+    topic_str = f'run msg client where broker=rest and user-agent=anylog and log=false and topic=(name={topic} and dbms="bring [dbms]" and table="bring [table]" and {column_str})'
     return topic_str
 
     # base_str = 'run msg client where broker=rest and user-agent=anylog and log=false and topic=(name=new-data and dbms="bring [dbms]" and table="bring [table]" and column.timestamp.timestamp="bring [timestamp]" and column.value=(type=int and value=bring [value]))'
 
-def parse_check_clients(raw: str) -> dict:
+# Message clients reused across batches, keyed by (node, dbms, table) and schema
+msg_client_registry = MsgClientRegistry(request=make_request, build_command=build_msg_client_command)
+
+
+def post_rows(conn, dbms, table, schema, payload):
     """
-    Parse the response from the check clients command.
+    POST an already serialized (and dbms/table tagged) JSON array of rows
+    through the message client registered for the schema.
     """
-    lines = raw.strip().splitlines()
-    idline = lines[0]
-    ret = idline.split(": ")
-    ret[1] = ret[1].strip()
-    return int(ret[1])
+    # find or create the msg client for this schema
+    topic = msg_client_registry.ensure_client(conn, dbms, table, schema)
 
+    response = make_request(conn=conn, method="POST", command='data', topic=topic, payload=payload)
+    print("Data send resp:", response)
+    if response is None:
+        # The node may have restarted and lost the client, re-check it on the next batch
+        msg_client_registry.invalidate(conn, dbms, table)
+    return response
 
-def send_json_data(conn, dbms, table, data):
-    
-    # infer the schema of the data
-    inferred_schema = infer_schema(data)
 
-    # build the msg client command
-    msg_client_cmd = build_msg_client_command(inferred_schema)
-    print("msg_client_cmd", msg_client_cmd)
+def send_json_data(conn, dbms, table, data, verify=False):
+    """
+    Send rows to the node through a REST message client.
+    When the schema matches the registered client this is a single data POST;
+    the client is only (re)created when the schema changes.
+    """
+
+    # infer the schema of the data
+    inferred_schema = infer_schema(data, dbms, table)
 
     # prep data with dbms and table
     prepped_data = prep_to_add_data(data, dbms, table)
 
-    # check for existing msg client
-
-    check_clients = make_request(conn, "GET", "get msg client where topic = new-data")
-    if "No message client subscriptions" in check_clients:
-        # create new client
-        resp = make_request(conn, "POST", msg_client_cmd)
-        print("New Client:", resp)
-    else: 
-        # get old client id
-        old_client_id = parse_check_clients(check_clients)
-        print(old_client_id)
-
-        # kill old client
-        kill_cmd = f'exit msg client {old_client_id}'
-        make_request(conn, "POST", kill_cmd)
-
-        # create new client
-        resp = make_request(conn, "POST", msg_client_cmd)
-        print("New Client:", resp)
-
     # send data
-    response = make_request(conn=conn, method="POST", command='data', topic='new-data', payload=prepped_data)
-    print("Data send resp:", response)
+    response = post_rows(conn, dbms, table, inferred_schema, prepped_data)
+    if response is None:
+        return None
 
-    # get streaming to check if data was sent
-    response = make_request(conn, "GET", "get streaming")
-    print("Streaming:", response)
+    if verify:
+        # get streaming to check if data was sent
+        response = make_request(conn, "GET", "get streaming")
+        print("Streaming:", response)
 
     return response 
 
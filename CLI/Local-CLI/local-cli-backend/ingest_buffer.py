@@ -0,0 +1,265 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Flush when a buffer holds this many rows or its oldest row is this many seconds old
+INGEST_BATCH_ROWS = int(os.getenv('INGEST_BATCH_ROWS', '5000'))
+INGEST_FLUSH_INTERVAL = float(os.getenv('INGEST_FLUSH_INTERVAL', '1.0'))
+# Rows a buffer may hold (including rows waiting on a slow node) before writers are pushed back
+INGEST_MAX_PENDING_ROWS = int(os.getenv('INGEST_MAX_PENDING_ROWS', '50000'))
+INGEST_FLUSH_WORKERS = int(os.getenv('INGEST_FLUSH_WORKERS', '8'))
+# Longest wait (seconds) before retrying a buffer whose flushes keep failing; the wait doubles per failure
+INGEST_MAX_RETRY_DELAY = float(os.getenv('INGEST_MAX_RETRY_DELAY', '30'))
+
+# Samples kept for the flush latency / batch size percentiles
+METRICS_WINDOW = 200
+
+
+class BufferFull(Exception):
+    """
+    Raised when a buffer cannot take more rows; retry_after is a hint in seconds.
+    """
+
+    def __init__(self, pending: int, retry_after: float):
+        super().__init__(f"Ingest buffer full ({pending} rows pending)")
+        self.pending = pending
+        self.retry_after = retry_after
+
+
+def percentile_of(samples, q: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * q / 100), len(ordered) - 1)]
+
+
+class IngestBuffer:
+    """
+    Rows waiting to be sent to one (node, dbms, table). Rows of a failed flush are put
+    back at the front so ordering is kept and a node that falls behind fills the
+    buffer, which is what pushes back on writers. Consecutive failures back off
+    exponentially before the next attempt.
+    """
+
+    def __init__(self, key: Tuple[str, str, str], max_rows: int, max_delay: float, max_pending: int):
+        self.key = key
+        self.max_rows = max_rows
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+
+        self.rows = []
+        self.oldest_at = None
+        self.flushing = False
+        self.retry_delay = 0.0
+        self.retry_at = 0.0
+
+        self.batches = 0
+        self.rows_flushed = 0
+        self.failures = 0
+        self.rejected = 0
+        self.last_error = None
+        self.latencies_ms = deque(maxlen=METRICS_WINDOW)
+        self.batch_sizes = deque(maxlen=METRICS_WINDOW)
+
+        self.condition = threading.Condition()
+
+    def due(self, now: float) -> bool:
+        return bool(self.rows) and not self.flushing and now >= self.retry_at and (
+            len(self.rows) >= self.max_rows or now - self.oldest_at >= self.max_delay
+        )
+
+    def metrics(self) -> Dict:
+        conn, dbms, table = self.key
+        return {
+            "conn": conn,
+            "dbms": dbms,
+            "table": table,
+            "pending_rows": len(self.rows),
+            "batches": self.batches,
+            "rows_flushed": self.rows_flushed,
+            "failures": self.failures,
+            "rejected_rows": self.rejected,
+            "last_error": self.last_error,
+            "retry_in_s": round(max(self.retry_at - time.time(), 0.0), 2),
+            "flush_latency_ms": {
+                "last": self.latencies_ms[-1] if self.latencies_ms else None,
+                "p50": percentile_of(self.latencies_ms, 50),
+                "p99": percentile_of(self.latencies_ms, 99),
+            },
+            "batch_size": {
+                "last": self.batch_sizes[-1] if self.batch_sizes else None,
+                "mean": sum(self.batch_sizes) / len(self.batch_sizes) if self.batch_sizes else None,
+                "max": max(self.batch_sizes) if self.batch_sizes else None,
+            },
+        }
+
+
+class IngestBufferPool:
+    """
+    Write-behind buffers per (node, dbms, table). Writers return as soon as rows are
+    queued; a background thread hands due buffers to a worker pool which sends each
+    one as a single batch with `send(conn, dbms, table, rows)`. At most one flush per
+    buffer runs at a time.
+    """
+
+    def __init__(self, send: Callable[[str, str, str, List[Dict]], object],
+                 max_rows: int = INGEST_BATCH_ROWS, max_delay: float = INGEST_FLUSH_INTERVAL,
+                 max_pending: int = INGEST_MAX_PENDING_ROWS, workers: int = INGEST_FLUSH_WORKERS):
+        self.send = send
+        self.max_rows = max_rows
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+
+        self._buffers = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self.workers = workers
+        self._executor = None
+        self._thread = None
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ingest-flush")
+                self._thread = threading.Thread(target=self._run, name="ingest-buffer", daemon=True)
+                self._thread.start()
+
+    def stop(self, flush: bool = True):
+        """
+        Stop the flush thread. With flush, waits for running flushes, sends what is
+        left in every buffer and then shuts the worker pool down.
+        """
+        self._stop.set()
+        self._wake.set()
+        with self._lock:
+            thread, executor = self._thread, self._executor
+            self._thread = self._executor = None
+        if thread is not None:
+            thread.join()
+        if flush:
+            self.flush_all()
+        if executor is not None:
+            executor.shutdown(wait=flush)
+
+    def _buffer(self, key: Tuple[str, str, str]) -> IngestBuffer:
+        with self._lock:
+            buffer = self._buffers.get(key)
+            if buffer is None:
+                buffer = self._buffers[key] = IngestBuffer(key, self.max_rows, self.max_delay, self.max_pending)
+        return buffer
+
+    def add(self, conn: str, dbms: str, table: str, rows: List[Dict], wait: float = 0) -> int:
+        """
+        Queue rows and return the number now pending. Blocks up to `wait` seconds for
+        room when the buffer is full, then raises BufferFull.
+        """
+        self.start()
+        buffer = self._buffer((conn, dbms, table))
+        deadline = time.time() + wait
+        with buffer.condition:
+            while buffer.rows and len(buffer.rows) + len(rows) > buffer.max_pending:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    buffer.rejected += len(rows)
+                    raise BufferFull(len(buffer.rows),
+                                     retry_after=max(self.max_delay, buffer.retry_at - time.time(), 1.0))
+                buffer.condition.wait(remaining)
+
+            if not buffer.rows:
+                buffer.oldest_at = time.time()
+            buffer.rows.extend(rows)
+            pending = len(buffer.rows)
+
+        if pending >= buffer.max_rows:
+            self._wake.set()
+        return pending
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.max_delay / 2)
+            self._wake.clear()
+            now = time.time()
+            with self._lock:
+                buffers = list(self._buffers.values())
+            for buffer in buffers:
+                with buffer.condition:
+                    if not buffer.due(now):
+                        continue
+                    buffer.flushing = True
+                executor = self._executor
+                if executor is None:
+                    with buffer.condition:
+                        buffer.flushing = False
+                    return
+                executor.submit(self._flush, buffer)
+
+    def _flush(self, buffer: IngestBuffer, drain: bool = False):
+        try:
+            while True:
+                with buffer.condition:
+                    batch = buffer.rows[:buffer.max_rows]
+                    del buffer.rows[:buffer.max_rows]
+                    buffer.oldest_at = time.time() if buffer.rows else None
+                if not batch:
+                    return
+
+                conn, dbms, table = buffer.key
+                start = time.perf_counter()
+                try:
+                    response = self.send(conn, dbms, table, batch)
+                    error = None if response is not None else f"No response from {conn}"
+                except Exception as e:
+                    error = str(e)
+                latency_ms = round((time.perf_counter() - start) * 1000, 2)
+
+                with buffer.condition:
+                    if error is not None:
+                        # Keep the rows (in order) for the next attempt and stop draining
+                        buffer.rows[:0] = batch
+                        buffer.oldest_at = time.time()
+                        buffer.failures += 1
+                        buffer.last_error = error
+                        buffer.retry_delay = min(max(buffer.retry_delay * 2, self.max_delay), INGEST_MAX_RETRY_DELAY)
+                        buffer.retry_at = time.time() + buffer.retry_delay
+                        print(f"Error flushing ingest buffer {buffer.key}: {error} (retry in {buffer.retry_delay:.1f}s)")
+                        return
+                    buffer.batches += 1
+                    buffer.rows_flushed += len(batch)
+                    buffer.latencies_ms.append(latency_ms)
+                    buffer.batch_sizes.append(len(batch))
+                    buffer.last_error = None
+                    buffer.retry_delay = buffer.retry_at = 0.0
+                    buffer.condition.notify_all()
+                    if not drain and len(buffer.rows) < buffer.max_rows:
+                        return
+        finally:
+            with buffer.condition:
+                buffer.flushing = False
+                buffer.condition.notify_all()
+
+    def flush_all(self):
+        """
+        Flush every buffer now (synchronously) regardless of thresholds or backoff.
+        A flush already running is waited for first, then the rest is drained.
+        """
+        with self._lock:
+            buffers = list(self._buffers.values())
+        for buffer in buffers:
+            with buffer.condition:
+                while buffer.flushing:
+                    buffer.condition.wait()
+                if not buffer.rows:
+                    continue
+                buffer.flushing = True
+            self._flush(buffer, drain=True)
+
+    def metrics(self) -> List[Dict]:
+        with self._lock:
+            buffers = list(self._buffers.values())
+        return [buffer.metrics() for buffer in buffers]
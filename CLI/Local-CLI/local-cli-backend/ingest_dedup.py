@@ -0,0 +1,198 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+# De-duplication of retried ingest batches per (dbms, table)
+INGEST_DEDUP = os.getenv('INGEST_DEDUP', 'true').lower() in ('1', 'true', 'yes')
+# Row hashes and whole-batch hashes kept per table
+INGEST_DEDUP_WINDOW = int(os.getenv('INGEST_DEDUP_WINDOW', '100000'))
+INGEST_DEDUP_BATCH_WINDOW = int(os.getenv('INGEST_DEDUP_BATCH_WINDOW', '1024'))
+
+
+def row_hash(row: Dict) -> bytes:
+    """
+    128-bit content hash of a row, independent of key order.
+    """
+    canonical = json.dumps(row, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.blake2b(canonical.encode(), digest_size=16).digest()
+
+
+def batch_hash(digests: List[bytes]) -> bytes:
+    return hashlib.blake2b(b"".join(digests), digest_size=16).digest()
+
+
+def _hold(pending: Dict[bytes, int], digests):
+    for digest in digests:
+        pending[digest] = pending.get(digest, 0) + 1
+
+
+def _release(pending: Dict[bytes, int], digests):
+    for digest in digests:
+        count = pending.get(digest, 0) - 1
+        if count > 0:
+            pending[digest] = count
+        else:
+            pending.pop(digest, None)
+
+
+class TableDedup:
+    """
+    Ingested rows and batches of one table: exact windows of the most recent
+    hashes, plus the hashes of batches still being sent (pending), so a retry
+    that arrives while the first attempt is waiting on the node is caught too.
+    """
+
+    def __init__(self, window: int, batch_window: int):
+        self.window_size = window
+        self.batch_window_size = batch_window
+
+        self.window = OrderedDict()
+        self.batches = OrderedDict()
+        self.pending_rows = {}
+        self.pending_batches = {}
+
+        self.rows_checked = 0
+        self.rows_suppressed = 0
+        self.batches_suppressed = 0
+
+    def seen(self, digest: bytes) -> bool:
+        return digest in self.window or digest in self.pending_rows
+
+    def batch_seen(self, digest: bytes) -> bool:
+        return digest in self.batches or digest in self.pending_batches
+
+    def hold(self, digests: List[bytes], batch_digest: Optional[bytes]):
+        _hold(self.pending_rows, digests)
+        if batch_digest is not None:
+            _hold(self.pending_batches, [batch_digest])
+
+    def release(self, digests: List[bytes], batch_digest: Optional[bytes]):
+        _release(self.pending_rows, digests)
+        if batch_digest is not None:
+            _release(self.pending_batches, [batch_digest])
+
+    def remember(self, digests: List[bytes], batch_digest: Optional[bytes]):
+        for digest in digests:
+            self.window[digest] = None
+            self.window.move_to_end(digest)
+        while len(self.window) > self.window_size:
+            self.window.popitem(last=False)
+
+        if batch_digest is not None:
+            self.batches[batch_digest] = None
+            self.batches.move_to_end(batch_digest)
+            while len(self.batches) > self.batch_window_size:
+                self.batches.popitem(last=False)
+
+    def stats(self) -> Dict:
+        return {
+            "rows_checked": self.rows_checked,
+            "rows_suppressed": self.rows_suppressed,
+            "batches_suppressed": self.batches_suppressed,
+            "window": len(self.window),
+            "pending_rows": len(self.pending_rows),
+            "pending_batches": len(self.pending_batches),
+        }
+
+
+class Deduplicator:
+    """
+    Drops retried ingest requests for (dbms, table). By default only an exact
+    repeat of a whole batch is dropped; with rows=True every row already ingested
+    is dropped as well (for sources that re-send overlapping data). The hashes of
+    an accepted batch are pending until commit() (sent to the node, buffered or
+    spooled) moves them into the windows, or abort() drops them after a failed
+    send, so a retry racing the first attempt is dropped but a retry after a
+    failure goes through. Rows repeated inside a single batch are kept.
+    """
+
+    def __init__(self, enabled: bool = INGEST_DEDUP, window: int = INGEST_DEDUP_WINDOW,
+                 batch_window: int = INGEST_DEDUP_BATCH_WINDOW):
+        self.enabled = enabled
+        self.options = (window, batch_window)
+        self._tables = {}
+        self._lock = threading.Lock()
+
+    def _table(self, dbms: str, table: str) -> TableDedup:
+        key = (dbms, table)
+        table_dedup = self._tables.get(key)
+        if table_dedup is None:
+            table_dedup = self._tables[key] = TableDedup(*self.options)
+        return table_dedup
+
+    def filter(self, dbms: str, table: str, rows: List[Dict], by_row: bool = False) -> Tuple[List[Dict], Tuple]:
+        """
+        Rows to send and a token to pass to commit() once they are accepted, or to
+        abort() when sending them failed. When no row is left the token is empty.
+        """
+        if not self.enabled or not rows:
+            return rows, ()
+        digests = [row_hash(row) for row in rows]
+        whole = batch_hash(digests)
+        with self._lock:
+            state = self._table(dbms, table)
+            state.rows_checked += len(rows)
+            if state.batch_seen(whole):
+                # The exact same batch again: a retry
+                state.batches_suppressed += 1
+                state.rows_suppressed += len(rows)
+                return [], ()
+            keep = [not state.seen(digest) for digest in digests] if by_row else [True] * len(rows)
+            fresh_digests = [digest for digest, kept in zip(digests, keep) if kept]
+            state.rows_suppressed += len(rows) - len(fresh_digests)
+            if not fresh_digests:
+                # Nothing left to send: the batch counts as delivered, no token to settle
+                state.remember([], whole)
+                return [], ()
+            state.hold(fresh_digests, whole)
+        fresh = [row for row, kept in zip(rows, keep) if kept] if by_row else rows
+        return fresh, (dbms, table, fresh_digests, whole)
+
+    def claim(self, dbms: str, table: str, digest: bytes) -> bool:
+        """
+        Single-row check for streaming paths: False for a row already ingested (or
+        being ingested); otherwise the row is held as pending and True is returned.
+        Commit or abort the claimed digests with (dbms, table, digests, None).
+        """
+        if not self.enabled:
+            return True
+        with self._lock:
+            state = self._table(dbms, table)
+            state.rows_checked += 1
+            if state.seen(digest):
+                state.rows_suppressed += 1
+                return False
+            state.hold([digest], None)
+            return True
+
+    def seen(self, dbms: str, table: str, digest: bytes) -> bool:
+        with self._lock:
+            return self._table(dbms, table).seen(digest)
+
+    def commit(self, token: Tuple):
+        if not token:
+            return
+        dbms, table, digests, whole = token
+        with self._lock:
+            state = self._table(dbms, table)
+            state.release(digests, whole)
+            state.remember(digests, whole)
+
+    def abort(self, token: Tuple):
+        if not token:
+            return
+        dbms, table, digests, whole = token
+        if not digests and whole is None:
+            return
+        with self._lock:
+            self._table(dbms, table).release(digests, whole)
+
+    def stats(self) -> List[Dict]:
+        with self._lock:
+            return [{"dbms": dbms, "table": table, **state.stats()} for (dbms, table), state in self._tables.items()]
+
+
+ingest_dedup = Deduplicator()
@@ -0,0 +1,247 @@
+import asyncio
+import os
+import tempfile
+import time
+from fastapi import APIRouter, HTTPException, Request
+from starlette.concurrency import run_in_threadpool
+from typing import Dict
+from classes import Connection, DBConnection
+from helpers import send_json_data, post_rows, infer_schema, prep_to_add_data, msg_client_registry
+from ingest_buffer import BufferFull, IngestBufferPool
+from ingest_spool import SpoolPool
+from ingest_dedup import ingest_dedup, row_hash
+from schema_infer import schema_inferer
+from file_ingest import FORMATS, FILE_INGEST_BATCH_ROWS, detect_delimiter, detect_format, ingest_file
+from ingest_stream import (ChunkBuilder, StreamFormatError, iter_ndjson,
+                           INGEST_STREAM_CHUNK_ROWS, INGEST_STREAM_CHUNK_BYTES)
+
+# Create router for high-volume ingest paths
+ingest_router = APIRouter(prefix="/ingest", tags=["Ingest"])
+
+# Durable spool: batches are written to a local log first and replayed to the node with retries
+ingest_spool = SpoolPool(
+    send=lambda meta, payload: post_rows(meta["conn"], meta["dbms"], meta["table"], meta["schema"], payload)
+)
+
+# Send buffer flushes through the spool instead of straight to the node
+INGEST_BUFFER_SPOOL = os.getenv('INGEST_BUFFER_SPOOL', 'false').lower() in ('1', 'true', 'yes')
+
+
+def spool_rows(conn, dbms, table, rows):
+    schema = infer_schema(rows, dbms, table)
+    return ingest_spool.append(conn, dbms, table, schema, prep_to_add_data(rows, dbms, table), len(rows))
+
+
+# Write-behind buffers: rows are accepted immediately and sent to the node in large batches
+ingest_buffers = IngestBufferPool(
+    send=spool_rows if INGEST_BUFFER_SPOOL else
+    lambda conn, dbms, table, rows: send_json_data(conn=conn, dbms=dbms, table=table, data=rows)
+)
+
+
+@ingest_router.on_event("startup")
+def resume_spool():
+    # Replay batches spooled before the last shutdown / crash
+    ingest_spool.start()
+
+
+@ingest_router.on_event("shutdown")
+def flush_on_shutdown():
+    # Do not drop accepted rows when the server stops
+    ingest_buffers.stop(flush=True)
+    ingest_spool.stop()
+
+
+@ingest_router.post("/buffered", status_code=202)
+def buffered_add_data(conn: Connection, dbconn: DBConnection, data: list[Dict], wait: float = 0, dedup: bool = True,
+                      dedup_rows: bool = False):
+    """
+    Queue rows for (node, dbms, table). They are flushed as one data POST when the
+    batch size or age threshold is reached. When the node falls behind and the buffer
+    is full, waits up to `wait` seconds for room and then answers 429.
+    """
+    rows, token = ingest_dedup.filter(dbconn.dbms, dbconn.table, data, by_row=dedup_rows) if dedup else (data, ())
+    try:
+        pending = ingest_buffers.add(conn.conn, dbconn.dbms, dbconn.table, rows, wait=wait) if rows else None
+    except BufferFull as e:
+        ingest_dedup.abort(token)
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(int(e.retry_after))})
+    ingest_dedup.commit(token)
+    return {"data": {"accepted": len(rows), "suppressed": len(data) - len(rows), "pending": pending}}
+
+
+@ingest_router.post("/durable", status_code=202)
+def durable_add_data(conn: Connection, dbconn: DBConnection, data: list[Dict], dedup: bool = True,
+                     dedup_rows: bool = False):
+    """
+    Append the rows to the node's local write-ahead log and return once they are on
+    disk. A background sender delivers them, retrying with backoff while the node is down.
+    """
+    rows, token = ingest_dedup.filter(dbconn.dbms, dbconn.table, data, by_row=dedup_rows) if dedup else (data, ())
+    if not rows:
+        return {"data": {"accepted": 0, "suppressed": len(data)}}
+    try:
+        pending = spool_rows(conn.conn, dbconn.dbms, dbconn.table, rows)
+    except Exception:
+        ingest_dedup.abort(token)
+        raise
+    ingest_dedup.commit(token)
+    return {"data": {"accepted": len(rows), "suppressed": len(data) - len(rows), "pending_batches": pending}}
+
+
+@ingest_router.post("/flush")
+def flush_buffers():
+    """
+    Flush all ingest buffers now.
+    """
+    ingest_buffers.flush_all()
+    return {"data": ingest_buffers.metrics()}
+
+
+@ingest_router.get("/metrics")
+def ingest_metrics():
+    """
+    Per-buffer pending rows, flush latency and batch size statistics, spool backlog
+    per node, duplicate suppression per table, the live msg clients and the schemas
+    inferred per table.
+    """
+    return {"data": {
+        "buffers": ingest_buffers.metrics(),
+        "spool": ingest_spool.metrics(),
+        "dedup": ingest_dedup.stats(),
+        "msg_clients": msg_client_registry.clients(),
+        "schemas": schema_inferer.schemas(),
+    }}
+
+
+@ingest_router.post("/stream")
+async def stream_add_data(request: Request, conn: str, dbms: str, table: str,
+                          chunk_rows: int = INGEST_STREAM_CHUNK_ROWS, chunk_bytes: int = INGEST_STREAM_CHUNK_BYTES,
+                          dedup: bool = False):
+    """
+    Bulk ingest from an NDJSON body (one JSON object per line, plain or chunked
+    transfer encoding). The body is decoded as it arrives and forwarded in
+    fixed-size serialized chunks, so memory stays bounded by one chunk being
+    built plus one being sent, whatever the upload size. With dedup=true, rows
+    already ingested for the table (e.g. a re-sent upload) are skipped.
+    """
+    builder = ChunkBuilder(dbms, table, max_rows=max(chunk_rows, 1), max_bytes=max(chunk_bytes, 1))
+    started = time.perf_counter()
+    stats = {"rows": 0, "chunks": 0, "bytes": 0, "suppressed": 0}
+    digests = []
+    in_flight = None
+
+    def settle(chunk_digests, response) -> bool:
+        # Claimed rows become "ingested" once the node took them, and claimable again otherwise
+        token = (dbms, table, chunk_digests, None)
+        if response is None:
+            ingest_dedup.abort(token)
+            return False
+        ingest_dedup.commit(token)
+        return True
+
+    async def wait_sent(sending):
+        task, chunk_digests = sending
+        try:
+            rows, size, response = await task
+        except Exception:
+            settle(chunk_digests, None)
+            raise
+        if not settle(chunk_digests, response):
+            raise HTTPException(status_code=502, detail={"error": f"No response from {conn}", **stats})
+        stats["rows"] += rows
+        stats["chunks"] += 1
+        stats["bytes"] += size
+
+    def send(chunk):
+        schema, payload, rows = chunk
+        return rows, len(payload), post_rows(conn, dbms, table, schema, payload)
+
+    async def dispatch(chunk):
+        # Keep one chunk in flight while the next one is parsed
+        nonlocal in_flight, digests
+        if in_flight is not None:
+            sending, in_flight = in_flight, None
+            await wait_sent(sending)
+        in_flight = (asyncio.ensure_future(run_in_threadpool(send, chunk)), digests)
+        digests = []
+
+    try:
+        async for record in iter_ndjson(request.stream()):
+            if dedup and ingest_dedup.enabled:
+                digest = row_hash(record)
+                if not ingest_dedup.claim(dbms, table, digest):
+                    stats["suppressed"] += 1
+                    continue
+                digests.append(digest)
+            chunk = builder.add(record)
+            if chunk is not None:
+                await dispatch(chunk)
+        chunk = builder.take()
+        if chunk is not None:
+            await dispatch(chunk)
+        if in_flight is not None:
+            sending, in_flight = in_flight, None
+            await wait_sent(sending)
+    except StreamFormatError as e:
+        # Rows before the bad line are already on their way; report them
+        if in_flight is not None:
+            sending, in_flight = in_flight, None
+            await wait_sent(sending)
+        raise HTTPException(status_code=400, detail={"error": str(e), **stats})
+    finally:
+        # Rows claimed but never sent (bad line, client gone, failed send) must not block a retry
+        ingest_dedup.abort((dbms, table, digests, None))
+        if in_flight is not None:
+            task, chunk_digests = in_flight
+            task.add_done_callback(lambda done: settle(
+                chunk_digests, None if done.cancelled() or done.exception() else done.result()[2]))
+
+    elapsed = time.perf_counter() - started
+    return {"data": {
+        **stats,
+        "elapsed": round(elapsed, 3),
+        "rows_per_sec": round(stats["rows"] / elapsed, 1) if elapsed > 0 else None,
+    }}
+
+
+@ingest_router.post("/file")
+async def file_add_data(request: Request, conn: str, dbms: str, table: str, format: str = None,
+                        filename: str = None, batch_rows: int = FILE_INGEST_BATCH_ROWS, delimiter: str = None):
+    """
+    Load a CSV or Parquet file sent as the raw request body
+    (e.g. curl --data-binary @readings.csv). The upload is spooled to a temp file,
+    parsed across cores in a process pool and sent in large batches through the
+    table's msg client. Returns rows loaded and rows/second.
+    The CSV delimiter defaults to a tab for .tsv files and a comma otherwise.
+    """
+    try:
+        fmt = format or detect_format(filename or "")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format '{fmt}', use one of {', '.join(FORMATS)}")
+    delimiter = delimiter or detect_delimiter(filename or "")
+    if len(delimiter) != 1:
+        raise HTTPException(status_code=400, detail="delimiter must be a single character")
+
+    def send(schema, payload, rows):
+        return post_rows(conn, dbms, table, schema_inferer.merge(dbms, table, schema), payload)
+
+    fd, path = tempfile.mkstemp(suffix=f".{fmt}")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            async for data in request.stream():
+                f.write(data)
+        stats = await run_in_threadpool(ingest_file, path, dbms, table, send, fmt=fmt, batch_rows=batch_rows,
+                                         delimiter=delimiter)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        os.remove(path)
+
+    if filename:
+        stats["file"] = filename
+    if stats["failed_batches"]:
+        raise HTTPException(status_code=502, detail={"error": f"Some batches were not accepted by {conn}", **stats})
+    return {"data": stats}
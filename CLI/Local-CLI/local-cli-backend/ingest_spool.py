@@ -0,0 +1,321 @@
+import json
+import os
+import random
+import re
+import struct
+import threading
+import time
+import zlib
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Where spooled batches live, how big a segment gets before a new one is started,
+# whether every append is fsynced, and the retry backoff bounds (seconds)
+INGEST_SPOOL_DIR = os.getenv('INGEST_SPOOL_DIR', 'usr-mgm/spool')
+INGEST_SPOOL_SEGMENT_BYTES = int(os.getenv('INGEST_SPOOL_SEGMENT_BYTES', str(64 * 1024 * 1024)))
+INGEST_SPOOL_FSYNC = os.getenv('INGEST_SPOOL_FSYNC', 'true').lower() in ('1', 'true', 'yes')
+INGEST_SPOOL_RETRY_MIN = float(os.getenv('INGEST_SPOOL_RETRY_MIN', '0.5'))
+INGEST_SPOOL_RETRY_MAX = float(os.getenv('INGEST_SPOOL_RETRY_MAX', '30'))
+
+# meta length, payload length, crc32 of meta + payload
+RECORD_HEADER = struct.Struct(">III")
+
+
+def encode_record(meta: Dict, payload: str) -> bytes:
+    meta_bytes = json.dumps(meta, separators=(',', ':')).encode()
+    payload_bytes = payload.encode()
+    crc = zlib.crc32(payload_bytes, zlib.crc32(meta_bytes))
+    return RECORD_HEADER.pack(len(meta_bytes), len(payload_bytes), crc) + meta_bytes + payload_bytes
+
+
+def read_record(f) -> Optional[Tuple[Dict, str, int]]:
+    """
+    Next record at the file position as (meta, payload, size), None at the end of
+    the segment or at a torn / corrupt record.
+    """
+    header = f.read(RECORD_HEADER.size)
+    if len(header) < RECORD_HEADER.size:
+        return None
+    meta_len, payload_len, crc = RECORD_HEADER.unpack(header)
+    body = f.read(meta_len + payload_len)
+    if len(body) < meta_len + payload_len:
+        return None
+    meta_bytes, payload_bytes = body[:meta_len], body[meta_len:]
+    if zlib.crc32(payload_bytes, zlib.crc32(meta_bytes)) != crc:
+        return None
+    return json.loads(meta_bytes), payload_bytes.decode(), RECORD_HEADER.size + meta_len + payload_len
+
+
+class Spool:
+    """
+    Segmented write-ahead log for one destination node. Batches are appended (and
+    fsynced) before the caller is answered; a background sender replays them in
+    order with exponential backoff while the node is down. The read position is
+    kept in a small .ack file next to each segment, and segments are deleted once
+    everything in them has been acknowledged. Delivery is at-least-once: a crash
+    between a send and its ack resends that batch.
+    """
+
+    def __init__(self, directory: str, send: Callable[[Dict, str], object],
+                 segment_bytes: int = INGEST_SPOOL_SEGMENT_BYTES, fsync: bool = INGEST_SPOOL_FSYNC,
+                 retry_min: float = INGEST_SPOOL_RETRY_MIN, retry_max: float = INGEST_SPOOL_RETRY_MAX):
+        self.directory = directory
+        self.send = send
+        self.segment_bytes = segment_bytes
+        self.fsync = fsync
+        self.retry_min = retry_min
+        self.retry_max = retry_max
+
+        self.pending_records = 0
+        self.pending_bytes = 0
+        self.sent_records = 0
+        self.retries = 0
+        self.backoff = 0.0
+        self.last_error = None
+        self.last_sent_at = None
+
+        self._condition = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = None
+
+        os.makedirs(directory, exist_ok=True)
+        self._recover()
+
+    # Files
+
+    def _log_path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"{segment:012d}.log")
+
+    def _ack_path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"{segment:012d}.ack")
+
+    def _read_ack(self, segment: int) -> int:
+        try:
+            with open(self._ack_path(segment), 'r') as f:
+                return int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def _write_ack(self, segment: int, offset: int):
+        tmp = self._ack_path(segment) + ".tmp"
+        with open(tmp, 'w') as f:
+            f.write(str(offset))
+        os.replace(tmp, self._ack_path(segment))
+
+    def _compact(self, segment: int):
+        for path in (self._log_path(segment), self._ack_path(segment)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _recover(self):
+        segments = sorted(int(name[:-4]) for name in os.listdir(self.directory)
+                          if name.endswith(".log") and name[:-4].isdigit())
+
+        # Drop segments that were fully acknowledged but not yet deleted
+        while len(segments) > 1 and self._read_ack(segments[0]) >= os.path.getsize(self._log_path(segments[0])):
+            self._compact(segments.pop(0))
+
+        # Count what is left, truncating a record torn by a crash during append
+        for segment in segments:
+            offset = self._read_ack(segment)
+            with open(self._log_path(segment), 'rb') as f:
+                f.seek(offset)
+                while True:
+                    record = read_record(f)
+                    if record is None:
+                        break
+                    offset += record[2]
+                    self.pending_records += 1
+                    self.pending_bytes += record[2]
+            if segment == segments[-1] and offset < os.path.getsize(self._log_path(segment)):
+                print(f"Truncating torn record in {self._log_path(segment)} at {offset}")
+                with open(self._log_path(segment), 'r+b') as f:
+                    f.truncate(offset)
+
+        self.segments = segments or [1]
+        self.read_segment = self.segments[0]
+        self.read_offset = self._read_ack(self.read_segment)
+        self.write_segment = self.segments[-1]
+        self._writer = open(self._log_path(self.write_segment), 'ab')
+        self.write_offset = self._writer.tell()
+
+    # Writing
+
+    def append(self, meta: Dict, payload: str) -> int:
+        """
+        Durably queue one batch; returns the number of batches waiting to be sent.
+        """
+        record = encode_record(meta, payload)
+        with self._condition:
+            if self.write_offset and self.write_offset + len(record) > self.segment_bytes:
+                self._roll()
+            self._writer.write(record)
+            self._writer.flush()
+            if self.fsync:
+                os.fsync(self._writer.fileno())
+            self.write_offset += len(record)
+            self.pending_records += 1
+            self.pending_bytes += len(record)
+            self._condition.notify_all()
+            pending = self.pending_records
+        self.start()
+        return pending
+
+    def _roll(self):
+        self._writer.close()
+        self.write_segment += 1
+        self.segments.append(self.write_segment)
+        self._writer = open(self._log_path(self.write_segment), 'ab')
+        self.write_offset = 0
+
+    # Sending
+
+    def _next_record(self) -> Optional[Tuple[Dict, str, int]]:
+        """
+        Record at the read position, moving past (and compacting) finished segments.
+        """
+        with self._condition:
+            while True:
+                if self.read_segment == self.write_segment and self.read_offset >= self.write_offset:
+                    return None
+                with open(self._log_path(self.read_segment), 'rb') as f:
+                    f.seek(self.read_offset)
+                    record = read_record(f)
+                if record is not None:
+                    return record
+                if self.read_segment == self.write_segment:
+                    return None
+                # End of a closed segment (or a corrupt tail): everything readable in it was acknowledged
+                finished = self.segments.pop(0)
+                self._compact(finished)
+                self.read_segment = self.segments[0]
+                self.read_offset = self._read_ack(self.read_segment)
+
+    def _acknowledge(self, size: int):
+        with self._condition:
+            self.read_offset += size
+            self._write_ack(self.read_segment, self.read_offset)
+            self.pending_records -= 1
+            self.pending_bytes -= size
+            self.sent_records += 1
+            self.last_sent_at = time.time()
+            self._condition.notify_all()
+
+    def _run(self):
+        while not self._stop.is_set():
+            record = self._next_record()
+            if record is None:
+                with self._condition:
+                    self._condition.wait(1.0)
+                continue
+
+            meta, payload, size = record
+            try:
+                response = self.send(meta, payload)
+                error = None if response is not None else f"No response from {meta.get('conn')}"
+            except Exception as e:
+                error = str(e)
+
+            if error is None:
+                self._acknowledge(size)
+                self.backoff = 0.0
+                self.last_error = None
+                continue
+
+            # Node down or refusing: keep the batch at the head and back off
+            self.retries += 1
+            self.last_error = error
+            self.backoff = min(max(self.backoff * 2, self.retry_min), self.retry_max)
+            self._stop.wait(self.backoff * random.uniform(0.8, 1.2))
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name=f"ingest-spool-{os.path.basename(self.directory)}", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        with self._condition:
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        with self._condition:
+            self._writer.close()
+
+    def drain(self, timeout: float) -> bool:
+        """
+        Wait until everything spooled has been sent.
+        """
+        deadline = time.time() + timeout
+        with self._condition:
+            while self.pending_records:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def metrics(self) -> Dict:
+        return {
+            "directory": self.directory,
+            "segments": len(self.segments),
+            "pending_batches": self.pending_records,
+            "pending_bytes": self.pending_bytes,
+            "sent_batches": self.sent_records,
+            "retries": self.retries,
+            "backoff": round(self.backoff, 2),
+            "last_error": self.last_error,
+            "last_sent_at": self.last_sent_at,
+        }
+
+
+def spool_name(conn: str) -> str:
+    return re.sub(r"[^A-Za-z0-9.-]", "_", conn)
+
+
+class SpoolPool:
+    """
+    One spool (and sender) per node, so a node that is down only holds back its
+    own batches. Spools left on disk by a previous run are picked up and drained
+    at start.
+    """
+
+    def __init__(self, send: Callable[[Dict, str], object], directory: str = INGEST_SPOOL_DIR, **options):
+        self.directory = directory
+        self.send = send
+        self.options = options
+        self._spools = {}
+        self._lock = threading.Lock()
+
+    def start(self):
+        if not os.path.isdir(self.directory):
+            return
+        for name in sorted(os.listdir(self.directory)):
+            if os.path.isdir(os.path.join(self.directory, name)):
+                spool = self._spool(name)
+                if spool.pending_records:
+                    spool.start()
+
+    def _spool(self, name: str) -> Spool:
+        with self._lock:
+            spool = self._spools.get(name)
+            if spool is None:
+                spool = self._spools[name] = Spool(os.path.join(self.directory, name), self.send, **self.options)
+        return spool
+
+    def append(self, conn: str, dbms: str, table: str, schema: Dict[str, str], payload: str, rows: int) -> int:
+        meta = {"conn": conn, "dbms": dbms, "table": table, "schema": schema, "rows": rows, "spooled_at": time.time()}
+        return self._spool(spool_name(conn)).append(meta, payload)
+
+    def stop(self):
+        with self._lock:
+            spools = list(self._spools.values())
+        for spool in spools:
+            spool.stop()
+
+    def metrics(self) -> List[Dict]:
+        with self._lock:
+            spools = list(self._spools.items())
+        return [{"node": name, **spool.metrics()} for name, spool in spools]
@@ -0,0 +1,109 @@
+import json
+import os
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+from schema_infer import schema_inferer
+
+# Rows / serialized bytes per data POST, and the longest NDJSON line accepted
+INGEST_STREAM_CHUNK_ROWS = int(os.getenv('INGEST_STREAM_CHUNK_ROWS', '1000'))
+INGEST_STREAM_CHUNK_BYTES = int(os.getenv('INGEST_STREAM_CHUNK_BYTES', str(1024 * 1024)))
+INGEST_MAX_LINE_BYTES = int(os.getenv('INGEST_MAX_LINE_BYTES', str(1024 * 1024)))
+
+
+class StreamFormatError(ValueError):
+    """
+    Raised for a malformed NDJSON line; line is 1-based.
+    """
+
+    def __init__(self, line: int, message: str):
+        super().__init__(f"Line {line}: {message}")
+        self.line = line
+
+
+def tag_record(record: Dict, dbms: str, table: str) -> str:
+    """
+    Serialize a row with its dbms/table without touching the caller's dict.
+    """
+    return json.dumps({**record, "dbms": dbms, "table": table})
+
+
+async def iter_ndjson(body: AsyncIterator[bytes], max_line_bytes: int = INGEST_MAX_LINE_BYTES) -> AsyncIterator[Dict]:
+    """
+    Decode NDJSON incrementally from a byte stream; blank lines are skipped.
+    Only the current partial line is kept between chunks.
+    """
+    pending = b""
+    line_no = 0
+    async for data in body:
+        if not data:
+            continue
+        pending += data
+        *lines, pending = pending.split(b"\n")
+        if len(pending) > max_line_bytes:
+            raise StreamFormatError(line_no + len(lines) + 1, f"line longer than {max_line_bytes} bytes")
+        for line in lines:
+            line_no += 1
+            record = decode_line(line, line_no)
+            if record is not None:
+                yield record
+    line_no += 1
+    record = decode_line(pending, line_no)
+    if record is not None:
+        yield record
+
+
+def decode_line(line: bytes, line_no: int) -> Optional[Dict]:
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        record = json.loads(line)
+    except ValueError as e:
+        raise StreamFormatError(line_no, str(e))
+    if not isinstance(record, dict):
+        raise StreamFormatError(line_no, "expected a JSON object")
+    return record
+
+
+class ChunkBuilder:
+    """
+    Accumulates tagged rows into a serialized JSON array payload and hands it
+    over once it reaches max_rows rows or max_bytes bytes. Only one chunk's
+    rows are held at a time; the chunk schema is inferred from its first rows.
+    """
+
+    def __init__(self, dbms: str, table: str, max_rows: int = INGEST_STREAM_CHUNK_ROWS,
+                 max_bytes: int = INGEST_STREAM_CHUNK_BYTES):
+        self.dbms = dbms
+        self.table = table
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.inferer = schema_inferer
+        self._reset()
+
+    def _reset(self):
+        self.parts = []
+        self.sample = []
+        self.size = 2
+
+    def add(self, record: Dict) -> Optional[Tuple[Dict[str, str], str, int]]:
+        """
+        Add a row; returns (schema, payload, rows) when the chunk is full.
+        """
+        if len(self.sample) < self.inferer.sample_size:
+            self.sample.append(record)
+        part = tag_record(record, self.dbms, self.table)
+        self.parts.append(part)
+        self.size += len(part) + 1
+        if len(self.parts) >= self.max_rows or self.size >= self.max_bytes:
+            return self.take()
+        return None
+
+    def take(self) -> Optional[Tuple[Dict[str, str], str, int]]:
+        if not self.parts:
+            return None
+        schema = self.inferer.infer(self.sample, self.dbms, self.table)
+        chunk = (schema, "[" + ",".join(self.parts) + "]", len(self.parts))
+        self._reset()
+        return chunk
+
@@ -1,5 +1,6 @@
 import os
 import sys
+import time
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 STATIC_DIR = os.path.join(BASE_DIR, 'static')
@@ -15,11 +16,19 @@ from parsers import parse_response
 from classes import *
 from sql_router import sql_router
 from file_auth_router import file_auth_router
+from results_router import results_router
+from dashboard_router import dashboard_router
+from monitor_router import monitor_router
+from ingest_router import ingest_router
+from blobs_router import blobs_router, blob_prefetcher, static_index
+from static_index import STATIC_INDEX_MAX_PAGE
 
 # from helpers import make_request, grab_network_nodes, monitor_network, make_policy, send_json_data
 import os
 from helpers import make_request, grab_network_nodes, monitor_network, make_policy, send_json_data, make_preset_policy
 import helpers
+from timings import Timings, timed_json_response
+from ingest_dedup import ingest_dedup
 
 
 app = FastAPI()
@@ -39,20 +48,24 @@ app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
 # Include routers
 app.include_router(sql_router)
 app.include_router(file_auth_router)
+app.include_router(results_router)
+app.include_router(dashboard_router)
+app.include_router(monitor_router)
+app.include_router(ingest_router)
+app.include_router(blobs_router)
 # 23.239.12.151:32349
 # run client () sql edgex extend=(+node_name, @ip, @port, @dbms_name, @table_name) and format = json and timezone=Europe/Dublin  select  timestamp, file, class, bbox, status  from factory_imgs where timestamp >= now() - 1 hour and timestamp <= NOW() order by timestamp desc --> selection (columns: ip using ip and port using port and dbms using dbms_name and table using table_name and file using file) -->  description (columns: bbox as shape.rect)
 
 
 @app.get("/")
-def list_static_files():
+def list_static_files(offset: int = 0, limit: int = STATIC_INDEX_MAX_PAGE, prefix: str = "", refresh: bool = False):
+    # Served from the static index; refresh=true rescans the directory first
     try:
-        files = []
-        for root, dirs, filenames in os.walk(STATIC_DIR):
-            for filename in filenames:
-                rel_dir = os.path.relpath(root, STATIC_DIR)
-                rel_file = os.path.join(rel_dir, filename) if rel_dir != '.' else filename
-                files.append(rel_file)
-        return {"files": files}
+        if refresh:
+            static_index.rebuild()
+        limit = min(limit, STATIC_INDEX_MAX_PAGE)
+        files, total = static_index.page(offset, limit, prefix)
+        return {"files": files, "total": total, "offset": offset, "limit": limit}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -71,24 +84,35 @@ def get_status():
 # NODE API ENDPOINTS
 
 @app.post("/send-command/")
-def send_command(conn: Connection, command: Command):
-    raw_response = make_request(conn.conn, command.type, command.cmd)
-    print("raw_response", raw_response)
-
-    structured_data = parse_response(raw_response)
-    print("structured_data", structured_data)
-    return structured_data
+def send_command(conn: Connection, command: Command, timings: bool = False, mirror: bool = True):
+    # Stage timings (mirror, upstream, parse, serialise) are returned as a Server-Timing header,
+    # and as a "timings" block in the body when ?timings=true
+    request_timings = Timings()
+    with request_timings.activate():
+        # Common "blockchain get" queries are answered from the local ledger mirror ("mirror" block says how fresh)
+        structured_data = helpers.blockchain_mirror.answer(conn.conn, command.cmd, local=mirror)
+        if structured_data is None:
+            raw_response = make_request(conn.conn, command.type, command.cmd)
+            print("raw_response", raw_response)
+
+            structured_data = parse_response(raw_response)
+            print("structured_data", structured_data)
+    if structured_data.get("type") == "blobs":
+        # The viewer usually asks for these files next
+        blob_prefetcher.submit(conn.conn, structured_data["data"])
+    return timed_json_response(structured_data, request_timings, include_timings=timings)
+
+
+@app.get("/blockchain-mirror/")
+def blockchain_mirror_stats():
+    # Per node: policies mirrored, last sync, age, hits/misses and sync errors
+    return {"data": helpers.blockchain_mirror.stats()}
 
 
 @app.post("/get-network-nodes/")
-def get_connected_nodes(conn: Connection):
-    connected_nodes = grab_network_nodes(conn.conn)
-    return {"data": connected_nodes}
-
-@app.post("/monitor/")
-def monitor(conn: Connection):
-    monitored_nodes = monitor_network(conn.conn)
-    return {"data": monitored_nodes}
+def get_connected_nodes(conn: Connection, refresh: bool = False):
+    discovered = helpers.discover_network_nodes(conn.conn, refresh=refresh)
+    return {"data": discovered["reachable"], "nodes": discovered["nodes"], "probed_at": discovered["probed_at"]}
 
 @app.post("/submit-policy/")
 def submit_policy(conn: Connection, policy: Policy):
@@ -99,17 +123,45 @@ def submit_policy(conn: Connection, policy: Policy):
     structured_data = parse_response(raw_response)
     return structured_data
 
+@app.post("/submit-policies/")
+def submit_policies(conn: Connection, policies: list[Policy]):
+    # Publish many policies in one pass; "data" has status, error and stored id per policy (request order)
+    started = time.perf_counter()
+    results = helpers.make_policies(conn.conn, policies)
+    return {
+        "type": "json",
+        "data": results,
+        "failed": sum(result["status"] == "error" for result in results),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+
 
 @app.post("/add-data/")
-def send_data(conn: Connection, dbconn: DBConnection, data: list[Dict]):
+def send_data(conn: Connection, dbconn: DBConnection, data: list[Dict], verify: bool = False, dedup: bool = True,
+              dedup_rows: bool = False):
     print("conn", conn.conn)
     print("db", dbconn.dbms)
     print("table", dbconn.table)
     print("data", type(data))
 
-    raw_response = send_json_data(conn=conn.conn, dbms=dbconn.dbms, table=dbconn.table, data=data)
+    # Drop the retry of a batch that was (or is being) delivered; dedup_rows=true also drops single rows seen before
+    rows, token = ingest_dedup.filter(dbconn.dbms, dbconn.table, data, by_row=dedup_rows) if dedup else (data, ())
+    suppressed = len(data) - len(rows)
+    if data and not rows:
+        return {"type": "string", "data": f"All {suppressed} rows were already ingested", "suppressed": suppressed}
+
+    try:
+        raw_response = send_json_data(conn=conn.conn, dbms=dbconn.dbms, table=dbconn.table, data=rows, verify=verify)
+    except Exception:
+        ingest_dedup.abort(token)
+        raise
+    if raw_response is None:
+        ingest_dedup.abort(token)
+        raise HTTPException(status_code=502, detail=f"No response from {conn.conn}")
+    ingest_dedup.commit(token)
 
     structured_data = parse_response(raw_response)
+    structured_data["suppressed"] = suppressed
     return structured_data
 
 
@@ -142,36 +194,7 @@ def get_preset_policy():
 
 
 
-@app.post("/view-blobs/")
-def view_blobs(conn: Connection, blobs: dict):
-    print("conn", conn.conn)
-    # print("blobs", blobs['blobs'])
-
-    file_list = []
-    for blob in blobs['blobs']:
-        print("blob", blob)
-        # Here you would implement the logic to view the blob
-
-        ip_port = f"{blob['ip']}:{blob['port']}"
-        operator_dbms = blob['dbms_name']
-        operator_table = blob['table_name']
-        operator_file = blob['file']
-        file_list.append(operator_file)
-
-        # blobs_dir = "/app/Remote-CLI/djangoProject/static/blobs/current/"
-        blobs_dir = "/app/CLI/Local-CLI/local-cli-backend/static/"
-        print("IP:Port", ip_port)
-
-        # cmd = f'run client ({ip_port}) file get !!blockchain_file !blockchain_file'
-        # cmd = f'run client ({ip_port}) file get !!blobs_dir/{operator_file} !blobs_dir/{operator_file}'
-
-        cmd = f"run client ({ip_port}) file get (dbms = blobs_{operator_dbms} and table = {operator_table} and id = {operator_file}) {blobs_dir}{operator_dbms}.{operator_table}.{operator_file}"  # Add file full path and name for the destination on THIS MACHINE
-        raw_response = make_request(conn.conn, "POST", cmd)
-
-        print("raw_response", raw_response)
-
-
-    return {"data": file_list}
+# Blob retrieval endpoints are now handled by blobs_router
 
 
 
@@ -0,0 +1,232 @@
+import math
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from ring_buffer import RingBuffer
+
+# Poll interval (seconds), samples kept per node/metric, and how long (seconds) a poller
+# keeps running without anyone reading it (0 = poll until unregistered)
+MONITOR_POLL_INTERVAL = float(os.getenv('MONITOR_POLL_INTERVAL', '10'))
+MONITOR_HISTORY_SIZE = int(os.getenv('MONITOR_HISTORY_SIZE', '360'))
+MONITOR_IDLE_TIMEOUT = float(os.getenv('MONITOR_IDLE_TIMEOUT', '3600'))
+
+# Monitored-operator fields that are numeric and kept as time series
+NUMERIC_METRICS = [
+    "new rows",
+    "total rows",
+    "Free Space Percent",
+    "CPU Percent",
+    "Packets Recv",
+    "Packets Sent",
+    "Network Error",
+]
+
+
+def to_number(value) -> float:
+    """
+    Parse a monitored-operator value ("1,234", "12.5", "45%") into a float, NaN if not numeric.
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    try:
+        return float(str(value).replace(',', '').rstrip('%').strip())
+    except ValueError:
+        return math.nan
+
+
+def operator_id(row: Dict) -> str:
+    return row.get("node name") or row.get("Node") or "unknown"
+
+
+class MonitorPoller:
+    """
+    Samples the monitored operators seen by one node on a schedule, keeping the latest
+    sample and a ring buffer per (operator, metric).
+    """
+
+    def __init__(self, conn: str, fetch: Callable[[str], List[Dict]],
+                 interval: float = MONITOR_POLL_INTERVAL, capacity: int = MONITOR_HISTORY_SIZE,
+                 idle_timeout: float = MONITOR_IDLE_TIMEOUT):
+        self.conn = conn
+        self.fetch = fetch
+        self.interval = interval
+        self.capacity = capacity
+        self.idle_timeout = idle_timeout
+
+        self.latest = None
+        self.latest_at = None
+        self.last_error = None
+        self.last_read = time.time()
+        self.last_attempt = 0.0
+        self.buffers = {}
+        self.listeners = []
+
+        self._lock = threading.Lock()
+        self._poll_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name=f"monitor-{self.conn}", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def add_listener(self, listener: Callable[["MonitorPoller", List[Dict], float], None]):
+        """
+        Call listener(poller, rows, sampled_at) from the poller thread after every successful sample.
+        """
+        self.listeners.append(listener)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        while not self._stop.is_set():
+            if time.time() - self.last_attempt >= self.interval:
+                self.poll_once()
+            if self.idle_timeout and time.time() - self.last_read > self.idle_timeout:
+                print(f"Monitor poller for {self.conn} idle, stopping")
+                break
+            self._stop.wait(max(self.interval - (time.time() - self.last_attempt), 0.0))
+
+    def touch(self):
+        """
+        Mark the poller as read and restart it if it stopped while idle.
+        """
+        self.last_read = time.time()
+        self.start()
+
+    def poll_once(self) -> Optional[List[Dict]]:
+        """
+        Take one sample. Only one poll runs at a time; a caller arriving while one is
+        running waits for it and gets its result instead of asking the node again.
+        """
+        if not self._poll_lock.acquire(blocking=False):
+            with self._poll_lock:
+                return self.latest if self.last_error is None else None
+        try:
+            return self._poll()
+        finally:
+            self._poll_lock.release()
+
+    def _poll(self) -> Optional[List[Dict]]:
+        self.last_attempt = time.time()
+        try:
+            rows = self.fetch(self.conn)
+        except Exception as e:
+            print(f"Error polling monitored operators on {self.conn}: {e}")
+            self.last_error = str(e)
+            return None
+
+        sampled_at = time.time()
+        with self._lock:
+            for row in rows:
+                node = operator_id(row)
+                node_buffers = self.buffers.setdefault(node, {})
+                for metric in NUMERIC_METRICS:
+                    if metric not in row:
+                        continue
+                    buffer = node_buffers.get(metric)
+                    if buffer is None:
+                        buffer = node_buffers[metric] = RingBuffer(self.capacity)
+                    buffer.append(sampled_at, to_number(row[metric]))
+            self.latest = rows
+            self.latest_at = sampled_at
+            self.last_error = None
+
+        for listener in self.listeners:
+            try:
+                listener(self, rows, sampled_at)
+            except Exception as e:
+                print(f"Error in monitor listener for {self.conn}: {e}")
+        return rows
+
+    def current(self) -> Dict:
+        """
+        Latest sample, polling synchronously only before the first poll has finished.
+        After that the background thread does the polling: a node that is down gets
+        the last sample and last_error back rather than a blocking poll per reader.
+        """
+        if self.latest_at is None and self.last_error is None:
+            self.poll_once()
+        self.touch()
+        return {"data": self.latest or [], "sampled_at": self.latest_at, "error": self.last_error}
+
+    def history(self, node: Optional[str] = None, metric: Optional[str] = None,
+                since: Optional[float] = None, limit: Optional[int] = None) -> Dict:
+        self.touch()
+        series = {}
+        with self._lock:
+            for node_name, node_buffers in self.buffers.items():
+                if node is not None and node_name != node:
+                    continue
+                for metric_name, buffer in node_buffers.items():
+                    if metric is not None and metric_name != metric:
+                        continue
+                    timestamps, values = buffer.snapshot(since=since, limit=limit)
+                    series.setdefault(node_name, {})[metric_name] = {
+                        "timestamps": timestamps,
+                        # NaN is not valid JSON
+                        "values": [None if math.isnan(v) else v for v in values],
+                    }
+        return series
+
+
+class MonitorRegistry:
+    """
+    One poller per node connection, created on first use.
+    """
+
+    def __init__(self, fetch: Callable[[str], List[Dict]], **poller_options):
+        self.fetch = fetch
+        self.poller_options = poller_options
+        self.listeners = []
+        self._pollers = {}
+        self._lock = threading.Lock()
+
+    def add_listener(self, listener: Callable[[MonitorPoller, List[Dict], float], None]):
+        """
+        Attach a sample listener to every current and future poller.
+        """
+        with self._lock:
+            self.listeners.append(listener)
+            for poller in self._pollers.values():
+                poller.add_listener(listener)
+
+    def get(self, conn: str) -> MonitorPoller:
+        with self._lock:
+            poller = self._pollers.get(conn)
+            if poller is None:
+                poller = self._pollers[conn] = MonitorPoller(conn, self.fetch, **self.poller_options)
+                for listener in self.listeners:
+                    poller.add_listener(listener)
+        return poller
+
+    def unregister(self, conn: str) -> bool:
+        with self._lock:
+            poller = self._pollers.pop(conn, None)
+        if poller is None:
+            return False
+        poller.stop()
+        return True
+
+    def nodes(self) -> List[Dict]:
+        with self._lock:
+            pollers = list(self._pollers.values())
+        return [
+            {"conn": p.conn, "running": p.running, "sampled_at": p.latest_at, "error": p.last_error}
+            for p in pollers
+        ]
+
+    def stop_all(self):
+        with self._lock:
+            pollers = list(self._pollers.values())
+        for poller in pollers:
+            poller.stop()
@@ -0,0 +1,127 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from monitor import MonitorPoller, MonitorRegistry, operator_id
+
+# Messages buffered per subscriber before it is considered too slow and resynced with a snapshot
+MONITOR_SUBSCRIBER_QUEUE = int(os.getenv('MONITOR_SUBSCRIBER_QUEUE', '16'))
+
+
+class Subscription:
+    """
+    One connected viewer. (event type, JSON message) pairs are delivered on the viewer's event loop.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, maxsize: int = MONITOR_SUBSCRIBER_QUEUE):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+
+class MonitorBroadcaster:
+    """
+    Fans one poller's samples out to all subscribers of a node.
+    The delta against the previous sample is computed and serialised once per poll,
+    so the cost of a sample does not depend on the number of viewers.
+    """
+
+    def __init__(self, poller: MonitorPoller):
+        self.poller = poller
+        self._subscriptions = set()
+        self._previous = {operator_id(row): row for row in poller.latest or []}
+        self._lock = threading.Lock()
+        poller.add_listener(self._on_sample)
+
+    def snapshot_message(self) -> str:
+        return json.dumps({
+            "type": "snapshot",
+            "conn": self.poller.conn,
+            "sampled_at": self.poller.latest_at,
+            "data": self.poller.latest or [],
+        })
+
+    def subscribe(self, loop: asyncio.AbstractEventLoop) -> Subscription:
+        subscription = Subscription(loop)
+        # Snapshot and registration happen under the sample lock so no delta can fall in between
+        with self._lock:
+            subscription.queue.put_nowait(("snapshot", self.snapshot_message()))
+            self._subscriptions.add(subscription)
+        self.poller.touch()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscriptions)
+
+    def _on_sample(self, poller: MonitorPoller, rows: List[Dict], sampled_at: float):
+        current = {operator_id(row): row for row in rows}
+        with self._lock:
+            changed = {}
+            for node, row in current.items():
+                previous_row = self._previous.get(node, {})
+                fields = {key: value for key, value in row.items() if previous_row.get(key) != value}
+                if fields:
+                    changed[node] = fields
+            removed = [node for node in self._previous if node not in current]
+            self._previous = current
+            subscriptions = list(self._subscriptions)
+        if not subscriptions:
+            return
+
+        # Keep the poller alive while someone is watching
+        poller.last_read = time.time()
+        if not changed and not removed:
+            return
+
+        message = json.dumps({
+            "type": "delta",
+            "conn": poller.conn,
+            "sampled_at": sampled_at,
+            "changed": changed,
+            "removed": removed,
+        })
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(self._deliver, subscription, message)
+            except RuntimeError:
+                # Event loop closed, the viewer is gone
+                self.unsubscribe(subscription)
+
+    def _deliver(self, subscription: Subscription, message: str):
+        if subscription.queue.full():
+            # Slow viewer: drop what it has not read and send a full snapshot instead of the backlog
+            while not subscription.queue.empty():
+                subscription.queue.get_nowait()
+            subscription.queue.put_nowait(("snapshot", self.snapshot_message()))
+            return
+        subscription.queue.put_nowait(("delta", message))
+
+
+class MonitorHub:
+    """
+    One broadcaster per monitored node, attached to the registry's poller.
+    """
+
+    def __init__(self, registry: MonitorRegistry):
+        self.registry = registry
+        self._broadcasters = {}
+        self._lock = threading.Lock()
+
+    def get(self, conn: str) -> MonitorBroadcaster:
+        poller = self.registry.get(conn)
+        with self._lock:
+            broadcaster = self._broadcasters.get(conn)
+            if broadcaster is None or broadcaster.poller is not poller:
+                broadcaster = self._broadcasters[conn] = MonitorBroadcaster(poller)
+        return broadcaster
+
+    def subscribers(self, conn: str) -> Optional[int]:
+        broadcaster = self._broadcasters.get(conn)
+        return broadcaster.subscriber_count if broadcaster else None
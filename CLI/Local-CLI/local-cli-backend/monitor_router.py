@@ -0,0 +1,196 @@
+import asyncio
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from classes import AlertRule, Connection, MonitorHistoryRequest, MonitorRangeRequest
+from helpers import monitor_network
+from monitor import MonitorRegistry
+from monitor_push import MonitorHub
+from fleet_stats import fleet_summary
+from alerts import AlertEngine
+from monitor_store import MONITOR_DB_PATH, MonitorStore
+
+# Create router for node monitoring
+monitor_router = APIRouter(prefix="/monitor", tags=["Monitor"])
+
+# Background pollers sampling "get monitored operators" once per node,
+# shared by every client watching that node
+monitor_registry = MonitorRegistry(fetch=monitor_network)
+
+# Alert rules evaluated on every sample taken by the pollers
+alert_engine = AlertEngine()
+monitor_registry.add_listener(alert_engine.on_sample)
+
+# Long-term history on disk, rolled up into 1-minute and 1-hour tiers
+monitor_store = MonitorStore(MONITOR_DB_PATH) if MONITOR_DB_PATH else None
+if monitor_store is not None:
+    monitor_registry.add_listener(monitor_store.on_sample)
+
+# Push channels (SSE / WebSocket) fanned out from the same pollers
+monitor_hub = MonitorHub(monitor_registry)
+
+# Seconds between SSE keep-alive comments when nothing changed
+KEEPALIVE_INTERVAL = 15
+
+# Last fleet summary per node, reused until the poller takes a new sample
+summary_cache = {}
+
+
+@monitor_router.post("/")
+def monitor(conn: Connection):
+    """
+    Latest monitored-operator sample for the node (registers a poller on first use).
+    """
+    return monitor_registry.get(conn.conn).current()
+
+
+@monitor_router.post("/history")
+def monitor_history(request: MonitorHistoryRequest):
+    """
+    Time series of numeric monitored-operator fields kept by the node's poller.
+    """
+    poller = monitor_registry.get(request.conn)
+    if poller.latest_at is None:
+        poller.current()
+    series = poller.history(node=request.node, metric=request.metric, since=request.since, limit=request.limit)
+    return {"data": series, "interval": poller.interval, "capacity": poller.capacity}
+
+
+@monitor_router.post("/range")
+def monitor_range(request: MonitorRangeRequest):
+    """
+    Long-range history of one metric from the on-disk store. The coarsest tier
+    (raw, 1m, 1h) meeting the requested resolution is used.
+    """
+    if monitor_store is None:
+        raise HTTPException(status_code=404, detail="Monitor history store is disabled")
+    result = monitor_store.query(
+        request.conn, request.metric, request.start, end=request.end, node=request.node,
+        resolution=request.resolution, max_points=request.max_points,
+    )
+    return {"data": result}
+
+
+@monitor_router.post("/summary")
+def monitor_summary(conn: Connection, top_k: int = 5):
+    """
+    Fleet statistics over the latest monitored-operator sample: percentiles, totals
+    and top/bottom operators per numeric field. Computed once per sample.
+    """
+    poller = monitor_registry.get(conn.conn)
+    current = poller.current()
+
+    cache_key = (current["sampled_at"], top_k)
+    cached = summary_cache.get(conn.conn)
+    if cached is not None and cached[0] == cache_key:
+        summary = cached[1]
+    else:
+        summary = fleet_summary(current["data"], top_k=top_k)
+        summary_cache[conn.conn] = (cache_key, summary)
+    return {"data": summary, "sampled_at": current["sampled_at"]}
+
+
+@monitor_router.get("/alerts")
+def active_alerts(conn: Optional[str] = None):
+    """
+    Currently active alerts, optionally for one monitored node. Served from the
+    alert engine state; nodes are not re-polled.
+    """
+    return {"data": alert_engine.active(conn)}
+
+
+@monitor_router.get("/alerts/events")
+def alert_events(limit: int = 100):
+    """
+    Most recent raised/cleared alert events.
+    """
+    return {"data": alert_engine.recent_events(limit)}
+
+
+@monitor_router.get("/alerts/rules")
+def list_alert_rules():
+    return {"data": alert_engine.list_rules()}
+
+
+@monitor_router.post("/alerts/rules")
+def add_alert_rule(rule: AlertRule):
+    """
+    Add (or replace, when the id exists) an alert rule.
+    """
+    try:
+        return {"data": alert_engine.add_rule(rule.model_dump(exclude_none=True))}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@monitor_router.delete("/alerts/rules/{rule_id}")
+def delete_alert_rule(rule_id: str):
+    if not alert_engine.remove_rule(rule_id):
+        raise HTTPException(status_code=404, detail="Alert rule not found")
+    return {"data": {"message": "Alert rule deleted"}}
+
+
+@monitor_router.get("/nodes")
+def monitored_nodes():
+    """
+    Nodes that currently have a background poller, with their push subscriber counts.
+    """
+    nodes = monitor_registry.nodes()
+    for node in nodes:
+        node["subscribers"] = monitor_hub.subscribers(node["conn"]) or 0
+    return {"data": nodes}
+
+
+@monitor_router.post("/unregister")
+def unregister_node(conn: Connection):
+    """
+    Stop polling a node and drop its history.
+    """
+    if not monitor_registry.unregister(conn.conn):
+        raise HTTPException(status_code=404, detail="Node is not monitored")
+    return {"data": {"message": f"Stopped monitoring {conn.conn}"}}
+
+
+@monitor_router.get("/stream")
+async def monitor_stream(conn: str, request: Request):
+    """
+    Server-Sent Events for a node: a "snapshot" event with the full sample,
+    then "delta" events with only the fields that changed since the previous poll.
+    """
+    broadcaster = monitor_hub.get(conn)
+    await run_in_threadpool(broadcaster.poller.current)
+    subscription = broadcaster.subscribe(asyncio.get_running_loop())
+
+    async def events():
+        try:
+            while not await request.is_disconnected():
+                try:
+                    event_type, message = await asyncio.wait_for(subscription.queue.get(), timeout=KEEPALIVE_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {event_type}\ndata: {message}\n\n"
+        finally:
+            broadcaster.unsubscribe(subscription)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@monitor_router.websocket("/ws")
+async def monitor_websocket(websocket: WebSocket, conn: str):
+    """
+    WebSocket variant of /monitor/stream, sending the same snapshot/delta JSON messages.
+    """
+    await websocket.accept()
+    broadcaster = monitor_hub.get(conn)
+    await run_in_threadpool(broadcaster.poller.current)
+    subscription = broadcaster.subscribe(asyncio.get_running_loop())
+    try:
+        while True:
+            _, message = await subscription.queue.get()
+            await websocket.send_text(message)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        broadcaster.unsubscribe(subscription)
@@ -0,0 +1,192 @@
+import math
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+from monitor import NUMERIC_METRICS, operator_id, to_number
+
+# SQLite file for monitor history (empty disables the on-disk store)
+MONITOR_DB_PATH = os.getenv('MONITOR_DB_PATH', 'usr-mgm/monitor.db')
+
+# Retention (seconds) per tier
+MONITOR_RAW_RETENTION = int(os.getenv('MONITOR_RAW_RETENTION', str(24 * 3600)))
+MONITOR_1M_RETENTION = int(os.getenv('MONITOR_1M_RETENTION', str(7 * 24 * 3600)))
+MONITOR_1H_RETENTION = int(os.getenv('MONITOR_1H_RETENTION', str(90 * 24 * 3600)))
+
+# Seconds between retention sweeps
+PRUNE_INTERVAL = 300
+
+# (name, table, step in seconds); raw samples have no fixed step
+TIERS = [
+    ("raw", "samples_raw", 0),
+    ("1m", "rollup_1m", 60),
+    ("1h", "rollup_1h", 3600),
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS samples_raw (
+    conn TEXT NOT NULL,
+    node TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    ts REAL NOT NULL,
+    value REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS samples_raw_lookup ON samples_raw (conn, metric, node, ts);
+CREATE INDEX IF NOT EXISTS samples_raw_ts ON samples_raw (ts);
+"""
+
+ROLLUP_SCHEMA = """
+CREATE TABLE IF NOT EXISTS {table} (
+    conn TEXT NOT NULL,
+    node TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    sum REAL NOT NULL,
+    min REAL NOT NULL,
+    max REAL NOT NULL,
+    PRIMARY KEY (conn, metric, node, bucket)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS {table}_bucket ON {table} (bucket);
+"""
+
+ROLLUP_UPSERT = """
+INSERT INTO {table} (conn, node, metric, bucket, count, sum, min, max)
+VALUES (?, ?, ?, ?, 1, ?, ?, ?)
+ON CONFLICT (conn, metric, node, bucket) DO UPDATE SET
+    count = count + 1,
+    sum = sum + excluded.sum,
+    min = MIN(min, excluded.min),
+    max = MAX(max, excluded.max)
+"""
+
+
+class MonitorStore:
+    """
+    On-disk monitor history. Every sample is written raw and rolled up into
+    1-minute and 1-hour buckets in the same transaction; each tier has its own
+    retention. Range queries read the coarsest tier that still meets the requested
+    resolution, so long ranges stay at a few hundred rows per series.
+    """
+
+    def __init__(self, path: str = MONITOR_DB_PATH, retention: Optional[Dict[str, int]] = None):
+        self.path = path
+        self.retention = retention or {
+            "raw": MONITOR_RAW_RETENTION,
+            "1m": MONITOR_1M_RETENTION,
+            "1h": MONITOR_1H_RETENTION,
+        }
+        self.last_prune = 0.0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        for _, table, step in TIERS:
+            if step:
+                self._db.executescript(ROLLUP_SCHEMA.format(table=table))
+        self._db.commit()
+
+    def on_sample(self, poller, rows: List[Dict], sampled_at: float):
+        """
+        Monitor poller listener.
+        """
+        self.record(poller.conn, rows, sampled_at)
+
+    def record(self, conn: str, rows: List[Dict], sampled_at: float):
+        points = []
+        for row in rows:
+            node = operator_id(row)
+            for metric in NUMERIC_METRICS:
+                if metric in row:
+                    value = to_number(row[metric])
+                    if not math.isnan(value):
+                        points.append((conn, node, metric, value))
+        if not points:
+            return
+
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT INTO samples_raw (conn, node, metric, ts, value) VALUES (?, ?, ?, ?, ?)",
+                [(c, n, m, sampled_at, v) for c, n, m, v in points],
+            )
+            for _, table, step in TIERS:
+                if not step:
+                    continue
+                bucket = int(sampled_at // step * step)
+                self._db.executemany(
+                    ROLLUP_UPSERT.format(table=table),
+                    [(c, n, m, bucket, v, v, v) for c, n, m, v in points],
+                )
+
+        if sampled_at - self.last_prune > PRUNE_INTERVAL:
+            self.prune(sampled_at)
+
+    def prune(self, now: Optional[float] = None):
+        now = now or time.time()
+        with self._lock, self._db:
+            for name, table, step in TIERS:
+                cutoff = now - self.retention[name]
+                column = "bucket" if step else "ts"
+                self._db.execute(f"DELETE FROM {table} WHERE {column} < ?", (cutoff,))
+        self.last_prune = now
+
+    def pick_tier(self, start: float, end: float, resolution: Optional[float], max_points: int, now: Optional[float] = None):
+        """
+        Coarsest tier whose step does not exceed the requested resolution and whose
+        retention still covers the start of the range.
+        """
+        now = now or time.time()
+        if resolution is None:
+            resolution = (end - start) / max(max_points, 1)
+
+        candidates = [tier for tier in TIERS if tier[2] <= resolution] or [TIERS[0]]
+        chosen = candidates[-1]
+        # Fall back to a coarser tier when the chosen one has already dropped the start of the range
+        for tier in TIERS[TIERS.index(chosen):]:
+            chosen = tier
+            if now - self.retention[tier[0]] <= start:
+                break
+        return chosen
+
+    def query(self, conn: str, metric: str, start: float, end: Optional[float] = None,
+              node: Optional[str] = None, resolution: Optional[float] = None, max_points: int = 500) -> Dict:
+        end = end or time.time()
+        name, table, step = self.pick_tier(start, end, resolution, max_points)
+
+        if step:
+            sql = (f"SELECT node, bucket, sum / count, min, max FROM {table} "
+                   "WHERE conn = ? AND metric = ? AND bucket >= ? AND bucket <= ?")
+            params = [conn, metric, int(start // step * step), end]
+        else:
+            sql = ("SELECT node, ts, value, value, value FROM samples_raw "
+                   "WHERE conn = ? AND metric = ? AND ts >= ? AND ts <= ?")
+            params = [conn, metric, start, end]
+        if node is not None:
+            sql += " AND node = ?"
+            params.append(node)
+        sql += " ORDER BY node, 2"
+
+        series = {}
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        for node_name, ts, avg, low, high in rows:
+            entry = series.get(node_name)
+            if entry is None:
+                entry = series[node_name] = {"timestamps": [], "values": [], "min": [], "max": []}
+            entry["timestamps"].append(ts)
+            entry["values"].append(avg)
+            entry["min"].append(low)
+            entry["max"].append(high)
+
+        return {"tier": name, "step": step, "rows": len(rows), "series": series}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,100 @@
+import hashlib
+import json
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+
+def schema_fingerprint(dbms: str, table: str, schema: Dict[str, str]) -> str:
+    """
+    Stable short hash of a table's column names and types.
+    """
+    canonical = json.dumps([dbms, table, sorted(schema.items())], separators=(',', ':'))
+    return hashlib.sha1(canonical.encode()).hexdigest()[:12]
+
+
+def parse_client_id(raw) -> Optional[int]:
+    """
+    Client id from a "get msg client where topic = ..." reply, None when there is no subscription.
+    """
+    if not isinstance(raw, str) or "No message client subscriptions" in raw:
+        return None
+    for line in raw.strip().splitlines():
+        label, _, value = line.partition(":")
+        value = value.strip()
+        if "id" in label.lower() and value.isdigit():
+            return int(value)
+    return None
+
+
+class MsgClientRegistry:
+    """
+    Live REST message clients keyed by (node, dbms, table).
+    Each client subscribes to its own topic derived from the schema fingerprint,
+    so a batch whose schema matches the registered one goes straight to a single
+    data POST; a new client is only created (and the old one exited) when the
+    schema changes.
+    """
+
+    def __init__(self, request: Callable, build_command: Callable[[Dict[str, str], str], str]):
+        self.request = request
+        self.build_command = build_command
+        self._clients = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def _key_lock(self, key) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def lookup(self, conn: str, dbms: str, table: str) -> Optional[Dict]:
+        return self._clients.get((conn, dbms, table))
+
+    def ensure_client(self, conn: str, dbms: str, table: str, schema: Dict[str, str]) -> str:
+        """
+        Topic of a message client accepting this schema for (conn, dbms, table).
+        """
+        key = (conn, dbms, table)
+        fingerprint = schema_fingerprint(dbms, table, schema)
+        entry = self._clients.get(key)
+        if entry is not None and entry["fingerprint"] == fingerprint:
+            return entry["topic"]
+
+        with self._key_lock(key):
+            entry = self._clients.get(key)
+            if entry is not None and entry["fingerprint"] == fingerprint:
+                return entry["topic"]
+
+            topic = f"new-data-{fingerprint}"
+            # A client for this exact schema may survive from before a restart
+            client_id = parse_client_id(self.request(conn, "GET", f"get msg client where topic = {topic}"))
+            if client_id is None:
+                resp = self.request(conn, "POST", self.build_command(schema, topic))
+                print("New Client:", resp)
+                client_id = parse_client_id(self.request(conn, "GET", f"get msg client where topic = {topic}"))
+
+            if entry is not None and entry["client_id"] is not None:
+                # Schema changed, retire the previous client
+                self.request(conn, "POST", f"exit msg client {entry['client_id']}")
+
+            self._clients[key] = {
+                "topic": topic,
+                "client_id": client_id,
+                "fingerprint": fingerprint,
+                "schema": dict(schema),
+                "created_at": time.time(),
+            }
+            return topic
+
+    def invalidate(self, conn: str, dbms: str, table: str):
+        """
+        Forget a client (e.g. after a failed POST) so the next batch re-checks the node.
+        """
+        with self._lock:
+            self._clients.pop((conn, dbms, table), None)
+
+    def clients(self) -> list:
+        return [
+            {"conn": conn, "dbms": dbms, "table": table, **entry}
+            for (conn, dbms, table), entry in list(self._clients.items())
+        ]
@@ -1,7 +1,9 @@
 # parsers.py
 import re
 import json
+from timings import timed
 
+@timed("parse_table_fixed")
 def parse_table_fixed(text: str) -> list:
     lines = text.strip().splitlines()
 
@@ -78,6 +80,7 @@ def parse_table_fixed(text: str) -> list:
 
 
 
+@timed("parse_table")
 def parse_table(text: str) -> list:
     """
     Parse a table-formatted text into a list of dictionaries.
@@ -146,6 +149,7 @@ def parse_table(text: str) -> list:
 
 
 
+@timed("parse_json")
 def parse_json(text: str) -> dict:
     """
     Parse JSON text into a dictionary.
@@ -155,6 +159,7 @@ def parse_json(text: str) -> dict:
     except json.JSONDecodeError:
         return {}
 
+@timed("parse")
 def parse_response(raw: str) -> dict:
     """
     Unified response parser.
@@ -0,0 +1,197 @@
+import json
+import os
+import queue
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+# How long (seconds) a node's master address is reused, and policies published at once in a bulk submit
+POLICY_MASTER_TTL = float(os.getenv('POLICY_MASTER_TTL', '300'))
+POLICY_SUBMIT_WORKERS = int(os.getenv('POLICY_SUBMIT_WORKERS', '4'))
+
+IP_PORT = re.compile(r"\b\d{1,3}(?:\.\d{1,3}){3}:\d{1,5}\b")
+
+# Plain-text reply of a command the node rejected ("Error ...", "Failed to ...")
+NODE_ERROR = re.compile(r"(error|failed)\b", re.IGNORECASE)
+
+
+def parse_master(raw) -> Optional[str]:
+    """
+    ip:port from a "blockchain get master bring.ip_port" reply, None when there is no master.
+    """
+    if raw is None:
+        return None
+    match = IP_PORT.search(raw if isinstance(raw, str) else str(raw))
+    return match.group(0) if match else None
+
+
+def create_policy_command(variable: str, name: str, data: Dict[str, str]) -> str:
+    key_value_pairs = [f"{k} = {v}" for k, v in data.items()]
+    return f'{variable} = create policy {name} where ' + " and ".join(key_value_pairs)
+
+
+def policy_lookup_command(name: str, data: Dict[str, str]) -> str:
+    """
+    "blockchain get" matching a policy by its type and submitted attributes.
+    """
+    if not data:
+        return f"blockchain get {name}"
+    return f"blockchain get {name} where " + " and ".join(f"{k} = {v}" for k, v in data.items())
+
+
+def error_field(reply: Dict) -> Optional[str]:
+    for key, value in reply.items():
+        if "error" in str(key).lower() and value:
+            return str(value)
+    return None
+
+
+def failed(raw) -> Optional[str]:
+    """
+    Error text of a node reply, None when the command went through. A JSON reply
+    is data (policies may well contain "error" or "failed") unless it is an object
+    with an error field; a text reply is an error only when it starts with one.
+    """
+    if raw is None:
+        return "No response from node"
+    if raw is False:
+        return "Rejected by node"
+    if isinstance(raw, dict):
+        return error_field(raw)
+    if not isinstance(raw, str):
+        return None
+    text = raw.strip()
+    if text[:1] in ("{", "["):
+        try:
+            reply = json.loads(text)
+        except ValueError:
+            reply = None
+        if isinstance(reply, dict):
+            return error_field(reply)
+        if reply is not None:
+            return None
+    if NODE_ERROR.match(text):
+        return text.splitlines()[0]
+    return None
+
+
+def find_policy(policies, name: str, data: Dict[str, str]) -> Optional[Dict]:
+    """
+    Newest policy of this type carrying the submitted attributes.
+    """
+    if isinstance(policies, str):
+        try:
+            policies = json.loads(policies)
+        except ValueError:
+            return None
+    if not isinstance(policies, list):
+        return None
+    found = None
+    for policy in policies:
+        body = policy.get(name) if isinstance(policy, dict) else None
+        if isinstance(body, dict) and all(str(body.get(k)) == str(v) for k, v in data.items()):
+            found = policy
+    return found
+
+
+class PolicyPublisher:
+    """
+    Publishes policies to the ledger: "create policy" into a node variable, then
+    "blockchain insert" to the master. The master address is looked up once per
+    node and reused for POLICY_MASTER_TTL seconds; an insert that fails with a
+    cached address looks it up again and retries once. Bulk submits stage each
+    policy in one of `workers` node variables, reused across submits.
+    """
+
+    def __init__(self, request: Callable, ttl: float = POLICY_MASTER_TTL, workers: int = POLICY_SUBMIT_WORKERS):
+        self.request = request
+        self.ttl = ttl
+        self._masters = {}
+        self._variables = queue.Queue()
+        for slot in range(workers):
+            self._variables.put(f"bulk_policy_{slot}")
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="policy")
+        self._lock = threading.Lock()
+
+    def master(self, conn: str, refresh: bool = False) -> Optional[str]:
+        with self._lock:
+            entry = self._masters.get(conn)
+        if not refresh and entry is not None and time.time() - entry[1] < self.ttl:
+            return entry[0]
+        master = parse_master(self.request(conn, "GET", "blockchain get master bring.ip_port"))
+        with self._lock:
+            if master is None:
+                self._masters.pop(conn, None)
+            else:
+                self._masters[conn] = (master, time.time())
+        return master
+
+    def invalidate(self, conn: str):
+        with self._lock:
+            self._masters.pop(conn, None)
+
+    def publish(self, conn: str, name: str, data: Dict[str, str], variable: Optional[str] = None) -> Optional[str]:
+        """
+        Create and insert one policy; returns the error, or None on success.
+        """
+        variable = variable or name
+        error = failed(self.request(conn, "POST", create_policy_command(variable, name, data)))
+        if error is not None:
+            return f"create policy: {error}"
+
+        for attempt in range(2):
+            master = self.master(conn, refresh=attempt > 0)
+            if master is None:
+                return "No master node found (blockchain get master)"
+            error = failed(self.request(
+                conn, "POST", f"blockchain insert where policy = !{variable} and local = true and master = {master}"))
+            if error is None:
+                return None
+        self.invalidate(conn)
+        return f"blockchain insert: {error}"
+
+    def submit(self, conn: str, name: str, data: Dict[str, str]):
+        """
+        Publish one policy and return the ledger's view of it (raw reply).
+        """
+        error = self.publish(conn, name, data)
+        if error is not None:
+            print(f"Policy {name} not published: {error}")
+        return self.request(conn, "GET", policy_lookup_command(name, data))
+
+    def submit_many(self, conn: str, policies: List) -> List[Dict]:
+        """
+        Publish several policies (objects with .name and .data) a few at a time,
+        then read each policy type back once to report the stored policies.
+        Results are in request order.
+        """
+        def publish(policy) -> Dict:
+            started = time.perf_counter()
+            # Own node variable per policy in flight, from a fixed set
+            variable = self._variables.get()
+            try:
+                error = self.publish(conn, policy.name, policy.data, variable=variable)
+            finally:
+                self._variables.put(variable)
+            return {
+                "name": policy.name,
+                "status": "ok" if error is None else "error",
+                "error": error,
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+            }
+
+        # Look the master up once before fanning out
+        self.master(conn)
+        futures = [self._executor.submit(publish, policy) for policy in policies]
+        results = [future.result() for future in futures]
+
+        stored = {}
+        for name in {policy.name for policy, result in zip(policies, results) if result["status"] == "ok"}:
+            stored[name] = self.request(conn, "GET", f"blockchain get {name}")
+        for policy, result in zip(policies, results):
+            found = find_policy(stored.get(policy.name), policy.name, policy.data) if result["status"] == "ok" else None
+            result["policy"] = found
+            result["id"] = found[policy.name].get("id") if found else None
+        return results
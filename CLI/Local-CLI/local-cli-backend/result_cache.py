@@ -0,0 +1,203 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+# How many result sets are kept and for how long (seconds) before they are dropped
+RESULT_CACHE_SIZE = int(os.getenv('RESULT_CACHE_SIZE', '32'))
+RESULT_CACHE_TTL = int(os.getenv('RESULT_CACHE_TTL', '900'))
+
+# Number of (sort, filter) views remembered per result set
+VIEW_CACHE_SIZE = 8
+
+FILTER_OPS = ("eq", "ne", "contains", "gt", "ge", "lt", "le")
+
+
+def sort_key(value):
+    """
+    Key used for column sort indexes.
+    Numbers (or numeric strings, which is what parse_table returns) sort numerically
+    and before text; missing values sort last.
+    """
+    if value is None or value == "":
+        return (2, 0.0, "")
+    if isinstance(value, bool):
+        return (1, 0.0, str(value).lower())
+    if isinstance(value, (int, float)):
+        return (0, float(value), "")
+    text = str(value)
+    try:
+        return (0, float(text.replace(',', '')), "")
+    except ValueError:
+        return (1, 0.0, text.lower())
+
+
+def compile_filter(column: str, op: str, value):
+    """
+    Turn a single filter into a predicate over a row value.
+    Comparisons use the same ordering as the sort indexes but only between values of
+    the same kind: a number matches numeric cells, text matches text cells, and
+    missing cells never match (filter on an empty value with eq / ne to find them).
+    """
+    if op not in FILTER_OPS:
+        raise ValueError(f"Unsupported filter op '{op}', use one of {', '.join(FILTER_OPS)}")
+
+    if op == "contains":
+        needle = str(value).lower()
+        return lambda v: v is not None and needle in str(v).lower()
+
+    target = sort_key(value)
+    if target[0] == 2:
+        if op == "eq":
+            return lambda v: sort_key(v)[0] == 2
+        if op == "ne":
+            return lambda v: sort_key(v)[0] != 2
+        raise ValueError(f"Filter op '{op}' needs a value")
+
+    compare = {
+        "eq": lambda key: key == target,
+        "ne": lambda key: key != target,
+        "gt": lambda key: key > target,
+        "ge": lambda key: key >= target,
+        "lt": lambda key: key < target,
+        "le": lambda key: key <= target,
+    }[op]
+
+    def predicate(v):
+        key = sort_key(v)
+        return key[0] == target[0] and compare(key)
+    return predicate
+
+
+class ResultSet:
+    """
+    Rows of a single query result plus lazily built per-column sort indexes.
+    A sort index is the list of row positions ordered by that column; it is built once
+    per direction and reused for every window and filter over the same column.
+    """
+
+    def __init__(self, rows: List[Dict], command: str = "", conn: str = ""):
+        self.rows = rows
+        self.command = command
+        self.conn = conn
+        self.columns = list(rows[0].keys()) if rows else []
+        self.created_at = time.time()
+        self.last_access = self.created_at
+        self._sort_indexes = {}
+        self._views = OrderedDict()
+        self._lock = threading.Lock()
+
+    def sort_index(self, column: str, descending: bool = False) -> List[int]:
+        """
+        Row positions ordered by column. Both directions keep missing values last
+        and rows with equal values in their original order.
+        """
+        index = self._sort_indexes.get((column, descending))
+        if index is None:
+            keys = [sort_key(row.get(column)) for row in self.rows]
+            if descending:
+                # reverse=True is stable too; the leading flag keeps the missing bucket at the end
+                keys = [(key[0] != 2, key) for key in keys]
+            index = sorted(range(len(keys)), key=keys.__getitem__, reverse=descending)
+            self._sort_indexes[(column, descending)] = index
+        return index
+
+    def _filtered_positions(self, filters: List[Dict]):
+        predicates = [(f["column"], compile_filter(f["column"], f.get("op", "eq"), f.get("value"))) for f in filters]
+        return [
+            pos for pos, row in enumerate(self.rows)
+            if all(predicate(row.get(column)) for column, predicate in predicates)
+        ]
+
+    def view(self, sort_by: Optional[str] = None, descending: bool = False, filters: Optional[List[Dict]] = None) -> List[int]:
+        """
+        Row positions for the given sort and filter, cached so scrolling through the
+        same view only slices an existing list.
+        """
+        filters = filters or []
+        view_key = (sort_by, descending, tuple((f["column"], f.get("op", "eq"), str(f.get("value"))) for f in filters))
+
+        with self._lock:
+            cached = self._views.get(view_key)
+            if cached is not None:
+                self._views.move_to_end(view_key)
+                return cached
+
+            if sort_by is not None and sort_by not in self.columns:
+                raise ValueError(f"Unknown sort column '{sort_by}'")
+            for f in filters:
+                if f["column"] not in self.columns:
+                    raise ValueError(f"Unknown filter column '{f['column']}'")
+
+            if sort_by is None:
+                positions = list(range(len(self.rows)))
+            else:
+                positions = self.sort_index(sort_by, descending)
+
+            if filters:
+                keep = bytearray(len(self.rows))
+                for pos in self._filtered_positions(filters):
+                    keep[pos] = 1
+                positions = [pos for pos in positions if keep[pos]]
+
+            self._views[view_key] = positions
+            if len(self._views) > VIEW_CACHE_SIZE:
+                self._views.popitem(last=False)
+            return positions
+
+    def window(self, offset: int = 0, limit: int = 100, sort_by: Optional[str] = None,
+               descending: bool = False, filters: Optional[List[Dict]] = None) -> Dict:
+        self.last_access = time.time()
+        positions = self.view(sort_by, descending, filters)
+        offset = max(offset, 0)
+        page = positions[offset:offset + max(limit, 0)]
+        return {
+            "columns": self.columns,
+            "total": len(self.rows),
+            "filtered": len(positions),
+            "offset": offset,
+            "rows": [self.rows[pos] for pos in page],
+        }
+
+
+class ResultSetCache:
+    """
+    LRU of ResultSets keyed by an opaque handle, with a time-to-live per entry.
+    """
+
+    def __init__(self, max_entries: int = RESULT_CACHE_SIZE, ttl: int = RESULT_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _expire(self, now: float):
+        expired = [handle for handle, rs in self._entries.items() if now - rs.last_access > self.ttl]
+        for handle in expired:
+            del self._entries[handle]
+
+    def store(self, rows: List[Dict], command: str = "", conn: str = "") -> str:
+        handle = uuid.uuid4().hex
+        with self._lock:
+            self._expire(time.time())
+            self._entries[handle] = ResultSet(rows, command=command, conn=conn)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return handle
+
+    def get(self, handle: str) -> Optional[ResultSet]:
+        with self._lock:
+            self._expire(time.time())
+            result_set = self._entries.get(handle)
+            if result_set is not None:
+                self._entries.move_to_end(handle)
+            return result_set
+
+    def drop(self, handle: str) -> bool:
+        with self._lock:
+            return self._entries.pop(handle, None) is not None
+
+
+result_cache = ResultSetCache()
@@ -0,0 +1,62 @@
+from fastapi import APIRouter, HTTPException
+from helpers import make_request
+from parsers import parse_response
+from classes import Connection, Command, ResultWindow
+from result_cache import result_cache
+
+# Create router for cached result sets (server-side table windows)
+results_router = APIRouter(prefix="/results", tags=["Result Sets"])
+
+
+@results_router.post("/query/")
+def query_results(conn: Connection, command: Command, limit: int = 100):
+    """
+    Run a command and keep its rows server-side.
+    Returns a handle plus the first window so the table can render immediately.
+    """
+    raw_response = make_request(conn.conn, command.type, command.cmd)
+    structured_data = parse_response(raw_response)
+
+    rows = structured_data.get("data")
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        # Nothing tabular to window over, behave like /send-command/
+        return structured_data
+
+    handle = result_cache.store(rows, command=command.cmd, conn=conn.conn)
+    result_set = result_cache.get(handle)
+    if result_set is None:
+        # Pushed out by other result sets before the first window was read
+        raise HTTPException(status_code=410, detail="Result set evicted, run the query again")
+    window = result_set.window(offset=0, limit=limit)
+    return {"type": structured_data["type"], "handle": handle, **window}
+
+
+@results_router.post("/window/")
+def get_window(request: ResultWindow):
+    """
+    Get a window (offset/limit) of a cached result set under a sort and filters.
+    """
+    result_set = result_cache.get(request.handle)
+    if result_set is None:
+        raise HTTPException(status_code=404, detail="Result set not found or expired")
+
+    try:
+        return result_set.window(
+            offset=request.offset,
+            limit=request.limit,
+            sort_by=request.sort_by,
+            descending=request.descending,
+            filters=[f.model_dump() for f in request.filters],
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@results_router.delete("/{handle}")
+def drop_result_set(handle: str):
+    """
+    Release a cached result set once the table is closed.
+    """
+    if not result_cache.drop(handle):
+        raise HTTPException(status_code=404, detail="Result set not found or expired")
+    return {"data": {"message": "Result set released"}}
@@ -0,0 +1,53 @@
+from array import array
+from bisect import bisect_left
+from typing import List, Optional, Tuple
+
+
+class RingBuffer:
+    """
+    Fixed-size time series of (timestamp, value) pairs backed by two float arrays.
+    Appends overwrite the oldest sample once the buffer is full, so memory stays
+    at 16 bytes per slot no matter how long the poller runs.
+    """
+
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.timestamps = array('d', [0.0]) * capacity
+        self.values = array('d', [0.0]) * capacity
+        self.head = 0  # next slot to write
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def append(self, timestamp: float, value: float):
+        self.timestamps[self.head] = timestamp
+        self.values[self.head] = value
+        self.head = (self.head + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    def latest(self) -> Optional[Tuple[float, float]]:
+        if not self.count:
+            return None
+        index = (self.head - 1) % self.capacity
+        return self.timestamps[index], self.values[index]
+
+    def snapshot(self, since: Optional[float] = None, limit: Optional[int] = None) -> Tuple[List[float], List[float]]:
+        """
+        Samples in chronological order, optionally only those at/after `since`
+        and only the most recent `limit` of them.
+        """
+        if self.count < self.capacity:
+            timestamps = self.timestamps[:self.count]
+            values = self.values[:self.count]
+        else:
+            timestamps = self.timestamps[self.head:] + self.timestamps[:self.head]
+            values = self.values[self.head:] + self.values[:self.head]
+
+        start = bisect_left(timestamps, since) if since is not None else 0
+        if limit is not None:
+            start = max(start, len(timestamps) - limit)
+        return timestamps[start:].tolist(), values[start:].tolist()
@@ -0,0 +1,125 @@
+import datetime
+import os
+import re
+import threading
+from typing import Dict, List, Optional
+
+# Rows looked at per batch when inferring column types
+INGEST_SCHEMA_SAMPLE_ROWS = int(os.getenv('INGEST_SCHEMA_SAMPLE_ROWS', '1000'))
+
+# Widening order: a column seen with two types takes the later one
+WIDENING = ["bool", "int", "float", "str"]
+
+TIMESTAMP_PATTERN = re.compile(
+    r"^\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(:\d{2}(\.\d+)?)?(Z|[+-]\d{2}:?\d{2})?$"
+)
+
+PY_TYPES = {bool: "bool", int: "int", float: "float", str: "str",
+            datetime.datetime: "timestamp", datetime.date: "timestamp"}
+
+
+def sample_rows(rows: List[Dict], size: int = INGEST_SCHEMA_SAMPLE_ROWS) -> List[Dict]:
+    """
+    The first half of the sample from the head of the batch, the rest evenly
+    spread over the remainder so late type changes are still seen.
+    """
+    if len(rows) <= size:
+        return rows
+    head = size // 2
+    step = (len(rows) - head) / (size - head)
+    return rows[:head] + [rows[head + int(i * step)] for i in range(size - head)]
+
+
+def widen(a: Optional[str], b: Optional[str]) -> Optional[str]:
+    if a is None or a == b:
+        return b
+    if b is None:
+        return a
+    if "timestamp" in (a, b):
+        # A timestamp column with other values falls back to text
+        return "str"
+    return WIDENING[max(WIDENING.index(a), WIDENING.index(b))]
+
+
+def column_type(values) -> Optional[str]:
+    """
+    Type of one column from its (non null) sampled values.
+    """
+    values = [value for value in values if value is not None]
+    if not values:
+        return None
+    kinds = {PY_TYPES.get(type(value), "str") for value in values}
+    if kinds == {"str"}:
+        if all(isinstance(value, str) and TIMESTAMP_PATTERN.match(value) for value in values):
+            return "timestamp"
+        return "str"
+    kind = None
+    for k in kinds:
+        kind = widen(kind, k)
+    return kind
+
+
+def infer_columns(rows: List[Dict]) -> Dict[str, Optional[str]]:
+    """
+    Column -> type for the rows, columns in first-seen order. Columns that are
+    null in every row map to None.
+    """
+    columns = {}
+    for row in rows:
+        for key in row:
+            columns.setdefault(key, None)
+    return {key: column_type([row.get(key) for row in rows]) for key in columns}
+
+
+def resolved(schema: Dict[str, Optional[str]]) -> Dict[str, str]:
+    # Columns never seen with a value are sent as text
+    return {column: kind or "str" for column, kind in schema.items()}
+
+
+class SchemaInferer:
+    """
+    Sampled schema inference with a per (dbms, table) cache. Each batch's schema
+    is merged into the cached one by widening, so types only ever move
+    int -> float -> str and a stable table keeps the same schema (and the same
+    message client) across batches.
+    """
+
+    def __init__(self, sample_size: int = INGEST_SCHEMA_SAMPLE_ROWS):
+        self.sample_size = sample_size
+        self._schemas = {}
+        self._lock = threading.Lock()
+
+    def infer(self, rows: List[Dict], dbms: Optional[str] = None, table: Optional[str] = None) -> Dict[str, str]:
+        inferred = infer_columns(sample_rows(rows, self.sample_size))
+        if dbms is None or table is None:
+            return resolved(inferred)
+        return self.merge(dbms, table, inferred)
+
+    def merge(self, dbms: str, table: str, inferred: Dict[str, Optional[str]]) -> Dict[str, str]:
+        """
+        Widen the cached schema of (dbms, table) with a batch's column types.
+        """
+        key = (dbms, table)
+        with self._lock:
+            cached = self._schemas.get(key)
+            if cached is None:
+                self._schemas[key] = dict(inferred)
+                return resolved(inferred)
+            merged = dict(cached)
+            for column, kind in inferred.items():
+                merged[column] = widen(cached.get(column), kind)
+            if merged != cached:
+                self._schemas[key] = merged
+            return resolved(merged)
+
+    def forget(self, dbms: str, table: str):
+        with self._lock:
+            self._schemas.pop((dbms, table), None)
+
+    def schemas(self) -> List[Dict]:
+        with self._lock:
+            return [{"dbms": dbms, "table": table, "schema": resolved(schema)}
+                    for (dbms, table), schema in self._schemas.items()]
+
+
+schema_inferer = SchemaInferer()
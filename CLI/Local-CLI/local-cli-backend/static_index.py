@@ -0,0 +1,128 @@
+import importlib.util
+import os
+import threading
+import time
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Tuple
+
+# Largest page GET / hands out at once
+STATIC_INDEX_MAX_PAGE = int(os.getenv('STATIC_INDEX_MAX_PAGE', '1000'))
+
+# Watch static/ for files written outside the backend (needs watchfiles)
+STATIC_INDEX_WATCH = os.getenv('STATIC_INDEX_WATCH', 'true').lower() in ('1', 'true', 'yes')
+
+
+class StaticIndex:
+    """
+    Sorted listing of the files under a directory (paths relative to it), built
+    with one os.walk and then kept current by the code that writes there (blob
+    cache, thumbnails) and, when watchfiles is installed, a filesystem watcher.
+    A page costs a binary search plus the page itself, and so does a prefix
+    filter, because files sharing a prefix are contiguous in sorted order.
+    """
+
+    def __init__(self, directory: str, watch: bool = STATIC_INDEX_WATCH):
+        self.directory = directory
+        self.watch = watch and importlib.util.find_spec("watchfiles") is not None
+        self.files = []
+        self.built_at = None
+        self._members = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher = None
+
+    def rebuild(self):
+        files = []
+        for root, dirs, filenames in os.walk(self.directory):
+            rel_dir = os.path.relpath(root, self.directory)
+            for filename in filenames:
+                files.append(os.path.join(rel_dir, filename) if rel_dir != '.' else filename)
+        files.sort()
+        with self._lock:
+            self.files = files
+            self._members = set(files)
+            self.built_at = time.time()
+
+    def _ensure_built(self):
+        if self.built_at is None:
+            self.rebuild()
+
+    def relative(self, path: str) -> str:
+        return os.path.relpath(path, self.directory) if os.path.isabs(path) else path
+
+    def add(self, path: str):
+        name = self.relative(path)
+        with self._lock:
+            if self.built_at is None or name in self._members:
+                return
+            self._members.add(name)
+            insort(self.files, name)
+
+    def remove(self, path: str):
+        name = self.relative(path)
+        with self._lock:
+            if name not in self._members:
+                return
+            self._members.discard(name)
+            del self.files[bisect_left(self.files, name)]
+
+    def page(self, offset: int = 0, limit: Optional[int] = None, prefix: str = "") -> Tuple[List[str], int]:
+        """
+        (files, total matching) for one page of the listing.
+        """
+        self._ensure_built()
+        with self._lock:
+            start = bisect_left(self.files, prefix) if prefix else 0
+            # "\U0010ffff" sorts after every character a file name can continue with
+            end = bisect_left(self.files, prefix + "\U0010ffff", start) if prefix else len(self.files)
+            first = min(start + max(offset, 0), end)
+            last = end if limit is None else min(first + max(limit, 0), end)
+            return self.files[first:last], end - start
+
+    def on_cache_event(self, event: str, entry: Dict):
+        """
+        Blob cache listener.
+        """
+        if event == "added":
+            self.add(entry["name"])
+        elif event == "evicted":
+            self.remove(entry["name"])
+
+    def on_file_event(self, event: str, path: str):
+        """
+        Listener for writers that report paths ("added" / "removed").
+        """
+        if event == "added":
+            self.add(path)
+        elif event == "removed":
+            self.remove(path)
+
+    def start(self):
+        """
+        Build the index and start the watcher (if enabled).
+        """
+        self.rebuild()
+        if self.watch and self._watcher is None:
+            self._stop.clear()
+            self._watcher = threading.Thread(target=self._watch, name="static-index", daemon=True)
+            self._watcher.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=5)
+            self._watcher = None
+
+    def _watch(self):
+        from watchfiles import Change, watch
+
+        try:
+            for changes in watch(self.directory, stop_event=self._stop, recursive=True):
+                for change, path in changes:
+                    if change == Change.deleted:
+                        self.remove(path)
+                    elif os.path.isfile(path) and ".part." not in os.path.basename(path):
+                        # Skip in-progress downloads; they are renamed into place when complete
+                        self.add(path)
+        except Exception as e:
+            print(f"Static index watcher stopped: {e}")
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test script for the monitor alert rule engine
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from alerts import AlertEngine
+
+def sample(free_space, total_rows, network_error="0"):
+    return [{"node name": "operator1", "Free Space Percent": free_space, "total rows": total_rows, "Network Error": network_error}]
+
+def test_alert_engine():
+    print("Testing Alert Engine")
+    print("=" * 50)
+
+    engine = AlertEngine(rules_file=None)
+
+    # Test 1: Register rules
+    print("\n1. Adding rules...")
+    low_space = engine.add_rule({"metric": "Free Space Percent", "op": "<", "threshold": 10, "clear_threshold": 15, "for_samples": 2})
+    stalled = engine.add_rule({"name": "ingest stalled", "metric": "total rows", "op": "<=", "threshold": 0, "mode": "delta", "for_samples": 2})
+    engine.add_rule({"metric": "Network Error", "op": ">", "threshold": 0, "mode": "delta", "conn": "other:32549"})
+    assert len(engine.list_rules()) == 3
+    print("✅ Rules compiled")
+
+    # Test 2: Invalid rules are rejected
+    for bad in ({"metric": "CPU Percent", "op": "~", "threshold": 1},
+                {"metric": "CPU Percent", "op": "<", "threshold": 10, "clear_threshold": 5}):
+        try:
+            engine.add_rule(bad)
+            assert False, f"expected ValueError for {bad}"
+        except ValueError as e:
+            print(f"✅ Rejected: {e}")
+
+    # Test 3: for_samples and hysteresis
+    print("\n2. Evaluating samples...")
+    conn = "10.0.0.11:32249"
+    engine.evaluate(conn, sample("9", "100", "0"), 1.0)
+    assert engine.active() == []
+    engine.evaluate(conn, sample("8", "100", "5"), 2.0)
+    active = engine.active(conn)
+    assert [alert["rule_id"] for alert in active] == [low_space["id"]]
+    print("✅ Raised low free space alert after 2 breaching samples")
+
+    engine.evaluate(conn, sample("12", "100"), 3.0)
+    active = engine.active(conn)
+    assert {alert["rule_id"] for alert in active} == {low_space["id"], stalled["id"]}
+    print("✅ Raised stalled ingest alert after 2 samples without new rows")
+    low = [a for a in active if a["rule_id"] == low_space["id"]]
+    assert len(low) == 1 and low[0]["occurrences"] == 2 and low[0]["since"] == 2.0
+    print("✅ Alert held inside hysteresis band without duplicates")
+
+    engine.evaluate(conn, sample("20", "150"), 4.0)
+    assert engine.active(conn) == []
+    assert [e["event"] for e in engine.recent_events()] == ["raised", "raised", "cleared", "cleared"]
+    print("✅ Alerts cleared on recovery")
+
+    # Test 4: Removing a rule drops its state
+    engine.remove_rule(low_space["id"])
+    assert len(engine.list_rules()) == 2
+    print("✅ Rule removed")
+
+    print("\n" + "=" * 50)
+    print("✅ Alert engine test completed!")
+
+if __name__ == "__main__":
+    test_alert_engine()
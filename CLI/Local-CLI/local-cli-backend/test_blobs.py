@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Test script for concurrent blob retrieval
+"""
+
+import sys
+import json
+import os
+import threading
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from blobs import BlobFetcher, tee_to_file
+from blob_cache import BlobCache
+from blob_prefetch import BlobPrefetcher, TokenBucket
+from thumbnails import ThumbnailPipeline, parse_bbox, thumbnails_available
+
+def make_blobs(count, nodes=3):
+    return [{"ip": f"10.0.0.{i % nodes}", "port": 32148, "dbms_name": "edgex", "table_name": "factory_imgs", "file": f"{i}.jpeg"}
+            for i in range(count)]
+
+def test_blob_fetcher():
+    print("Testing Blob Fetcher")
+    print("=" * 50)
+
+    active = {}
+    peak = {}
+    lock = threading.Lock()
+
+    def request(conn, method, command):
+        node = command.split("(")[1].split(")")[0]
+        with lock:
+            active[node] = active.get(node, 0) + 1
+            peak[node] = max(peak.get(node, 0), active[node])
+        time.sleep(0.02)
+        with lock:
+            active[node] -= 1
+        return None if "13.jpeg" in command else "ok"
+
+    fetcher = BlobFetcher(request, blobs_dir="/tmp/static/", workers=8, per_node=2)
+
+    # Test 1: Concurrent, bounded per node, results in request order
+    print("\n1. Fetching 30 files from 3 nodes...")
+    started = time.perf_counter()
+    results = fetcher.fetch_all("10.0.0.11:32249", make_blobs(30))
+    elapsed = time.perf_counter() - started
+    assert [r["file"] for r in results] == [f"{i}.jpeg" for i in range(30)]
+    assert max(peak.values()) <= 2
+    assert elapsed < 30 * 0.02 / 2
+    print(f"✅ {len(results)} files in {elapsed:.2f}s, peak per node {max(peak.values())}")
+
+    # Test 2: Per-file status
+    failed = [r for r in results if r["status"] != "ok"]
+    assert [r["file"] for r in failed] == ["13.jpeg"] and failed[0]["error"]
+    assert results[0]["name"] == "edgex.factory_imgs.0.jpeg" and results[0]["elapsed_ms"] > 0
+    print("✅ Per-file status and timing reported")
+
+    # Test 3: Streaming yields every file once
+    streamed = list(fetcher.fetch_iter("10.0.0.11:32249", make_blobs(6) + [{"file": "broken"}]))
+    assert len(streamed) == 7 and sum(r["status"] == "error" for r in streamed) == 1
+    print("✅ Streamed results, invalid references reported")
+
+    print("\n" + "=" * 50)
+    print("✅ Blob fetcher test completed!")
+
+def test_blob_cache():
+    print("\nTesting Blob Cache")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as directory:
+        index = os.path.join(directory, "index.json")
+        calls = []
+
+        def request(conn, method, command):
+            # Emulate the node writing the file into the directory
+            calls.append(command)
+            name = command.rsplit("/", 1)[-1]
+            with open(os.path.join(directory, name), "wb") as f:
+                f.write(b"x" * 100)
+            return "ok"
+
+        cache = BlobCache(directory, max_bytes=350, index_path=index)
+        fetcher = BlobFetcher(request, blobs_dir=directory + "/", workers=1, cache=cache)
+
+        # Test 1: Second request is a hit and skips the node
+        print("\n1. Hits skip file get...")
+        blobs = make_blobs(3)
+        assert [r["status"] for r in fetcher.fetch_all("a:1", blobs)] == ["ok"] * 3
+        assert [r["status"] for r in fetcher.fetch_all("a:1", blobs)] == ["cached"] * 3
+        assert len(calls) == 3 and cache.stats()["hits"] == 3
+        print("✅ Cached files not fetched again")
+
+        # Test 2: Quota evicts least recently used
+        print("\n2. LRU eviction...")
+        cache.lookup("edgex", "factory_imgs", "0.jpeg")
+        fetcher.fetch_all("a:1", make_blobs(4)[3:])
+        assert cache.stats()["bytes"] <= 350 and cache.stats()["evictions"] == 1
+        assert not os.path.exists(os.path.join(directory, "edgex.factory_imgs.1.jpeg"))
+        assert os.path.exists(os.path.join(directory, "edgex.factory_imgs.0.jpeg"))
+        print("✅ Least recently used file evicted from disk")
+
+        # Test 3: Index persists across restarts
+        print("\n3. Persisting the index...")
+        cache.save()
+        restored = BlobCache(directory, max_bytes=350, index_path=index)
+        assert restored.names() == cache.names() and restored.total_bytes == cache.total_bytes
+        os.remove(os.path.join(directory, "edgex.factory_imgs.3.jpeg"))
+        assert BlobCache(directory, max_bytes=350, index_path=index).stats()["files"] == 2
+        print("✅ Index restored, missing files dropped")
+
+        # Hits alone do not rewrite the index on every view
+        restored = BlobCache(directory, max_bytes=350, index_path=index, save_interval=60)
+        restored.save(force=True)
+        saved_at = json.load(open(index))["saved_at"]
+        assert restored.lookup("edgex", "factory_imgs", "0.jpeg")
+        restored.save()
+        assert json.load(open(index))["saved_at"] == saved_at
+        restored.save(force=True)
+        assert json.load(open(index))["saved_at"] > saved_at
+        print("✅ Access order saved on a schedule, not per hit")
+
+        # Test 4: Proxied bodies are cached only when complete
+        print("\n4. Teeing streamed blobs...")
+        done = []
+        path = os.path.join(directory, "edgex.factory_imgs.video.mp4")
+        assert b"".join(tee_to_file(iter([b"ab", b"cd"]), path, lambda: done.append(path))) == b"abcd"
+        assert open(path, "rb").read() == b"abcd" and done == [path]
+        os.remove(path)
+        stream = tee_to_file(iter([b"ab", b"cd"]), path, lambda: done.append(path))
+        next(stream)
+        stream.close()
+        assert not os.path.exists(path) and len(done) == 1
+        assert not [name for name in os.listdir(directory) if ".part." in name]
+        print("✅ Interrupted transfers leave nothing behind")
+
+    # Test 5: Blobs on disk from before the cache are adopted and count toward the quota
+    with tempfile.TemporaryDirectory() as directory:
+        for i in range(3):
+            path = os.path.join(directory, f"edgex.old.{i}.jpeg")
+            with open(path, "wb") as f:
+                f.write(b"x" * 100)
+            os.utime(path, (1000 + i, 1000 + i))
+        with open(os.path.join(directory, "flower.jpg"), "wb") as f:
+            f.write(b"x" * 100)
+        cache = BlobCache(directory, max_bytes=250, index_path=os.path.join(directory, "index.json"))
+        assert cache.names() == ["edgex.old.1.jpeg", "edgex.old.2.jpeg"] and cache.total_bytes == 200
+        assert not os.path.exists(os.path.join(directory, "edgex.old.0.jpeg"))
+        assert os.path.exists(os.path.join(directory, "flower.jpg"))
+        assert cache.contains("edgex.old.2.jpeg") and cache.lookup("edgex", "old", "2.jpeg")
+        print("✅ Existing blobs adopted, oldest evicted, other files left alone")
+
+    print("\n" + "=" * 50)
+    print("✅ Blob cache test completed!")
+
+def test_thumbnails():
+    print("\nTesting Thumbnails")
+    print("=" * 50)
+
+    assert parse_bbox("[10, 20, 30, 40]") == [[10.0, 20.0, 30.0, 40.0]]
+    assert parse_bbox([[0.1, 0.1, 0.5, 0.5], [1, 2]]) == [[0.1, 0.1, 0.5, 0.5]]
+    assert parse_bbox("not json") == []
+    print("✅ Bounding boxes parsed")
+
+    if not thumbnails_available():
+        print("Pillow not installed, skipping rendering")
+        return
+    from PIL import Image
+
+    with tempfile.TemporaryDirectory() as directory:
+        Image.new("RGB", (1600, 1200), (0, 128, 255)).save(os.path.join(directory, "edgex.factory_imgs.1.jpeg"), quality=95)
+        with open(os.path.join(directory, "edgex.factory_imgs.clip.mp4"), "wb") as f:
+            f.write(b"\x00" * 10)
+
+        pipeline = ThumbnailPipeline(directory, size=200, workers=1)
+        # Test 1: Preview rendered in the process pool, scaled to the longest edge
+        print("\n1. Rendering...")
+        path = pipeline.ensure("edgex.factory_imgs.1.jpeg")
+        with Image.open(path) as thumb:
+            assert thumb.size == (200, 150)
+        assert os.path.getsize(path) < os.path.getsize(os.path.join(directory, "edgex.factory_imgs.1.jpeg"))
+        print(f"✅ {os.path.getsize(path)} byte thumbnail")
+
+        # Test 2: Overlay variant drawn in the box colour
+        overlay = pipeline.ensure("edgex.factory_imgs.1.jpeg", "[400, 300, 1200, 900]")
+        assert overlay != path
+        with Image.open(overlay) as thumb:
+            red, green, blue = thumb.getpixel((50, 75))
+            assert red > 150 and red > blue
+        print("✅ Bounding box overlay rendered")
+
+        # Test 3: Non images skipped, eviction removes every variant
+        assert pipeline.submit("edgex.factory_imgs.clip.mp4") is None
+        pipeline.on_cache_event("evicted", {"name": "edgex.factory_imgs.1.jpeg"})
+        assert os.listdir(pipeline.thumbnail_dir) == []
+        pipeline.shutdown()
+        print("✅ Videos skipped, previews removed with the original")
+
+    print("\n" + "=" * 50)
+    print("✅ Thumbnail test completed!")
+
+def test_blob_prefetch():
+    print("\nTesting Blob Prefetch")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = BlobCache(directory, max_bytes=10 ** 6, index_path=None)
+        commands = []
+        release = threading.Event()
+
+        def request(conn, method, command):
+            name = command.rsplit("/", 1)[-1]
+            commands.append(name)
+            if name.endswith("0.jpeg"):
+                release.wait(5)
+            with open(os.path.join(directory, name), "wb") as f:
+                f.write(b"x" * 1000)
+            return "ok"
+
+        fetcher = BlobFetcher(request, blobs_dir=directory + "/", workers=4, per_node=4, cache=cache)
+        prefetcher = BlobPrefetcher(fetcher, cache, max_files=3, workers=1, bytes_per_sec=10 ** 6, enabled=True)
+
+        # Test 1: Only the first files of a result, the newer result replaces what is queued
+        print("\n1. Prefetching...")
+        assert prefetcher.submit("10.0.0.11:32249", make_blobs(10)) == 3
+        time.sleep(0.05)
+        prefetcher.submit("10.0.0.11:32249", make_blobs(6)[4:])
+        release.set()
+        prefetcher.wait_for(["edgex.factory_imgs.0.jpeg"])
+        deadline = time.time() + 5
+        while prefetcher.stats()["fetched"] < 3 and time.time() < deadline:
+            time.sleep(0.01)
+        stats = prefetcher.stats()
+        assert sorted(commands) == ["edgex.factory_imgs.0.jpeg", "edgex.factory_imgs.4.jpeg", "edgex.factory_imgs.5.jpeg"]
+        assert stats["superseded"] == 2 and stats["bytes"] == 3000
+        print(f"✅ Prefetched {stats['fetched']} files, {stats['superseded']} superseded")
+
+        # Test 2: Opening the viewer is a cache hit
+        results = fetcher.fetch_all("10.0.0.11:32249", make_blobs(6)[4:])
+        assert [r["status"] for r in results] == ["cached", "cached"]
+        assert prefetcher.submit("10.0.0.11:32249", make_blobs(6)[4:]) == 0
+        prefetcher.stop()
+        print("✅ Viewer served from cache, cached files not queued again")
+
+        # Test 3: A file listed several times is fetched once, by one worker
+        commands.clear()
+        release.clear()
+        prefetcher = BlobPrefetcher(fetcher, cache, max_files=10, workers=2, bytes_per_sec=10 ** 6, enabled=True)
+        blobs = make_blobs(20)[10:]
+        assert prefetcher.submit("10.0.0.11:32249", [blobs[0], blobs[0], blobs[1]]) == 2
+        time.sleep(0.05)
+        prefetcher.submit("10.0.0.11:32249", [blobs[0]])
+        release.set()
+        started = time.time()
+        prefetcher.wait_for(["edgex.factory_imgs.10.jpeg"])
+        assert time.time() - started < 5
+        deadline = time.time() + 5
+        while prefetcher.stats()["fetched"] < 2 and time.time() < deadline:
+            time.sleep(0.01)
+        assert sorted(commands) == ["edgex.factory_imgs.10.jpeg", "edgex.factory_imgs.11.jpeg"]
+        assert all(thread.is_alive() for thread in prefetcher._threads)
+        prefetcher.stop()
+        print("✅ Repeated files fetched once, workers survive")
+
+    # Test 4: Byte budget is charged after the fact and paid off over time
+    bucket = TokenBucket(rate=1000, burst=500)
+    bucket.consume(700)
+    assert 0.15 < bucket.delay() <= 0.2
+    assert TokenBucket(rate=0, burst=0).delay() == 0
+    print("✅ Bandwidth budget enforced")
+
+    print("\n" + "=" * 50)
+    print("✅ Blob prefetch test completed!")
+
+if __name__ == "__main__":
+    test_blob_fetcher()
+    test_blob_cache()
+    test_blob_prefetch()
+    test_thumbnails()
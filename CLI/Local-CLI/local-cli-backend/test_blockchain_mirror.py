@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Test script for the local blockchain mirror
+"""
+
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from blockchain_mirror import BlockchainMirror, LedgerSnapshot, parse_query
+
+def make_ledger(operators=2000):
+    ledger = [{"master": {"name": "master-node", "ip": "10.0.0.10", "port": 32048, "id": "m0"}}]
+    for i in range(operators):
+        ledger.append({"operator": {
+            "name": f"operator{i}",
+            "company": "IoTech System" if i % 2 else "AnyLog Co.",
+            "country": "US" if i % 3 == 0 else "DE",
+            "city": f"city{i % 7}",
+            "ip": f"10.0.{i // 250}.{i % 250}",
+            "port": 32148 + i % 3,
+            "id": f"op{i}",
+        }})
+    return ledger
+
+class FakeNode:
+    def __init__(self, ledger):
+        self.ledger = ledger
+        self.commands = []
+
+    def request(self, conn, method, command, **kwargs):
+        self.commands.append(command)
+        return self.ledger if command == "blockchain get *" else None
+
+def test_blockchain_mirror():
+    print("Testing Blockchain Mirror")
+    print("=" * 50)
+
+    snapshot = LedgerSnapshot(make_ledger(), time.time())
+
+    # Test 1: Filters and projections used by the UI
+    print("\n1. Queries...")
+    def run(command):
+        query = parse_query(command)
+        assert query is not None, command
+        return snapshot.select(query["types"], query["conditions"]), query
+
+    policies, _ = run("blockchain get operator where [country] contains US")
+    assert len(policies) == 667 and all(p["operator"]["country"] == "US" for p in policies)
+    policies, _ = run('blockchain get operator where company="AnyLog Co." and [operator][city] = city3')
+    assert policies and all(p["operator"]["company"] == "AnyLog Co." and p["operator"]["city"] == "city3" for p in policies)
+    policies, _ = run("blockchain get (operator, master) where id = m0")
+    assert [p["master"]["name"] for p in policies] == ["master-node"]
+    policies, _ = run("blockchain get operator where port > 32149")
+    assert all(p["operator"]["port"] == 32150 for p in policies)
+    assert len(run("blockchain get *")[0]) == 2001
+    print("✅ where filters (=, contains, >, and, quoted values, ids, several types)")
+
+    # Test 2: Unsupported forms go to the node
+    for command in ("blockchain get operator where country = US or country = DE",
+                    "blockchain get operator bring.json [operator][name]",
+                    "blockchain get operator bring [operator][name]",
+                    "blockchain insert where policy = !p",
+                    "get status"):
+        assert parse_query(command) is None, command
+    print("✅ Unsupported commands left to the node")
+
+    # Test 3: Answers from the mirror with freshness, writes invalidate
+    print("\n3. Mirror...")
+    node = FakeNode(make_ledger())
+    mirror = BlockchainMirror(node.request, interval=60, max_age=120, enabled=True)
+    command = "blockchain get operator where [country] contains US bring.table [operator][name] [operator][country] [operator][ip] [operator][port]"
+    assert mirror.answer("10.0.0.11:32249", command) is None
+    deadline = time.time() + 5
+    while not mirror.stats()["10.0.0.11:32249"]["syncs"] and time.time() < deadline:
+        time.sleep(0.01)
+
+    result = mirror.answer("10.0.0.11:32249", command)
+    assert result["type"] == "table" and len(result["data"]) == 667
+    assert result["data"][0] == {"name": "operator0", "country": "US", "ip": "10.0.0.0", "port": "32148"}
+    assert result["mirror"]["source"] == "mirror" and result["mirror"]["policies"] == 2001
+    print(f"✅ Table answered locally in {result['mirror']['lookup_us']} µs")
+
+    result = mirror.answer("10.0.0.11:32249", "blockchain get operator where [company] contains IoTech bring [operator][ip] : [operator][port]  separator=,")
+    assert result["type"] == "string" and result["data"].split(",")[0] == "10.0.0.1:32149"
+    result = mirror.answer("10.0.0.11:32249", 'blockchain get operator where company="AnyLog Co." bring.ip_port')
+    assert result["data"].split(",")[:2] == ["10.0.0.0:32148", "10.0.0.2:32150"]
+    result = mirror.answer("10.0.0.11:32249", "blockchain get operator where name = operator7")
+    assert result["type"] == "json" and result["data"][0]["operator"]["id"] == "op7"
+    print("✅ bring, bring.ip_port and JSON answers")
+
+    syncs = mirror.stats()["10.0.0.11:32249"]["syncs"]
+    assert mirror.answer("10.0.0.11:32249", "blockchain insert where policy = !p and local = true") is None
+    assert mirror.answer("10.0.0.11:32249", command) is None
+    deadline = time.time() + 5
+    while mirror.stats()["10.0.0.11:32249"]["syncs"] == syncs and time.time() < deadline:
+        time.sleep(0.01)
+    assert mirror.answer("10.0.0.11:32249", command) is not None
+    assert mirror.answer("10.0.0.11:32249", "run client (10.0.0.10:32048) blockchain delete policy where id = op7") is None
+    assert mirror.stats()["10.0.0.11:32249"]["stale"]
+    mirror.stop()
+    print("✅ Ledger writes, also behind run client, trigger a re-sync before answering again")
+
+    # Test 4: Nodes nobody queries any more are no longer synced
+    mirror = BlockchainMirror(node.request, interval=0.05, max_age=120, enabled=True, idle_timeout=0.3)
+    mirror.answer("10.0.0.12:32249", command)
+    deadline = time.time() + 5
+    while "10.0.0.12:32249" in mirror.stats() and time.time() < deadline:
+        time.sleep(0.02)
+    assert mirror.stats() == {}
+    mirror.stop()
+    print("✅ Idle node dropped from the mirror")
+
+    print("\n" + "=" * 50)
+    print("✅ Blockchain mirror test completed!")
+
+if __name__ == "__main__":
+    test_blockchain_mirror()
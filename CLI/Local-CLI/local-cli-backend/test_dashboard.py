@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Test script for dashboard panels and the shared query cache
+"""
+
+import sys
+import os
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import dashboard
+from dashboard import QueryCache, run_panels
+
+def test_dashboard():
+    print("Testing Dashboard Panels")
+    print("=" * 50)
+
+    calls = []
+    release = threading.Event()
+
+    def fake_request(conn, method, command):
+        calls.append((method, command))
+        if command == "get slow":
+            release.wait(5)
+        elif command == "get later":
+            time.sleep(0.3)
+        elif command == "get nothing":
+            return None
+        return f"{command} on {conn}"
+
+    original = dashboard.make_request, dashboard.query_cache
+    dashboard.make_request = fake_request
+    dashboard.query_cache = QueryCache(ttl=60)
+    try:
+        check_panels(calls, release)
+    finally:
+        dashboard.make_request, dashboard.query_cache = original
+
+    print("\n" + "=" * 50)
+    print("✅ Dashboard test completed!")
+
+def check_panels(calls, release):
+    # Test 1: Identical panels cost one upstream call
+    print("\n1. Running panels...")
+    panels = [
+        {"id": "a", "cmd": "get status"},
+        {"id": "b", "cmd": "get status", "type": "get"},
+        {"id": "c", "cmd": "get processes"},
+        {"id": "d", "cmd": "get nothing"},
+    ]
+    results = {r["id"]: r for r in run_panels("10.0.0.11:32249", panels)}
+    assert calls.count(("GET", "get status")) == 1 and len(calls) == 3
+    assert results["a"]["result"] == results["b"]["result"] == {"type": "string", "data": "get status on 10.0.0.11:32249"}
+    assert "No response" in results["d"]["error"]
+    print("✅ 4 panels, 3 upstream calls, missing reply reported per panel")
+
+    # Test 2: A repeated GET within the TTL is served from the cache
+    results = list(run_panels("10.0.0.11:32249", panels[:1]))
+    assert results[0]["cached"] and calls.count(("GET", "get status")) == 1
+    print("✅ Repeated GET served from cache")
+
+    # Test 3: A second caller joins the request that is already running
+    print("\n2. Joining a running request...")
+    cache = QueryCache(ttl=60)
+    key = ("10.0.0.11:32249", "GET", "get slow")
+    answers = []
+    threads = [threading.Thread(target=lambda: answers.append(cache.run(key))) for _ in range(2)]
+    threads[0].start()
+    while ("GET", "get slow") not in calls:
+        time.sleep(0.01)
+    threads[1].start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert calls.count(("GET", "get slow")) == 1
+    assert sorted(cached for _, cached in answers) == [False, True] and answers[0][0] == answers[1][0]
+    print("✅ Concurrent caller joined the running request")
+
+    # Test 4: POST results are never cached
+    key = ("10.0.0.11:32249", "POST", "set something")
+    assert cache.run(key)[1] is False and cache.run(key)[1] is False
+    assert calls.count(("POST", "set something")) == 2
+    dashboard.query_cache = QueryCache(ttl=60)
+    results = list(run_panels("10.0.0.11:32249", [
+        {"id": "first", "cmd": "set something", "type": "POST"},
+        {"id": "second", "cmd": "set something", "type": "POST"},
+    ]))
+    assert calls.count(("POST", "set something")) == 4 and not any(r["cached"] for r in results)
+    print("✅ POST commands sent every time, identical POST panels not merged")
+
+    # Test 5: Results are yielded as they complete, not in panel order
+    print("\n3. Completion order...")
+    dashboard.query_cache = QueryCache(ttl=60)
+    order = [r["id"] for r in run_panels("10.0.0.11:32249", [
+        {"id": "later", "cmd": "get later"},
+        {"id": "now", "cmd": "get status"},
+    ])]
+    assert order == ["now", "later"]
+    print("✅ Fast panel yielded before slow panel")
+
+if __name__ == "__main__":
+    test_dashboard()
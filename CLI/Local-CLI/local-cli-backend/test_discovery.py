@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Test script for network discovery
+"""
+
+import sys
+import os
+import socket
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from discovery import NetworkDiscovery, probe_rest
+
+def test_discovery():
+    print("Testing Network Discovery")
+    print("=" * 50)
+
+    # Test 1: A large network is probed in full, nothing left queued is reported unreachable
+    print("\n1. Probing 300 nodes...")
+    def fake_probe(address, timeout):
+        time.sleep(0.2)
+        port = int(address.rsplit(":", 1)[1])
+        return {"address": address, "reachable": port % 2 == 0, "rtt_ms": 200.0,
+                "error": None if port % 2 == 0 else "ConnectionRefusedError"}
+
+    discovery = NetworkDiscovery(probe=fake_probe, timeout=0.5, workers=100)
+    started = time.perf_counter()
+    entry = discovery.discover("node", [f"10.0.0.1:{port - 1}" for port in range(1000, 1300)])
+    elapsed = time.perf_counter() - started
+    assert len(entry["nodes"]) == 300
+    assert len(entry["reachable"]) == 150, len(entry["reachable"])
+    assert not any(node["error"] == "timeout" for node in entry["nodes"])
+    assert discovery.cached("node") is entry
+    print(f"✅ 150 of 150 reachable nodes found in {elapsed:.2f}s")
+
+    # Test 2: Concurrent refreshes share one listing and one round of probes, on the shared pool
+    listings = []
+    def list_addresses():
+        listings.append(threading.current_thread().name)
+        return [f"10.0.0.2:{port}" for port in range(2000, 2200)]
+    entries = []
+    callers = [threading.Thread(target=lambda: entries.append(discovery.get("other", list_addresses, refresh=True)))
+               for _ in range(5)]
+    for caller in callers:
+        caller.start()
+    for caller in callers:
+        caller.join()
+    assert len(listings) == 1 and all(entry is entries[0] for entry in entries)
+    assert len(entries[0]["nodes"]) == 200
+    assert discovery.get("other", list_addresses) is entries[0] and len(listings) == 1
+    probe_threads = [t for t in threading.enumerate() if t.name.startswith("probe")]
+    assert len(probe_threads) <= 100
+    print(f"✅ 5 concurrent refreshes, 1 listing, {len(probe_threads)} probe threads")
+
+    # Test 3: Real probes
+    print("\n2. Probing sockets...")
+    replying = socket.socket()
+    replying.bind(("127.0.0.1", 0))
+    replying.listen(5)
+    silent = socket.socket()
+    silent.bind(("127.0.0.1", 0))
+    silent.listen(5)
+
+    def serve():
+        conn, _ = replying.accept()
+        conn.recv(1024)
+        conn.sendall(b"HTTP/1.1 200 OK\r\nContent-Length: 0\r\n\r\n")
+        conn.close()
+
+    threading.Thread(target=serve, daemon=True).start()
+    result = probe_rest(f"127.0.0.1:{replying.getsockname()[1]}", timeout=2)
+    assert result["reachable"] and result["error"] is None
+    print(f"✅ Answering node reachable ({result['rtt_ms']} ms)")
+
+    # Accepts the connection but never replies: one deadline covers connect and read
+    started = time.perf_counter()
+    result = probe_rest(f"127.0.0.1:{silent.getsockname()[1]}", timeout=0.5)
+    elapsed = time.perf_counter() - started
+    assert not result["reachable"] and result["error"] == "timeout"
+    assert elapsed < 0.8, elapsed
+    print(f"✅ Silent node timed out after {elapsed:.2f}s")
+
+    closed = socket.socket()
+    closed.bind(("127.0.0.1", 0))
+    port = closed.getsockname()[1]
+    closed.close()
+    result = probe_rest(f"127.0.0.1:{port}", timeout=0.5)
+    assert not result["reachable"] and result["error"] == "ConnectionRefusedError"
+    print("✅ Closed port unreachable")
+
+    replying.close()
+    silent.close()
+
+    print("\n" + "=" * 50)
+    print("✅ Network discovery test completed!")
+
+if __name__ == "__main__":
+    test_discovery()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Test script for CSV file ingestion
+"""
+
+import sys
+import os
+import json
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from file_ingest import convert, csv_header, csv_ranges, detect_delimiter, detect_format, ingest_file
+
+def test_file_ingest():
+    print("Testing File Ingest")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "readings.csv")
+        with open(path, "w") as f:
+            f.write("timestamp,value,name,note\n")
+            for i in range(1000):
+                f.write(f'2025-01-01 10:{i % 60:02d}:00,{i if i % 2 else i / 2},"sensor, {i}",\n')
+
+        # Test 1: Byte ranges end on line breaks and cover the file
+        print("\n1. Splitting the file...")
+        header, data_start = csv_header(path, ",")
+        assert header == ["timestamp", "value", "name", "note"]
+        ranges = csv_ranges(path, data_start, 4096)
+        assert len(ranges) > 1 and ranges[0][0] == data_start and ranges[-1][1] == os.path.getsize(path)
+        assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+        print(f"✅ {len(ranges)} ranges")
+
+        # Test 2: Every row delivered once, in batches, with types inferred
+        print("\n2. Ingesting...")
+        received = []
+        def send(schema, payload, rows):
+            received.append((schema, json.loads(payload)))
+            return "ok"
+
+        stats = ingest_file(path, "test", "readings", send, batch_rows=300, workers=2, chunk_bytes=4096)
+        rows = [row for _, batch in received for row in batch]
+        assert stats["rows"] == len(rows) == 1000 and stats["failed_rows"] == 0
+        assert all(len(batch) <= 300 for _, batch in received)
+        assert sorted(row["name"] for row in rows) == sorted(f"sensor, {i}" for i in range(1000))
+        assert rows[0]["dbms"] == "test" and rows[0]["table"] == "readings" and rows[0]["note"] is None
+        assert received[0][0]["timestamp"] == "timestamp" and received[0][0]["value"] == "float"
+        print(f"✅ {stats['rows']} rows in {stats['batches']} batches, {stats['rows_per_sec']} rows/s")
+
+        # Test 3: Failed batches are counted, not raised
+        stats = ingest_file(path, "test", "readings", lambda schema, payload, rows: None, batch_rows=500, workers=1)
+        assert stats["rows"] == 0 and stats["failed_rows"] == 1000
+        print("✅ Failed batches reported")
+
+        # Test 4: Rows wider than the header are skipped and counted the same way by both paths
+        print("\n3. Malformed rows...")
+        wide = os.path.join(directory, "wide.csv")
+        with open(wide, "w") as f:
+            f.write("ts,value\n")
+            for i in range(200):
+                f.write(f"{i},{i},extra\n" if i % 10 == 0 else f"{i},{i}\n")
+        for workers in (1, 2):
+            received.clear()
+            stats = ingest_file(wide, "test", "readings", send, workers=workers, chunk_bytes=256)
+            rows = [row for _, batch in received for row in batch]
+            assert stats["rows"] == len(rows) == 180 and stats["failed_rows"] == 20, stats
+            assert all(row["value"] % 10 for row in rows)
+        print("✅ 20 wide rows skipped and counted with 1 and 2 workers")
+
+        # Test 5: Quoted fields spanning lines are not split between ranges
+        quoted = os.path.join(directory, "quoted.csv")
+        with open(quoted, "w") as f:
+            f.write("id,note,value\n")
+            for i in range(500):
+                f.write(f'{i},"line one\nline two, ""{i}""\nline three",{i}\n')
+        ranges = csv_ranges(quoted, csv_header(quoted, ",")[1], 256)
+        assert len(ranges) > 1
+        received.clear()
+        stats = ingest_file(quoted, "test", "readings", send, workers=2, chunk_bytes=256)
+        rows = [row for _, batch in received for row in batch]
+        assert stats["rows"] == 500 and stats["failed_rows"] == 0, stats
+        assert sorted(row["value"] for row in rows) == list(range(500))
+        assert all(row["note"] == f'line one\nline two, "{row["id"]}"\nline three' for row in rows)
+        print(f"✅ Quoted newlines kept whole across {len(ranges)} ranges")
+
+        # Test 6: Tab separated files
+        tsv = os.path.join(directory, "readings.tsv")
+        with open(tsv, "w") as f:
+            f.write("ts\tvalue\n")
+            for i in range(50):
+                f.write(f"2025-01-01 10:00:{i:02d}\t{i}\n")
+        received.clear()
+        stats = ingest_file(tsv, "test", "readings", send, workers=2)
+        rows = [row for _, batch in received for row in batch]
+        assert stats["rows"] == 50 and sorted(row["value"] for row in rows) == list(range(50))
+        print("✅ TSV split on tabs")
+
+    assert convert("") is None and convert("7") == 7 and convert("1.5") == 1.5 and convert("nan") == "nan"
+    assert convert("00123") == "00123" and convert("-01") == "-01" and convert("0") == 0 and convert("0.5") == 0.5
+    assert detect_format("x.parquet") == "parquet" and detect_format("x.CSV") == "csv"
+    assert detect_format("x.tsv") == "csv" and detect_delimiter("x.tsv") == "\t" and detect_delimiter("x.csv") == ","
+    print("✅ Cell conversion and format detection")
+
+    print("\n" + "=" * 50)
+    print("✅ File ingest test completed!")
+
+if __name__ == "__main__":
+    test_file_ingest()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Test script for the write-behind ingest buffers
+"""
+
+import sys
+import os
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from ingest_buffer import BufferFull, IngestBufferPool
+
+def test_ingest_buffer():
+    print("Testing Ingest Buffers")
+    print("=" * 50)
+
+    sent = []
+    node_up = threading.Event()
+    node_up.set()
+
+    def send(conn, dbms, table, rows):
+        if not node_up.is_set():
+            return None
+        sent.append(list(rows))
+        return "ok"
+
+    pool = IngestBufferPool(send, max_rows=100, max_delay=0.1, max_pending=250)
+    conn = "10.0.0.11:32249"
+
+    # Test 1: Small writes are coalesced
+    print("\n1. Coalescing small writes...")
+    for i in range(30):
+        pool.add(conn, "test", "readings", [{"value": i}])
+    time.sleep(0.4)
+    assert len(sent) == 1 and [r["value"] for r in sent[0]] == list(range(30))
+    print(f"✅ 30 writes sent as {len(sent)} batch")
+
+    # Test 2: Size threshold splits into max_rows batches
+    print("\n2. Size threshold...")
+    sent.clear()
+    pool.add(conn, "test", "readings", [{"value": i} for i in range(250)])
+    time.sleep(0.4)
+    assert [len(batch) for batch in sent] == [100, 100, 50]
+    print("✅ Flushed as 100/100/50")
+
+    # Test 3: Backpressure while the node is down, nothing lost
+    print("\n3. Backpressure...")
+    sent.clear()
+    node_up.clear()
+    pool.add(conn, "test", "readings", [{"value": i} for i in range(200)])
+    time.sleep(0.3)
+    try:
+        pool.add(conn, "test", "readings", [{"value": i} for i in range(100)])
+        assert False, "expected BufferFull"
+    except BufferFull as e:
+        print(f"✅ Rejected with retry_after={e.retry_after}: {e}")
+    node_up.set()
+    pool.add(conn, "test", "readings", [{"value": i} for i in range(100)], wait=2)
+    pool.flush_all()
+    assert sum(len(batch) for batch in sent) == 300
+    print("✅ Rows kept through failures and delivered once the node recovered")
+
+    metrics = pool.metrics()[0]
+    assert metrics["failures"] >= 1 and metrics["rejected_rows"] == 100 and metrics["pending_rows"] == 0
+    assert metrics["batch_size"]["max"] == 100
+    print(f"✅ Metrics: {metrics['batches']} batches, p50 flush {metrics['flush_latency_ms']['p50']} ms")
+
+    pool.stop()
+
+    # Test 4: Failed flushes back off instead of retrying every interval
+    print("\n4. Backoff and shutdown...")
+    node_up.clear()
+    pool = IngestBufferPool(send, max_rows=100, max_delay=0.1, max_pending=250)
+    pool.add(conn, "test", "readings", [{"value": i} for i in range(10)])
+    time.sleep(0.8)
+    metrics = pool.metrics()[0]
+    assert 1 <= metrics["failures"] <= 4, metrics
+    pool.stop(flush=False)
+    print(f"✅ {metrics['failures']} attempts in 0.8s while the node was down")
+
+    # Test 5: Shutdown waits for the running flush and sends rows added meanwhile
+    sent.clear()
+    node_up.set()
+    started = threading.Event()
+    def slow_send(conn, dbms, table, rows):
+        started.set()
+        time.sleep(0.3)
+        return send(conn, dbms, table, rows)
+    pool = IngestBufferPool(slow_send, max_rows=10, max_delay=0.05, max_pending=250)
+    pool.add(conn, "test", "readings", [{"value": i} for i in range(10)])
+    started.wait(2)
+    pool.add(conn, "test", "readings", [{"value": i} for i in range(10, 15)])
+    pool.stop(flush=True)
+    assert [row["value"] for batch in sent for row in batch] == list(range(15))
+    assert pool._executor is None
+    print("✅ Rows added during the last flush delivered at shutdown")
+
+    print("\n" + "=" * 50)
+    print("✅ Ingest buffer test completed!")
+
+if __name__ == "__main__":
+    test_ingest_buffer()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Test script for ingest de-duplication
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from ingest_dedup import Deduplicator, row_hash
+
+def test_ingest_dedup():
+    print("Testing Ingest De-duplication")
+    print("=" * 50)
+
+    dedup = Deduplicator(enabled=True, window=1000, batch_window=10)
+    batch = [{"ts": "2025-01-01 10:00:00", "value": i} for i in range(100)]
+
+    # Test 1: A retry racing the first attempt is dropped, a retry after a failure is not
+    print("\n1. Retries while the first attempt is pending...")
+    rows, token = dedup.filter("test", "readings", batch)
+    assert len(rows) == 100
+    retry, retry_token = dedup.filter("test", "readings", batch)
+    assert retry == [] and retry_token == ()
+    dedup.abort(token)
+    rows, token = dedup.filter("test", "readings", batch)
+    assert len(rows) == 100
+    dedup.commit(token)
+    print("✅ Pending batch suppresses its retry, failed send releases it")
+
+    # Test 2: Exact retry after the send dropped as a whole batch
+    print("\n2. Retries...")
+    rows, token = dedup.filter("test", "readings", batch)
+    assert rows == [] and token == ()
+    # Same rows in a different batch are real readings by default
+    overlap = [{"value": i, "ts": "2025-01-01 10:00:00"} for i in range(90, 110)]
+    rows, token = dedup.filter("test", "readings", overlap)
+    assert len(rows) == 20
+    dedup.abort(token)
+    # Row-level de-duplication is opt-in: only new rows kept, key order does not matter
+    rows, token = dedup.filter("test", "readings", overlap, by_row=True)
+    assert [row["value"] for row in rows] == list(range(100, 110))
+    dedup.commit(token)
+    assert dedup.seen("test", "readings", row_hash({"ts": "2025-01-01 10:00:00", "value": 105}))
+    assert not dedup.seen("test", "other", row_hash({"ts": "2025-01-01 10:00:00", "value": 105}))
+    stats = [s for s in dedup.stats() if s["table"] == "readings"][0]
+    assert stats["rows_suppressed"] == 210 and stats["batches_suppressed"] == 2
+    assert stats["pending_rows"] == 0 and stats["pending_batches"] == 0
+    print(f"✅ Suppressed {stats['rows_suppressed']} rows")
+
+    # Fully suppressed batch leaves nothing pending and is remembered as a batch
+    again = [{"value": i, "ts": "2025-01-01 10:00:00"} for i in range(95, 105)]
+    rows, token = dedup.filter("test", "readings", again, by_row=True)
+    assert rows == [] and token == ()
+    stats = [s for s in dedup.stats() if s["table"] == "readings"][0]
+    assert stats["pending_rows"] == 0 and stats["pending_batches"] == 0
+    rows, token = dedup.filter("test", "readings", again)
+    assert rows == [] and token == ()
+    print("✅ All-duplicate batch settled at once")
+
+    # Test 3: Duplicates inside one batch are kept
+    rows, _ = dedup.filter("test", "readings", [{"value": -1}, {"value": -1}], by_row=True)
+    assert len(rows) == 2
+    print("✅ Repeated rows within a batch kept")
+
+    # Test 4: Streaming claims hold rows until committed or aborted
+    print("\n3. Streaming claims...")
+    digest = row_hash({"value": "streamed"})
+    assert dedup.claim("test", "stream", digest)
+    assert not dedup.claim("test", "stream", digest)
+    dedup.abort(("test", "stream", [digest], None))
+    assert dedup.claim("test", "stream", digest)
+    dedup.commit(("test", "stream", [digest], None))
+    assert not dedup.claim("test", "stream", digest)
+    print("✅ Claimed rows held while in flight, released on failure")
+
+    # Test 5: Window stays bounded
+    small = Deduplicator(enabled=True, window=50, batch_window=2)
+    for i in range(10):
+        rows, token = small.filter("test", "readings", [{"i": i, "j": j} for j in range(20)], by_row=True)
+        small.commit(token)
+    stats = small.stats()[0]
+    assert stats["window"] == 50
+    print("✅ Exact window bounded")
+
+    # Test 6: Disabled passes everything through
+    rows, token = Deduplicator(enabled=False).filter("test", "readings", batch)
+    assert rows is batch and token == ()
+    print("✅ Disabled de-duplication passes rows through")
+
+    print("\n" + "=" * 50)
+    print("✅ Ingest de-duplication test completed!")
+
+if __name__ == "__main__":
+    test_ingest_dedup()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Test script for the monitor ring buffers and background poller
+"""
+
+import sys
+import os
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from ring_buffer import RingBuffer
+from monitor import MonitorPoller, MonitorRegistry
+from fleet_stats import fleet_summary, percentile
+
+def fake_operators(conn):
+    return [
+        {"Node": "10.0.0.1:32148", "node name": "operator1", "CPU Percent": "12.5", "Free Space Percent": "80%", "total rows": "1,200"},
+        {"Node": "10.0.0.2:32148", "node name": "operator2", "CPU Percent": "n/a", "Free Space Percent": "40.0"},
+    ]
+
+def test_ring_buffer():
+    print("Testing Ring Buffer")
+    print("=" * 50)
+
+    buffer = RingBuffer(4)
+    for i in range(6):
+        buffer.append(float(i), i * 10.0)
+
+    timestamps, values = buffer.snapshot()
+    assert timestamps == [2.0, 3.0, 4.0, 5.0]
+    assert values == [20.0, 30.0, 40.0, 50.0]
+    print("✅ Oldest samples overwritten, order preserved")
+
+    assert buffer.snapshot(since=3.5) == ([4.0, 5.0], [40.0, 50.0])
+    assert buffer.snapshot(limit=1) == ([5.0], [50.0])
+    assert buffer.latest() == (5.0, 50.0)
+    print("✅ since/limit/latest working")
+
+def test_monitor_poller():
+    print("\nTesting Monitor Poller")
+    print("=" * 50)
+
+    poller = MonitorPoller("10.0.0.11:32249", fake_operators, interval=0.05, capacity=10)
+
+    # Test 1: First read polls synchronously
+    print("\n1. Reading current sample...")
+    current = poller.current()
+    assert len(current["data"]) == 2 and current["sampled_at"] is not None
+    print("✅ Got latest sample")
+
+    # Test 2: Background thread keeps sampling
+    print("\n2. Waiting for background samples...")
+    time.sleep(0.3)
+    poller.stop()
+    history = poller.history(node="operator1")
+    cpu = history["operator1"]["CPU Percent"]["values"]
+    assert len(cpu) > 1 and all(v == 12.5 for v in cpu)
+    assert history["operator1"]["Free Space Percent"]["values"][0] == 80.0
+    assert history["operator1"]["total rows"]["values"][0] == 1200.0
+    print(f"✅ Collected {len(cpu)} CPU samples")
+
+    # Test 3: Non numeric values become null
+    history = poller.history(node="operator2", metric="CPU Percent")
+    assert history["operator2"]["CPU Percent"]["values"][0] is None
+    print("✅ Non numeric values reported as null")
+
+    # Test 4: Concurrent readers share one poll, a node that is down is not polled per reader
+    print("\n3. Concurrent readers...")
+    calls = []
+    down = threading.Event()
+    def slow_operators(conn):
+        calls.append(conn)
+        time.sleep(0.2)
+        if down.is_set():
+            raise ConnectionError("node down")
+        return fake_operators(conn)
+
+    poller = MonitorPoller("10.0.0.12:32249", slow_operators, interval=60, capacity=10)
+    readers = [threading.Thread(target=poller.current) for _ in range(5)]
+    for reader in readers:
+        reader.start()
+    for reader in readers:
+        reader.join()
+    assert len(calls) == 1 and len(poller.history()["operator1"]["CPU Percent"]["values"]) == 1
+    down.set()
+    poller.poll_once()
+    started = time.time()
+    current = [poller.current() for _ in range(5)][-1]
+    assert time.time() - started < 0.1 and len(calls) == 2
+    assert len(current["data"]) == 2 and current["error"] == "node down"
+    poller.stop()
+    print("✅ One upstream poll for 5 readers, last sample served while the node is down")
+
+    # Test 5: Registry keeps one poller per node
+    print("\n4. Testing registry...")
+    registry = MonitorRegistry(fetch=fake_operators, interval=60)
+    assert registry.get("a:1") is registry.get("a:1")
+    assert registry.unregister("a:1") and not registry.unregister("a:1")
+    print("✅ Registry working")
+
+    print("\n" + "=" * 50)
+    print("✅ Monitor test completed!")
+
+def test_fleet_summary():
+    print("\nTesting Fleet Summary")
+    print("=" * 50)
+
+    rows = [{"node name": f"operator{i}", "CPU Percent": str(i), "new rows": "1,000"} for i in range(1, 101)]
+    rows.append({"node name": "operator0", "CPU Percent": "n/a"})
+    summary = fleet_summary(rows, top_k=2)
+
+    cpu = summary["metrics"]["CPU Percent"]
+    assert cpu["count"] == 100 and cpu["missing"] == 1
+    assert cpu["min"] == 1.0 and cpu["max"] == 100.0 and cpu["mean"] == 50.5
+    assert cpu["percentiles"]["p50"] == 50.5
+    assert [t["node"] for t in cpu["top"]] == ["operator100", "operator99"]
+    assert [b["node"] for b in cpu["bottom"]] == ["operator1", "operator2"]
+    assert summary["metrics"]["new rows"]["sum"] == 100000.0
+    assert summary["metrics"]["Network Error"]["count"] == 0
+    assert percentile([1.0, 2.0, 3.0, 4.0], 90) == 3.7
+    print("✅ Percentiles, totals and top/bottom operators computed")
+
+if __name__ == "__main__":
+    test_ring_buffer()
+    test_monitor_poller()
+    test_fleet_summary()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Test script for the tiered on-disk monitor history
+"""
+
+import sys
+import os
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from monitor_store import MonitorStore
+
+def test_monitor_store():
+    print("Testing Monitor Store")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = MonitorStore(os.path.join(tmp, "monitor.db"))
+        conn = "10.0.0.11:32249"
+        start = float((int(time.time()) // 3600 - 3) * 3600)  # a few hours ago, on an hour boundary
+
+        # Test 1: Record two hours of 10s samples
+        print("\n1. Recording samples...")
+        for i in range(720):
+            rows = [{"node name": "operator1", "CPU Percent": str(i % 10), "Free Space Percent": "n/a"}]
+            store.record(conn, rows, start + i * 10)
+        print("✅ Recorded 720 samples")
+
+        # Test 2: Tier selection
+        print("\n2. Picking tiers...")
+        now = start + 7200
+        assert store.pick_tier(now - 600, now, None, 500, now=now)[0] == "raw"
+        assert store.pick_tier(now - 7200, now, None, 100, now=now)[0] == "1m"
+        assert store.pick_tier(now - 30 * 86400, now, None, 500, now=now)[0] == "1h"
+        assert store.pick_tier(now - 3 * 86400, now, 10, 500, now=now)[0] == "1m"  # raw no longer holds the start
+        assert store.pick_tier(now - 10 * 86400, now, 10, 500, now=now)[0] == "1h"
+        print("✅ Coarsest tier meeting the resolution chosen")
+
+        # Test 3: Query rollups
+        print("\n3. Querying...")
+        hourly = store.query(conn, "CPU Percent", start, end=now, resolution=3600)
+        assert hourly["tier"] == "1h" and hourly["rows"] == 2
+        series = hourly["series"]["operator1"]
+        assert series["values"] == [4.5, 4.5] and series["min"] == [0.0, 0.0] and series["max"] == [9.0, 9.0]
+        minutes = store.query(conn, "CPU Percent", start, end=now, resolution=60)
+        assert minutes["tier"] == "1m" and minutes["rows"] == 120
+        raw = store.query(conn, "CPU Percent", start, end=start + 95, resolution=1)
+        assert raw["tier"] == "raw" and raw["rows"] == 10
+        assert store.query(conn, "Free Space Percent", start, end=now)["rows"] == 0
+        print("✅ Raw, 1m and 1h tiers return expected rows")
+
+        # Test 4: Retention
+        print("\n4. Pruning...")
+        store.prune(now=start + 24 * 3600 + 3600)
+        assert store.query(conn, "CPU Percent", start, end=now, resolution=1)["rows"] == 360
+        store.close()
+        print("✅ Raw samples past retention removed")
+
+    print("\n" + "=" * 50)
+    print("✅ Monitor store test completed!")
+
+if __name__ == "__main__":
+    test_monitor_store()
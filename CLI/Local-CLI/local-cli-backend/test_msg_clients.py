@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test script for the message client registry used by /add-data/
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from msg_clients import MsgClientRegistry, parse_client_id
+
+class FakeNode:
+    """Records commands and keeps msg clients by topic like an AnyLog node"""
+
+    def __init__(self):
+        self.commands = []
+        self.clients = {}
+
+    def request(self, conn, method, command, **kwargs):
+        self.commands.append(command)
+        if command.startswith("get msg client where topic = "):
+            topic = command.rsplit(" ", 1)[1]
+            if topic in self.clients:
+                return f"Subscription ID: {self.clients[topic]}\nUser:       unused\n"
+            return "No message client subscriptions"
+        if command.startswith("run msg client"):
+            topic = command.split("name=", 1)[1].split(" ", 1)[0]
+            self.clients[topic] = len(self.clients) + 1
+            return None
+        if command.startswith("exit msg client"):
+            client_id = int(command.rsplit(" ", 1)[1])
+            self.clients = {t: i for t, i in self.clients.items() if i != client_id}
+        return None
+
+def build_command(schema, topic):
+    return f"run msg client where broker=rest and topic=(name={topic} and {sorted(schema)})"
+
+def test_msg_client_registry():
+    print("Testing Message Client Registry")
+    print("=" * 50)
+
+    node = FakeNode()
+    registry = MsgClientRegistry(request=node.request, build_command=build_command)
+    conn = "10.0.0.11:32249"
+    schema = {"timestamp": "timestamp", "value": "int"}
+
+    # Test 1: First batch creates a client
+    print("\n1. First batch...")
+    topic = registry.ensure_client(conn, "test", "readings", schema)
+    assert topic.startswith("new-data-") and len(node.clients) == 1
+    assert registry.lookup(conn, "test", "readings")["client_id"] == 1
+    print(f"✅ Created client on topic {topic} with {len(node.commands)} commands")
+
+    # Test 2: Same schema reuses it with no round trips
+    print("\n2. Same schema...")
+    node.commands.clear()
+    assert registry.ensure_client(conn, "test", "readings", dict(schema)) == topic
+    assert node.commands == []
+    print("✅ Client reused without contacting the node")
+
+    # Test 3: Schema change replaces the client
+    print("\n3. Schema change...")
+    new_topic = registry.ensure_client(conn, "test", "readings", {**schema, "value": "float"})
+    assert new_topic != topic
+    assert any(c == "exit msg client 1" for c in node.commands)
+    assert list(node.clients) == [new_topic]
+    print("✅ Old client exited, new client registered")
+
+    # Test 4: After a restart of the backend an existing client is adopted
+    print("\n4. Adopting an existing client...")
+    fresh = MsgClientRegistry(request=node.request, build_command=build_command)
+    node.commands.clear()
+    assert fresh.ensure_client(conn, "test", "readings", {**schema, "value": "float"}) == new_topic
+    assert not any(c.startswith("run msg client") for c in node.commands)
+    print("✅ Existing client found on the node and reused")
+
+    assert parse_client_id("No message client subscriptions") is None
+    assert parse_client_id("Subscription ID: 7\n") == 7
+
+    print("\n" + "=" * 50)
+    print("✅ Message client registry test completed!")
+
+if __name__ == "__main__":
+    test_msg_client_registry()
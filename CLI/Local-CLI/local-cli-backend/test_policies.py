@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Test script for policy publishing (/submit-policy/ and /submit-policies/)
+"""
+
+import sys
+import os
+import json
+import threading
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from policies import PolicyPublisher, failed, find_policy, parse_master
+from classes import Policy
+
+class FakeLedger:
+    """Keeps node variables and a master ledger like an AnyLog node"""
+
+    def __init__(self, master="10.0.0.10:32048"):
+        self.master = master
+        self.commands = []
+        self.variables = {}
+        self.ledger = []
+        self.lock = threading.Lock()
+
+    def request(self, conn, method, command, **kwargs):
+        with self.lock:
+            self.commands.append(command)
+            if " = create policy " in command:
+                variable, rest = command.split(" = create policy ", 1)
+                name, _, where = rest.partition(" where ")
+                body = dict(pair.split(" = ", 1) for pair in where.split(" and "))
+                self.variables[variable] = {name: body}
+                return True
+            if command == "blockchain get master bring.ip_port":
+                return self.master + "\r\n" if self.master else ""
+            if command.startswith("blockchain insert"):
+                variable = command.split("policy = !", 1)[1].split(" ", 1)[0]
+                master = command.rsplit("master = ", 1)[1]
+                if master != self.master:
+                    return False
+                policy = json.loads(json.dumps(self.variables[variable]))
+                policy[next(iter(policy))]["id"] = f"id{len(self.ledger)}"
+                self.ledger.append(policy)
+                return True
+            if command.startswith("blockchain get "):
+                name = command.split(" ")[2]
+                return [p for p in self.ledger if name in p]
+        return None
+
+def test_policies():
+    print("Testing Policy Publishing")
+    print("=" * 50)
+
+    node = FakeLedger()
+    publisher = PolicyPublisher(node.request, ttl=60, workers=4)
+
+    # Test 1: One policy is create + insert + read back, master looked up once
+    print("\n1. Single policy...")
+    response = publisher.submit("10.0.0.11:32249", "operator", {"name": "op1", "company": "acme"})
+    assert response[0]["operator"]["id"] == "id0"
+    assert len(node.commands) == 4
+    node.commands.clear()
+    publisher.submit("10.0.0.11:32249", "operator", {"name": "op2", "company": "acme"})
+    assert len(node.commands) == 3 and not any("master bring" in c for c in node.commands)
+    print("✅ 3 round trips per policy, master address cached")
+
+    # Test 2: Bulk with per-policy results in request order
+    print("\n2. Bulk...")
+    policies = [Policy(name="cluster" if i % 3 == 0 else "operator", data={"name": f"bulk{i}", "company": "acme"})
+                for i in range(12)]
+    node.commands.clear()
+    results = publisher.submit_many("10.0.0.11:32249", policies)
+    assert [r["status"] for r in results] == ["ok"] * 12
+    assert [r["policy"][p.name]["name"] for r, p in zip(results, policies)] == [f"bulk{i}" for i in range(12)]
+    assert len({r["id"] for r in results}) == 12
+    reads = [c for c in node.commands if c.startswith("blockchain get ") and "master" not in c]
+    assert len(reads) == 2
+    print(f"✅ 12 policies in {len(node.commands)} commands, one read per policy type")
+    publisher.submit_many("10.0.0.11:32249", policies)
+    assert len(node.variables) <= 2 + 4
+    print(f"✅ {len(node.variables)} node variables after 24 bulk policies")
+
+    # Test 3: A moved master is looked up again, no master is reported
+    node.master = "10.0.0.20:32048"
+    assert publisher.publish("10.0.0.11:32249", "operator", {"name": "op3"}) is None
+    assert publisher.master("10.0.0.11:32249") == "10.0.0.20:32048"
+    node.master = None
+    results = publisher.submit_many("10.0.0.11:32249", [Policy(name="operator", data={"name": "op4"})])
+    assert results[0]["status"] == "error" and results[0]["id"] is None
+    print("✅ Stale master refreshed, missing master reported per policy")
+
+    # Test 4: Parsing helpers
+    assert parse_master("10.0.0.10:32048\r\n") == "10.0.0.10:32048"
+    assert parse_master("") is None
+    assert find_policy(json.dumps(node.ledger), "operator", {"name": "op1"})["operator"]["id"] == "id0"
+    assert failed(json.dumps([{"sensor": {"name": "Failed pump", "status": "error"}}])) is None
+    assert failed("Failed to insert policy\r\n") == "Failed to insert policy"
+    assert failed('{"AnyLog.error on REST server": "Unrecognized command"}') == "Unrecognized command"
+    assert failed(True) is None and failed(None) and failed(False)
+    print("✅ Master, policy and error parsing")
+
+    print("\n" + "=" * 50)
+    print("✅ Policy publishing test completed!")
+
+if __name__ == "__main__":
+    test_policies()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Test script for server-side result set windows (sort, filter, offset/limit)
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from result_cache import ResultSet, ResultSetCache
+
+def test_result_windows():
+    print("Testing Result Set Windows")
+    print("=" * 50)
+
+    cache = ResultSetCache(max_entries=2, ttl=60)
+    rows = [
+        {"node": f"node{i}", "cpu": str(i % 7), "status": "up" if i % 2 else "down"}
+        for i in range(1000)
+    ]
+
+    # Test 1: Store a result set
+    print("\n1. Storing result set...")
+    handle = cache.store(rows, command="get monitored operators")
+    result_set = cache.get(handle)
+    assert result_set is not None
+    print(f"✅ Stored {len(result_set.rows)} rows under {handle}")
+
+    # Test 2: Unsorted window
+    print("\n2. Getting first window...")
+    window = result_set.window(offset=10, limit=5)
+    assert [row["node"] for row in window["rows"]] == [f"node{i}" for i in range(10, 15)]
+    assert window["total"] == 1000
+    print("✅ Window returned rows 10-14")
+
+    # Test 3: Numeric sort on string values
+    print("\n3. Sorting by cpu (numeric strings)...")
+    window = result_set.window(offset=0, limit=3, sort_by="cpu", descending=True)
+    assert [row["cpu"] for row in window["rows"]] == ["6", "6", "6"]
+    window = result_set.window(offset=999, limit=10, sort_by="cpu", descending=True)
+    assert [row["cpu"] for row in window["rows"]] == ["0"]
+    print("✅ Sort index orders numeric strings numerically")
+
+    # Missing values stay last and ties keep their order in both directions
+    mixed = ResultSet([{"id": i, "v": v} for i, v in enumerate(["2", None, "10", "", "2", "b", "a", "2"])])
+    ascending = [row["id"] for row in mixed.window(limit=10, sort_by="v")["rows"]]
+    descending = [row["id"] for row in mixed.window(limit=10, sort_by="v", descending=True)["rows"]]
+    assert ascending == [0, 4, 7, 2, 6, 5, 1, 3]
+    assert descending == [5, 6, 2, 0, 4, 7, 1, 3]
+    print("✅ Descending sort keeps missing values last and ties stable")
+
+    # Test 4: Filters combined with sort
+    print("\n4. Filtering status = up and cpu >= 5...")
+    filters = [{"column": "status", "op": "eq", "value": "up"}, {"column": "cpu", "op": "ge", "value": 5}]
+    window = result_set.window(offset=0, limit=1000, sort_by="cpu", filters=filters)
+    assert window["filtered"] == len([r for r in rows if r["status"] == "up" and int(r["cpu"]) >= 5])
+    assert all(row["status"] == "up" and int(row["cpu"]) >= 5 for row in window["rows"])
+    assert [row["cpu"] for row in window["rows"]] == sorted(row["cpu"] for row in window["rows"])
+    print(f"✅ Filtered view has {window['filtered']} rows")
+
+    # Comparisons only match values of the same kind, blanks never match
+    mixed = ResultSet([{"cpu": v} for v in ["3", "", None, "n/a", "9", "12"]])
+    def matching(op, value):
+        return [row["cpu"] for row in mixed.window(limit=10, filters=[{"column": "cpu", "op": op, "value": value}])["rows"]]
+    assert matching("gt", 5) == ["9", "12"]
+    assert matching("le", "9") == ["3", "9"]
+    assert matching("ne", 3) == ["9", "12"]
+    assert matching("ge", "m") == ["n/a"]
+    assert matching("eq", "") == ["", None]
+    assert matching("ne", None) == ["3", "n/a", "9", "12"]
+    print("✅ Numeric filters skip text and blank cells")
+
+    # Test 5: Unknown column and op are rejected
+    print("\n5. Testing invalid sort/filter...")
+    for kwargs in ({"sort_by": "missing"}, {"filters": [{"column": "cpu", "op": "like", "value": 1}]},
+                   {"filters": [{"column": "missing", "op": "eq", "value": 1}]},
+                   {"filters": [{"column": "cpu", "op": "gt", "value": ""}]}):
+        try:
+            result_set.window(**kwargs)
+            assert False, f"expected ValueError for {kwargs}"
+        except ValueError as e:
+            print(f"✅ Rejected: {e}")
+
+    # Test 6: LRU eviction
+    print("\n6. Testing eviction...")
+    cache.store(rows[:10])
+    cache.store(rows[:10])
+    assert cache.get(handle) is None
+    print("✅ Oldest result set evicted")
+
+    print("\n" + "=" * 50)
+    print("✅ Result set window test completed!")
+
+if __name__ == "__main__":
+    test_result_windows()
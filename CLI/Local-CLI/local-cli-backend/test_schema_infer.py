@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Test script for sampled schema inference
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from schema_infer import SchemaInferer, sample_rows, widen
+
+def test_schema_infer():
+    print("Testing Schema Inference")
+    print("=" * 50)
+
+    inferer = SchemaInferer(sample_size=100)
+
+    # Test 1: Widening within a batch
+    print("\n1. Widening types...")
+    rows = [{"value": 1, "flag": True, "name": "a", "ts": "2025-01-01 10:00:00"}] * 10
+    rows = rows + [{"value": 2.5, "flag": 1, "name": 3, "ts": "2025-01-01T10:00:01.5Z", "extra": None}]
+    schema = inferer.infer(rows)
+    assert schema == {"value": "float", "flag": "int", "name": "str", "ts": "timestamp", "extra": "str"}
+    assert widen("int", "timestamp") == "str" and widen(None, "int") == "int"
+    print("✅ int -> float -> str widening and timestamp detection")
+
+    # Test 2: Sample includes rows from the tail of a large batch
+    print("\n2. Sampling...")
+    rows = [{"value": i} for i in range(10000)]
+    sample = sample_rows(rows, 100)
+    assert len(sample) == 100 and sample[0]["value"] == 0 and sample[-1]["value"] > 9800
+    print("✅ Sample spread across the batch")
+
+    # Test 3: Per-table cache only widens
+    print("\n3. Caching per table...")
+    assert inferer.infer([{"value": 1, "ts": "2025-01-01 10:00:00"}], "test", "readings") == {"value": "int", "ts": "timestamp"}
+    assert inferer.infer([{"value": 1.5, "ts": "2025-01-01 10:00:00"}], "test", "readings") == {"value": "float", "ts": "timestamp"}
+    assert inferer.infer([{"value": 2}], "test", "readings") == {"value": "float", "ts": "timestamp"}
+    assert inferer.infer([{"value": 2}], "test", "other") == {"value": "int"}
+    inferer.forget("test", "readings")
+    assert inferer.infer([{"value": 2}], "test", "readings") == {"value": "int"}
+    print("✅ Cached schemas merged and widened")
+
+    print("\n" + "=" * 50)
+    print("✅ Schema inference test completed!")
+
+if __name__ == "__main__":
+    test_schema_infer()
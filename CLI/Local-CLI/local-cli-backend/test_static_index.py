@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Test script for the static directory index
+"""
+
+import sys
+import os
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from static_index import StaticIndex
+from blob_cache import BlobCache
+
+def test_static_index():
+    print("Testing Static Index")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.makedirs(os.path.join(directory, "thumbnails"))
+        for i in range(2000):
+            with open(os.path.join(directory, f"edgex.factory_imgs.{i:04d}.jpeg"), "wb") as f:
+                f.write(b"x")
+        for name in ("flower.jpg", "thumbnails/flower.jpg.jpg", "edgex.videos.1.mp4"):
+            with open(os.path.join(directory, name), "wb") as f:
+                f.write(b"x")
+
+        index = StaticIndex(directory, watch=False)
+
+        # Test 1: Same listing as walking the tree, sorted
+        print("\n1. Building...")
+        files, total = index.page()
+        walked = sorted(os.path.relpath(os.path.join(root, f), directory)
+                        for root, _, names in os.walk(directory) for f in names)
+        assert files == walked and total == 2003
+        print(f"✅ {total} files indexed")
+
+        # Test 2: Pages and prefixes
+        files, total = index.page(offset=100, limit=50, prefix="edgex.factory_imgs.")
+        assert total == 2000 and files[0] == "edgex.factory_imgs.0100.jpeg" and len(files) == 50
+        files, total = index.page(offset=1990, limit=50, prefix="edgex.factory_imgs.")
+        assert len(files) == 10
+        assert index.page(prefix="thumbnails/") == (["thumbnails/flower.jpg.jpg"], 1)
+        assert index.page(prefix="nothing") == ([], 0)
+        print("✅ Pagination and prefix filtering")
+
+        # Test 3: Kept current by the blob cache, which adopts the 2001 blobs already there
+        cache = BlobCache(directory, max_bytes=2005, index_path=None)
+        cache.add_listener(index.on_cache_event)
+        for name in ("edgex.factory_imgs.0000.jpeg", "edgex.factory_imgs.0001.jpeg"):
+            cache.add("edgex", "factory_imgs", name.split(".", 2)[2])
+        with open(os.path.join(directory, "edgex.new.a.jpeg"), "wb") as f:
+            f.write(b"x" * 2003)
+        cache.add("edgex", "new", "a.jpeg")
+        assert index.page(prefix="edgex.new.")[0] == ["edgex.new.a.jpeg"]
+        assert index.page(prefix="edgex.factory_imgs.")[0] == ["edgex.factory_imgs.0000.jpeg", "edgex.factory_imgs.0001.jpeg"]
+        assert index.page(prefix="edgex.videos.")[1] == 0
+        index.on_file_event("removed", os.path.join(directory, "thumbnails/flower.jpg.jpg"))
+        assert index.page(prefix="thumbnails/")[1] == 0
+        print("✅ Index follows cache additions and evictions")
+
+        # Test 4: A page is cheap compared with walking the tree
+        started = time.perf_counter()
+        for _ in range(100):
+            index.page(offset=1000, limit=50, prefix="edgex.")
+        paged = time.perf_counter() - started
+        started = time.perf_counter()
+        for _ in range(100):
+            list(os.walk(directory))
+        assert paged < time.perf_counter() - started
+        print(f"✅ 100 pages in {paged * 1000:.1f} ms")
+
+    print("\n" + "=" * 50)
+    print("✅ Static index test completed!")
+
+if __name__ == "__main__":
+    test_static_index()
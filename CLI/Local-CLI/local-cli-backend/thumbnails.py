@@ -0,0 +1,196 @@
+import hashlib
+import importlib.util
+import json
+import mimetypes
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional
+
+# Longest edge of a thumbnail (pixels), JPEG quality and number of worker processes
+THUMBNAIL_SIZE = int(os.getenv('THUMBNAIL_SIZE', '320'))
+THUMBNAIL_QUALITY = int(os.getenv('THUMBNAIL_QUALITY', '80'))
+THUMBNAIL_WORKERS = int(os.getenv('THUMBNAIL_WORKERS', str(max((os.cpu_count() or 2) // 2, 1))))
+
+# Overlay outline colour and width (pixels, on the thumbnail)
+BBOX_COLOR = (255, 64, 64)
+BBOX_WIDTH = 2
+
+
+def thumbnails_available() -> bool:
+    return importlib.util.find_spec("PIL") is not None
+
+
+def is_image(name: str) -> bool:
+    media_type = mimetypes.guess_type(name)[0] or ""
+    return media_type.startswith("image/")
+
+
+def parse_bbox(bbox) -> List[List[float]]:
+    """
+    Boxes as [[x1, y1, x2, y2], ...] from a single box, a list of boxes or their JSON text.
+    """
+    if bbox is None or bbox == "":
+        return []
+    if isinstance(bbox, str):
+        try:
+            bbox = json.loads(bbox)
+        except ValueError:
+            return []
+    if not isinstance(bbox, (list, tuple)) or not bbox:
+        return []
+    boxes = [bbox] if all(isinstance(v, (int, float)) for v in bbox) else bbox
+    return [[float(v) for v in box[:4]] for box in boxes
+            if isinstance(box, (list, tuple)) and len(box) >= 4 and all(isinstance(v, (int, float)) for v in box[:4])]
+
+
+def thumbnail_name(name: str, boxes: Optional[List[List[float]]] = None) -> str:
+    if not boxes:
+        return f"{name}.jpg"
+    digest = hashlib.sha1(json.dumps(boxes).encode()).hexdigest()[:8]
+    return f"{name}.{digest}.jpg"
+
+
+def render_thumbnail(source: str, target: str, size: int, quality: int, boxes: List[List[float]]) -> Dict:
+    """
+    Process pool task: scale an image down (letting the JPEG decoder skip
+    resolution it does not need) and draw the boxes on it.
+    """
+    from PIL import Image, ImageDraw
+
+    with Image.open(source) as image:
+        original = image.size
+        image.draft("RGB", (size, size))
+        image = image.convert("RGB")
+        image.thumbnail((size, size))
+
+        if boxes:
+            # Boxes in [0, 1] are relative; anything else is in original pixels
+            normalized = all(0 <= v <= 1 for box in boxes for v in box)
+            sx = image.width if normalized else image.width / original[0]
+            sy = image.height if normalized else image.height / original[1]
+            draw = ImageDraw.Draw(image)
+            for x1, y1, x2, y2 in boxes:
+                draw.rectangle([x1 * sx, y1 * sy, x2 * sx, y2 * sy], outline=BBOX_COLOR, width=BBOX_WIDTH)
+
+        partial = f"{target}.part.{os.getpid()}"
+        image.save(partial, "JPEG", quality=quality, optimize=True)
+        os.replace(partial, target)
+        return {"width": image.width, "height": image.height, "bytes": os.path.getsize(target)}
+
+
+class ThumbnailPipeline:
+    """
+    Generates JPEG previews for fetched image blobs in a process pool and keeps
+    them in a thumbnails/ directory next to the originals. Requests for a preview
+    that is already being rendered share the same task. Listeners are told about
+    every preview written or removed (fn(event, path), event "added" or "removed").
+    """
+
+    def __init__(self, directory: str, size: int = THUMBNAIL_SIZE, quality: int = THUMBNAIL_QUALITY,
+                 workers: int = THUMBNAIL_WORKERS):
+        self.directory = directory
+        self.thumbnail_dir = os.path.join(directory, "thumbnails")
+        self.size = size
+        self.quality = quality
+        self.workers = workers
+        self.enabled = thumbnails_available()
+        self._executor = None
+        self._pending = {}
+        self.listeners = []
+        self._lock = threading.Lock()
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def _notify(self, event: str, path: str):
+        for listener in self.listeners:
+            try:
+                listener(event, path)
+            except Exception as e:
+                print(f"Thumbnail listener failed on {event} {path}: {e}")
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: the server process has threads, forking it is not safe
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    def path(self, name: str, boxes: Optional[List[List[float]]] = None) -> str:
+        return os.path.join(self.thumbnail_dir, thumbnail_name(name, boxes))
+
+    def submit(self, name: str, bbox=None) -> Optional[Future]:
+        """
+        Render the preview of static/<name> in the background; None when there is
+        nothing to do (not an image, already rendered, or Pillow missing).
+        """
+        boxes = parse_bbox(bbox)
+        target = self.path(name, boxes)
+        if not self.enabled or not is_image(name) or os.path.exists(target):
+            return None
+        with self._lock:
+            future = self._pending.get(target)
+            if future is not None:
+                return future
+            os.makedirs(self.thumbnail_dir, exist_ok=True)
+            future = self._pool().submit(render_thumbnail, os.path.join(self.directory, name), target,
+                                         self.size, self.quality, boxes)
+            self._pending[target] = future
+        future.add_done_callback(lambda _: self._done(target))
+        return future
+
+    def _done(self, target: str):
+        with self._lock:
+            future = self._pending.pop(target, None)
+        if future is None or future.cancelled():
+            return
+        if future.exception() is None:
+            self._notify("added", target)
+            return
+        print(f"Error rendering {target}: {future.exception()}")
+        if isinstance(future.exception(), BrokenProcessPool):
+            # A worker died (e.g. a decoder crash); start a fresh pool on the next submit
+            with self._lock:
+                self._executor = None
+
+    def ensure(self, name: str, bbox=None, timeout: float = 30) -> Optional[str]:
+        """
+        Path of the rendered preview, waiting for it if needed.
+        """
+        target = self.path(name, parse_bbox(bbox))
+        future = self.submit(name, bbox)
+        if future is not None:
+            future.result(timeout=timeout)
+        return target if os.path.exists(target) else None
+
+    def remove(self, name: str):
+        """
+        Drop every preview of a blob (e.g. when the original is evicted).
+        """
+        if not os.path.isdir(self.thumbnail_dir):
+            return
+        variant = re.compile(re.escape(name) + r"(\.[0-9a-f]{8})?\.jpg$")
+        for entry in os.listdir(self.thumbnail_dir):
+            if variant.match(entry):
+                path = os.path.join(self.thumbnail_dir, entry)
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                self._notify("removed", path)
+
+    def on_cache_event(self, event: str, entry: Dict):
+        """
+        Blob cache listener: render on arrival, clean up on eviction.
+        """
+        if event == "added":
+            self.submit(entry["name"])
+        elif event == "evicted":
+            self.remove(entry["name"])
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,97 @@
+import functools
+import json
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from fastapi.responses import Response
+
+# Timings of the request currently being handled (None outside of an instrumented endpoint)
+_current_timings: ContextVar[Optional["Timings"]] = ContextVar("current_timings", default=None)
+
+
+class Timings:
+    """
+    Per-request latency breakdown.
+    Stages with the same name (e.g. several upstream calls) are summed.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.counts = {}
+        self.started = time.perf_counter()
+
+    def add(self, name: str, duration_ms: float):
+        self.stages[name] = self.stages.get(name, 0.0) + duration_ms
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, (time.perf_counter() - start) * 1000)
+
+    @contextmanager
+    def activate(self):
+        token = _current_timings.set(self)
+        try:
+            yield self
+        finally:
+            _current_timings.reset(token)
+
+    def total_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def as_dict(self) -> Dict:
+        stages = {name: round(duration, 3) for name, duration in self.stages.items()}
+        stages["total"] = round(self.total_ms(), 3)
+        return stages
+
+    def server_timing_header(self) -> str:
+        """
+        Format as a Server-Timing header value, e.g. "upstream;dur=120.5, parse;dur=3.2".
+        """
+        return ", ".join(f"{name};dur={duration}" for name, duration in self.as_dict().items())
+
+
+def timed(name: str):
+    """
+    Decorator recording the wrapped call as a stage of the active request timings.
+    Costs a single context lookup when no endpoint is collecting timings.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            timings = _current_timings.get()
+            if timings is None:
+                return func(*args, **kwargs)
+            with timings.stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def timed_json_response(content, timings: Timings, include_timings: bool = False) -> Response:
+    """
+    Serialise content as JSON (recorded as the "serialise" stage) and attach the
+    breakdown as a Server-Timing header and, if requested, a "timings" block.
+    """
+    with timings.stage("serialise"):
+        body = json.dumps(content, default=str)
+
+    if include_timings and isinstance(content, dict):
+        # Splice the timings block into the already serialised object instead of encoding twice
+        block = json.dumps(timings.as_dict())
+        if content:
+            body = '{"timings": ' + block + ', ' + body[1:]
+        else:
+            body = '{"timings": ' + block + '}'
+
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"Server-Timing": timings.server_timing_header()},
+    )
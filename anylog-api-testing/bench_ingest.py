@@ -0,0 +1,186 @@
+"""
+Ingest throughput benchmark against a local stub node (see stub_node.py).
+
+Drives helpers.send_json_data directly and/or the backend's /add-data/ endpoint
+over HTTP at each combination of batch size and concurrency, and reports rows/s,
+p50/p99 request latency and process memory.
+
+Usage:
+    python bench_ingest.py --target both --batch-sizes 100,1000,5000 --concurrency 1,4,16
+    python bench_ingest.py --target api --api-url http://127.0.0.1:8000 --conn 10.0.0.11:32249
+"""
+
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import random
+import resource
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from stub_node import start_stub
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'CLI', 'Local-CLI', 'local-cli-backend')
+sys.path.append(os.path.abspath(BACKEND_DIR))
+
+DBMS = 'anylog_node_db'
+TABLE = 'bench_data'
+
+
+def make_batch(size: int, start: int):
+    now = datetime.datetime.now()
+    return [{
+        "timestamp": (now + datetime.timedelta(microseconds=start + i)).strftime('%Y-%m-%dT%H:%M:%S.%f'),
+        "device": f"my-device{(start + i) % 10}",
+        "value": random.randint(1, 100),
+        "seq": start + i,
+    } for i in range(size)]
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * q / 100), len(ordered) - 1)] if ordered else None
+
+
+def max_rss_mb() -> float:
+    # ru_maxrss is KB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def helpers_sender(conn: str):
+    import helpers
+
+    def send(batch):
+        return helpers.send_json_data(conn=conn, dbms=DBMS, table=TABLE, data=batch) is not None
+    return send
+
+
+def api_sender(api_url: str, conn: str):
+    session = requests.Session()
+
+    def send(batch):
+        body = {"conn": {"conn": conn}, "dbconn": {"dbms": DBMS, "table": TABLE}, "data": batch}
+        response = session.post(f"{api_url}/add-data/", json=body, timeout=60)
+        return response.status_code == 200
+    return send
+
+
+def start_backend() -> str:
+    import uvicorn
+    import main
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(main.app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, name="bench-backend", daemon=True).start()
+    deadline = time.time() + 15
+    while not server.started and time.time() < deadline:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+
+def run(send, batch_size: int, concurrency: int, batches: int, quiet: bool):
+    """
+    Every worker sends `batches` batches back to back.
+    """
+    latencies = []
+    failures = 0
+    lock = threading.Lock()
+    counter = iter(range(10 ** 12))
+
+    def worker():
+        nonlocal failures
+        for _ in range(batches):
+            with lock:
+                start_seq = next(counter) * batch_size
+            batch = make_batch(batch_size, start_seq)
+            started = time.perf_counter()
+            ok = send(batch)
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                failures += 0 if ok else 1
+
+    output = open(os.devnull, 'w') if quiet else sys.stdout
+    started = time.perf_counter()
+    # The backend prints every request; keep that out of the timings
+    with contextlib.redirect_stdout(output), ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(worker) for _ in range(concurrency)]:
+            future.result()
+    wall = time.perf_counter() - started
+    if quiet:
+        output.close()
+
+    rows = (len(latencies) - failures) * batch_size
+    return {
+        "batch_size": batch_size,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "failures": failures,
+        "rows": rows,
+        "rows_per_sec": round(rows / wall, 1) if wall else None,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_rss_mb": max_rss_mb(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest throughput benchmark")
+    parser.add_argument("--target", choices=("helpers", "api", "both"), default="both")
+    parser.add_argument("--batch-sizes", default="100,1000,5000")
+    parser.add_argument("--concurrency", default="1,4,16")
+    parser.add_argument("--batches", type=int, default=20, help="batches per worker")
+    parser.add_argument("--conn", default=None, help="node to ingest into (default: start a local stub)")
+    parser.add_argument("--api-url", default=None, help="running backend (default: start one in-process)")
+    parser.add_argument("--latency", type=float, default=0.0, help="stub data POST latency in ms")
+    parser.add_argument("--jitter", type=float, default=0.0, help="stub latency jitter in ms")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parser.add_argument("--verbose", action="store_true", help="keep backend output")
+    args = parser.parse_args()
+
+    node = None
+    conn = args.conn
+    if conn is None:
+        server, node = start_stub(0, latency=args.latency / 1000, jitter=args.jitter / 1000)
+        conn = f"127.0.0.1:{server.server_address[1]}"
+
+    targets = ["helpers", "api"] if args.target == "both" else [args.target]
+    senders = {}
+    if "helpers" in targets:
+        senders["helpers"] = helpers_sender(conn)
+    if "api" in targets:
+        senders["api"] = api_sender(args.api_url or start_backend(), conn)
+
+    results = []
+    for target, send in senders.items():
+        for batch_size in [int(v) for v in args.batch_sizes.split(",")]:
+            for concurrency in [int(v) for v in args.concurrency.split(",")]:
+                result = {"target": target, **run(send, batch_size, concurrency, args.batches, not args.verbose)}
+                results.append(result)
+                if not args.json:
+                    print(f"{target:8} batch={batch_size:<6} conc={concurrency:<3} "
+                          f"{result['rows_per_sec']:>11} rows/s  p50={result['p50_ms']:>8} ms  "
+                          f"p99={result['p99_ms']:>8} ms  fail={result['failures']}  rss={result['max_rss_mb']} MB")
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    if node is not None:
+        print(f"stub node received {node.total_rows()} rows", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Local stand-in for an AnyLog / EdgeLake node's REST interface, for benchmarks and
+tests that should not depend on a real node.
+
+Emulates the commands used by the ingest path:
+    get status
+    get msg client [where topic = <name>]
+    run msg client where ... topic=(name=<name> and ...)
+    exit msg client <id>
+    data                  (POST, topic header, JSON array body)
+    get streaming
+
+Usage:
+    python stub_node.py --port 32249 --latency 5 --jitter 2
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TOPIC_NAME = re.compile(r"topic\s*=\s*\(\s*name\s*=\s*([^\s)]+)")
+
+
+class StubNode:
+    """
+    In-memory node state shared by the request handlers.
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, fail_rate: float = 0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.fail_rate = fail_rate
+        self.clients = {}
+        self.next_id = 1
+        self.rows = {}
+        self.calls = {}
+        self.lock = threading.Lock()
+
+    def delay(self):
+        wait = self.latency + random.uniform(-self.jitter, self.jitter)
+        if wait > 0:
+            time.sleep(wait)
+
+    def handle(self, method: str, command: str, topic: str, body: bytes):
+        """
+        Returns (status, text).
+        """
+        command = command.strip()
+        with self.lock:
+            key = command.split(" where ")[0] if command != "data" else "data"
+            self.calls[key] = self.calls.get(key, 0) + 1
+
+        if command == "get status":
+            return 200, "'stub@127.0.0.1' running"
+
+        if command.startswith("get msg client"):
+            match = re.search(r"topic\s*=\s*(\S+)", command)
+            with self.lock:
+                clients = [(client_id, client) for client_id, client in self.clients.items()
+                           if match is None or client["topic"] == match.group(1)]
+            if not clients:
+                return 200, "No message client subscriptions"
+            return 200, "\n".join(
+                f"Subscription ID: {client_id}\nTopic: {client['topic']}\nMessages: {client['messages']}\n"
+                for client_id, client in clients
+            )
+
+        if command.startswith("run msg client"):
+            match = TOPIC_NAME.search(command)
+            if match is None:
+                return 400, "Missing topic name"
+            with self.lock:
+                client_id = self.next_id
+                self.next_id += 1
+                self.clients[client_id] = {"topic": match.group(1), "command": command, "messages": 0}
+            return 200, ""
+
+        if command.startswith("exit msg client"):
+            client_id = command.rsplit(" ", 1)[-1]
+            with self.lock:
+                removed = client_id.isdigit() and self.clients.pop(int(client_id), None) is not None
+            return (200, "") if removed else (400, f"No message client {client_id}")
+
+        if command == "data":
+            self.delay()
+            if self.fail_rate and random.random() < self.fail_rate:
+                return 503, "Node busy"
+            with self.lock:
+                client = next((c for c in self.clients.values() if c["topic"] == topic), None)
+            if client is None:
+                return 400, f"No message client for topic '{topic}'"
+            try:
+                rows = json.loads(body)
+            except ValueError:
+                return 400, "Payload is not JSON"
+            with self.lock:
+                client["messages"] += 1
+                for row in rows:
+                    key = (row.get("dbms"), row.get("table"))
+                    self.rows[key] = self.rows.get(key, 0) + 1
+            return 200, ""
+
+        if command == "get streaming":
+            with self.lock:
+                lines = [f"{dbms}.{table} | {count}" for (dbms, table), count in self.rows.items()]
+            return 200, "DBMS.Table | Rows\n" + "\n".join(lines)
+
+        return 200, ""
+
+    def total_rows(self) -> int:
+        with self.lock:
+            return sum(self.rows.values())
+
+
+def make_handler(node: StubNode):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _respond(self, method: str):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length) if length else b""
+            status, text = node.handle(method, self.headers.get("command", ""), self.headers.get("topic"), body)
+            payload = text.encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "text/plain")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            self._respond("GET")
+
+        def do_POST(self):
+            self._respond("POST")
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def start_stub(port: int = 0, **options):
+    """
+    Start a stub node on a background thread; returns (server, node).
+    server.server_address[1] is the port when port=0.
+    """
+    node = StubNode(**options)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(node))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="stub-node", daemon=True).start()
+    return server, node
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub AnyLog / EdgeLake node for ingest testing")
+    parser.add_argument("--port", type=int, default=32249)
+    parser.add_argument("--latency", type=float, default=0.0, help="ms added to every data POST")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- ms of random latency")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of data POSTs answered 503")
+    args = parser.parse_args()
+
+    server, node = start_stub(args.port, latency=args.latency / 1000, jitter=args.jitter / 1000, fail_rate=args.fail_rate)
+    print(f"Stub node listening on 127.0.0.1:{server.server_address[1]}")
+    try:
+        while True:
+            time.sleep(10)
+            print(f"rows received: {node.total_rows()}")
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()